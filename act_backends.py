@@ -0,0 +1,575 @@
+import os
+import re
+import json
+import shutil
+import threading
+import contextlib
+import contextvars
+import subprocess
+from typing import Dict, List, Optional, Any, Callable, Iterator, Tuple
+
+import act_wire
+
+# Compute backends behind act_core._run_r_script. Every operation is named
+# by its R script and takes the same payload, so a backend only has to turn
+# (script, payload) into the script's output:
+#
+#   rscript  one Rscript launch per call (the reference)
+#   pool     persistent R workers (act_rworker.py)
+#   rpy2     R embedded in this process, running the scripts through
+#            run_script() in r/act_common.R exactly as the workers do
+#   native   NumPy (act_native.py) and the dictionary store and index, for
+#            the scripts it implements; equations need the shared
+#            coefficient tables (act_core._with_coefficients)
+#   auto     native where it can answer, otherwise the R backend of ACT_R_MODE
+#
+# ACT_BACKEND selects the backend of the process. The default is the R
+# backend of ACT_R_MODE, as before backends existed; auto and native are
+# opt-in. use()
+# selects one for the current request or thread; app.py does so for the
+# X-ACT-Backend header. A backend that cannot run a script raises
+# UnsupportedOperation, and the call falls back to the R backend unless the
+# selection is strict (as in the conformance tests, test_backends.py).
+
+R_SCRIPT_DIR = os.path.join(os.path.dirname(__file__), "r")
+# Python <-> R payload encoding of the rscript backend: "json" or "binary" (see act_wire.py)
+R_WIRE_FORMAT = os.environ.get("ACT_R_WIRE", "json").lower()
+# R backend used by auto and as the fallback: "process" (rscript) or "worker" (pool)
+R_MODE = os.environ.get("ACT_R_MODE", "process").lower()
+DEFAULT_BACKEND = os.environ.get("ACT_BACKEND", "pool" if R_MODE == "worker" else "rscript").lower()
+
+_REGEX_CHARS = re.compile(r"[.^$*+?()\[\]{}|\\]")
+
+
+class UnsupportedOperation(Exception):
+    """A backend cannot run this script (or this payload of it)."""
+
+
+class Backend:
+    name = ""
+
+    def available(self) -> bool:
+        return True
+
+    def run(self, script_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class RscriptBackend(Backend):
+    """
+    Runs the script in a fresh Rscript process, passing input via stdin and
+    parsing the output from stdout. The payload is JSON, or an ACTB frame
+    with numeric arrays as packed doubles when R_WIRE_FORMAT is "binary".
+    """
+    name = "rscript"
+
+    def available(self) -> bool:
+        return shutil.which("Rscript") is not None
+
+    def run(self, script_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        if R_WIRE_FORMAT == "binary":
+            payload = act_wire.encode_frame(input_data)
+        else:
+            payload = json.dumps(input_data).encode("utf-8")
+
+        process = subprocess.run(
+            ["Rscript", os.path.join(R_SCRIPT_DIR, script_name)],
+            input=payload,
+            capture_output=True,
+            check=False
+        )
+        stderr = process.stderr.decode("utf-8", errors="replace")
+
+        if process.returncode != 0:
+            raise RuntimeError(f"R script failed with error:\n{stderr}")
+
+        if act_wire.is_frame(process.stdout):
+            return act_wire.decode_frame(process.stdout)
+
+        output = process.stdout.decode("utf-8", errors="replace").strip()
+        if not output:
+            # Try to provide more context if stderr is also empty
+            raise RuntimeError(f"R script returned empty output. Stderr: {stderr}")
+
+        try:
+            return json.loads(output)
+        except json.JSONDecodeError as e:
+            raise RuntimeError(f"Failed to parse R output: {output}. Error: {e}")
+
+
+class RWorkerBackend(Backend):
+    """Runs the script in a persistent R worker (act_rworker.py)."""
+    name = "pool"
+
+    def available(self) -> bool:
+        return shutil.which("Rscript") is not None
+
+    def run(self, script_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        import act_rworker
+        output = act_rworker.call(script_name, input_data)
+        if output is None:
+            raise RuntimeError("R script returned empty output.")
+        return output
+
+
+class RPy2Backend(Backend):
+    """
+    Runs the script in R embedded in this process. Calls are serialized (R
+    is single-threaded) and exchange ACTB frames with run_script_frame().
+    """
+    name = "rpy2"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._function: Optional[Callable] = None
+        self._pid: Optional[int] = None
+
+    def available(self) -> bool:
+        try:
+            import rpy2.robjects  # noqa: F401
+        except Exception:
+            return False
+        return True
+
+    def _run_script_frame(self) -> Callable:
+        # A forked child must not reuse the parent's embedded R state
+        if self._function is None or self._pid != os.getpid():
+            import rpy2.robjects as ro
+            ro.r("suppressPackageStartupMessages(library(jsonlite))")
+            ro.r["source"](os.path.join(R_SCRIPT_DIR, "act_common.R"))
+            self._function = ro.globalenv["run_script_frame"]
+            self._pid = os.getpid()
+        return self._function
+
+    def run(self, script_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        from rpy2.robjects.vectors import ByteVector
+        with self._lock:
+            reply = self._run_script_frame()(
+                os.path.join(R_SCRIPT_DIR, script_name),
+                ByteVector(act_wire.encode_frame(input_data))
+            )
+            message = act_wire.decode_frame(bytes(bytearray(reply)))
+        if message.get("type") == "error":
+            raise RuntimeError(f"R script failed with error:\n{message.get('error')}")
+        output = message.get("output")
+        if output is None:
+            raise RuntimeError("R script returned empty output.")
+        return output
+
+
+def _equation(payload: Dict[str, Any], type: str = "impressionabo"):
+    """Equation set from the payload's shared coefficients (load_equation() in r/act_common.R)."""
+    import act_equations
+    shared = payload.get("coefficients")
+    if not shared or shared.get("type", type) != type:
+        raise UnsupportedOperation(f"no shared {type} coefficients in the payload")
+    return act_equations.EquationSet(
+        key="",
+        gender="",
+        type=type,
+        terms=tuple(shared["terms"]),
+        matrix=tuple(tuple(float(v) for v in row) for row in shared["matrix"])
+    )
+
+
+def _meta(payload: Dict[str, Any], legacy_dictionary: bool = True) -> Dict[str, str]:
+    import act_equations
+    selector = payload if legacy_dictionary else {k: v for k, v in payload.items() if k != "dictionary"}
+    key, gender = act_equations.parse_equation(selector)
+    return {"equation_key": key, "equation_gender": gender}
+
+
+def _epa(payload: Dict[str, Any], name: str) -> List[float]:
+    import act_index
+    return act_index.as_epa(payload.get(name), name)
+
+
+def _store(payload: Dict[str, Any], default: str = "us_2015") -> str:
+    import act_store
+    dictionary = payload.get("dictionary") or default
+    if not act_store.has_dictionary(dictionary):
+        raise UnsupportedOperation(f"dictionary {dictionary} is not in the dictionary store")
+    return dictionary
+
+
+def _index(dictionary: str):
+    import act_index
+    # Loading the index from actdata would launch R; only use it if it is cheap
+    if not act_index.is_loaded() and not act_index.preload():
+        raise UnsupportedOperation("the dictionary index is not loaded")
+    return act_index.get_dictionary(dictionary)
+
+
+class NativeBackend(Backend):
+    """
+    NumPy versions of the scripts with closed-form math, and dictionary
+    scripts answered from the store and index. Mirrors each script's output;
+    invalid input yields {"error": ...} as in R.
+    """
+    name = "native"
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            "lookup_epa.R": self._lookup_epa,
+            "lookup_batch.R": self._lookup_batch,
+            "search_labels.R": self._search_labels,
+            "closest_term.R": self._closest_term,
+            "transient_impressions.R": self._transient_impressions,
+            "deflection.R": self._deflection,
+            "transients.R": self._transients,
+            "emotions.R": self._emotions,
+            "optimal_behavior.R": self._optimal_behavior,
+            "modify_identity.R": self._modify_identity,
+            "reidentify.R": self._reidentify,
+            "rank_behaviors.R": self._rank_behaviors,
+            "solve_and_label.R": self._solve_and_label,
+        }
+
+    def scripts(self) -> List[str]:
+        return sorted(self._handlers)
+
+    def run(self, script_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        handler = self._handlers.get(script_name)
+        if handler is None:
+            raise UnsupportedOperation(f"{script_name} has no native implementation")
+        try:
+            return handler(input_data)
+        except ValueError as e:
+            return {"error": str(e)}
+
+    # --- Dictionary scripts ---
+
+    def _lookup_epa(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_store
+        found = act_store.lookup(str(payload.get("label") or ""), payload.get("type"), _store(payload))
+        if "error" not in found and found["metadata"] is None:
+            raise UnsupportedOperation("the dictionary store has no row metadata; rebuild it from a current export")
+        return found
+
+    def _lookup_batch(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_store
+        dictionary = _store(payload)
+        labels = [str(label) for label in payload.get("labels") or []]
+        type = (payload.get("type") or "identity").lower()
+        if not labels:
+            return {"error": "labels must be a non-empty array"}
+        if type not in act_store.COMPONENTS:
+            return {"error": f"Invalid type: {type}"}
+        results = []
+        for label in labels:
+            found = act_store.lookup(label, type, dictionary)
+            if "error" in found:
+                results.append({"label": label, "error": found["error"]})
+            else:
+                results.append({"label": label, "term": found["term"], "epa": found["epa"]})
+        return {"dictionary": dictionary, "type": type, "results": results}
+
+    def _search_labels(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_store
+        result = act_store.search(
+            _store(payload), payload.get("search"), payload.get("limit", 100), payload.get("offset", 0)
+        )
+        if result is None:
+            raise UnsupportedOperation("regular-expression searches need R")
+        return result
+
+    def _closest_term(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_store
+        return act_store.closest(
+            payload.get("epa"), payload.get("type", "identity"), _store(payload, "us2010"), payload.get("n", 5)
+        )
+
+    # --- Impression formation ---
+
+    def _transient_impressions(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_native
+        equation = _equation(payload)
+        fundamentals = _epa(payload, "actor") + _epa(payload, "behavior") + _epa(payload, "object")
+        return {
+            "transient": act_native.split_elements(act_native.apply_equation(fundamentals, equation)[0]),
+            "meta": _meta(payload)
+        }
+
+    def _deflection(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        fundamentals = payload.get("fundamentals")
+        transients = payload.get("transients")
+        if not fundamentals or not transients:
+            return {"error": "Both 'fundamentals' and 'transients' are required"}
+
+        def element(name: str) -> float:
+            # An element missing from either side contributes nothing (as in R)
+            try:
+                f = [float(v) for v in fundamentals.get(name) or []]
+                t = [float(v) for v in transients.get(name) or []]
+            except (TypeError, ValueError):
+                return 0.0
+            if len(f) != 3 or len(t) != 3:
+                return 0.0
+            return sum((a - b) ** 2 for a, b in zip(f, t))
+
+        parts = {name: element(name) for name in ("actor", "behavior", "object")}
+        return {
+            "deflection": dict(
+                total=round(sum(parts.values()), 4),
+                **{name: round(value, 4) for name, value in parts.items()}
+            )
+        }
+
+    def _transients(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_native
+        try:
+            actor, behavior, obj = (_epa(payload, name) for name in ("actor", "behavior", "object"))
+        except ValueError:
+            return {"error": "actor, behavior, and object must each be [E, P, A] arrays"}
+        values = act_native.simplified_transients(actor, behavior, obj)
+        return {
+            "transients": {
+                name: [round(float(v), 3) for v in value[0]]
+                for name, value in zip(("actor", "behavior", "object"), values)
+            },
+            "meta": {"equation_key": payload.get("dictionary") or "us2010"}
+        }
+
+    def _emotions(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_native
+        try:
+            actor, behavior, obj = (_epa(payload, name) for name in ("actor", "behavior", "object"))
+        except ValueError:
+            return {"error": "actor, behavior, and object must each be [E, P, A] arrays"}
+        actor_emotion, object_emotion = act_native.characteristic_emotions(actor, behavior, obj)
+        return {
+            "emotions": {
+                "actor": [round(float(v), 3) for v in actor_emotion[0]],
+                "object": [round(float(v), 3) for v in object_emotion[0]]
+            },
+            "meta": {"equation_key": payload.get("dictionary") or "us2010"}
+        }
+
+    def _optimal_behavior(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_native
+        equation = _equation(payload)
+        fundamentals = _epa(payload, "actor") + [0.0, 0.0, 0.0] + _epa(payload, "object")
+        solved = act_native.solve_element(fundamentals, equation, "behavior")[0]
+        return {"optimal_behavior": [float(v) for v in solved], "meta": _meta(payload)}
+
+    def _modify_identity(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_native
+        equation = _equation(payload, "traitid")
+        value = act_native.amalgamate(_epa(payload, "modifier"), _epa(payload, "identity"), equation)[0]
+        return {"modified_identity": [float(v) for v in value], "meta": _meta(payload)}
+
+    def _reidentify(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_native
+        element = payload.get("element") or "actor"
+        try:
+            fundamentals = _epa(payload, "actor") + _epa(payload, "behavior") + _epa(payload, "object")
+        except ValueError:
+            return {"error": "actor, behavior, and object must each be [E, P, A] arrays"}
+        if element not in ("actor", "object"):
+            return {"error": "element must be 'actor' or 'object'"}
+        equation = _equation(payload)
+        solved = act_native.solve_element(fundamentals, equation, element)
+        reidentified = act_native.substitute(fundamentals, element, solved)
+        total = act_native.deflection(reidentified, act_native.apply_equation(reidentified, equation))[0]
+        return {
+            "reidentified": {"element": element, "epa": [round(float(v), 3) for v in solved[0]]},
+            "deflection": round(float(total), 4),
+            "meta": _meta(payload)
+        }
+
+    # --- Impression formation over dictionary terms ---
+
+    def _rank_behaviors(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import numpy as np
+        import act_native
+        search = payload.get("search")
+        if search and _REGEX_CHARS.search(search):
+            raise UnsupportedOperation("regular-expression searches need R")
+        equation = _equation(payload)
+        dictionary = payload.get("dictionary") or "us_2015"
+        index = _index(dictionary)
+        actor = _epa(payload, "actor")
+        obj = _epa(payload, "object")
+        group = payload.get("group")
+        top_k = int(payload.get("top_k") or 10)
+
+        # Candidates as rank_behaviors.R selects them: group and search
+        # filters first, then the first rating of each term
+        terms, rows, seen = [], [], set()
+        for row in index.component_rows("behavior"):
+            term = index.terms[row]
+            if group and index.group(row) != group:
+                continue
+            if search and search.lower() not in term.lower():
+                continue
+            if term in seen:
+                continue
+            seen.add(term)
+            terms.append(term)
+            rows.append(row)
+        if not rows:
+            return {"error": f"No behaviors found in {dictionary}"}
+
+        n = len(rows)
+        fundamentals = np.hstack((
+            np.tile(actor, (n, 1)), index.epa[rows].astype(np.float64), np.tile(obj, (n, 1))
+        ))
+        transients = act_native.apply_equation(fundamentals, equation)
+        totals = act_native.deflection(fundamentals, transients)
+
+        def rounded(values, digits: int = 3) -> List[float]:
+            return [round(float(v), digits) for v in values]
+
+        behaviors = [
+            {
+                "term": terms[i],
+                "epa": rounded(fundamentals[i, 3:6]),
+                "deflection": round(float(totals[i]), 4),
+                "transient": {
+                    "actor": rounded(transients[i, 0:3]),
+                    "behavior": rounded(transients[i, 3:6]),
+                    "object": rounded(transients[i, 6:9])
+                }
+            }
+            for i in np.argsort(totals, kind="stable")[:max(top_k, 0)]
+        ]
+        return {
+            "actor": actor,
+            "object": obj,
+            "dictionary": dictionary,
+            "evaluated": n,
+            "behaviors": behaviors,
+            "meta": _meta(payload, legacy_dictionary=False)
+        }
+
+    def _solve_and_label(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        import act_native
+        element = payload.get("element") or "behavior"
+        if element not in ("behavior", "actor", "object"):
+            return {"error": "element must be 'behavior', 'actor' or 'object'"}
+        equation = _equation(payload)
+        dictionary = payload.get("dictionary") or "us_2015"
+        actor = _epa(payload, "actor")
+        obj = _epa(payload, "object")
+        index = _index(dictionary)
+
+        if element == "behavior":
+            solved = [float(v) for v in act_native.solve_element(actor + [0.0, 0.0, 0.0] + obj, equation, "behavior")[0]]
+            component = "behavior"
+        else:
+            fundamentals = actor + _epa(payload, "behavior") + obj
+            solved = [round(float(v), 3) for v in act_native.solve_element(fundamentals, equation, element)[0]]
+            component = "identity"
+
+        matches = index.nearest(solved, component, int(payload.get("n") or 5))
+        if not matches:
+            return {"error": f"No terms found for type: {component}"}
+        result = {
+            "dictionary": dictionary,
+            "type": component,
+            "matches": matches,
+            "meta": _meta(payload, legacy_dictionary=False)
+        }
+        if element == "behavior":
+            result["optimal_behavior"] = solved
+        else:
+            result["reidentified"] = {"element": element, "epa": solved}
+        return result
+
+
+class AutoBackend(Backend):
+    """Native where it can answer, otherwise the R backend."""
+    name = "auto"
+
+    def run(self, script_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return BACKENDS["native"].run(script_name, input_data)
+        except UnsupportedOperation:
+            return r_backend().run(script_name, input_data)
+
+
+BACKENDS: Dict[str, Backend] = {
+    backend.name: backend
+    for backend in (RscriptBackend(), RWorkerBackend(), RPy2Backend(), NativeBackend(), AutoBackend())
+}
+
+_selected: contextvars.ContextVar[Optional[Tuple[str, bool]]] = contextvars.ContextVar("act_backend", default=None)
+
+
+def get_backend(name: str) -> Backend:
+    backend = BACKENDS.get((name or "").lower())
+    if backend is None:
+        raise ValueError(f"Unknown backend: {name} (expected one of {', '.join(sorted(BACKENDS))})")
+    return backend
+
+
+def r_backend() -> Backend:
+    """The R backend of ACT_R_MODE, used by auto and as the fallback."""
+    return BACKENDS["pool" if R_MODE == "worker" else "rscript"]
+
+
+def select(name: str, strict: bool = False) -> contextvars.Token:
+    """Select a backend for the current context; undo with reset(token)."""
+    return _selected.set((get_backend(name).name, strict))
+
+
+def reset(token: contextvars.Token) -> None:
+    _selected.reset(token)
+
+
+@contextlib.contextmanager
+def use(name: str, strict: bool = False) -> Iterator[Backend]:
+    """
+    Run the calls in the block on one backend. Unless strict, scripts the
+    backend does not implement fall back to the R backend.
+    """
+    token = select(name, strict)
+    try:
+        yield get_backend(name)
+    finally:
+        reset(token)
+
+
+def selected() -> Optional[str]:
+    """Backend selected for the current context, if any (None: the process default)."""
+    selection = _selected.get()
+    return selection[0] if selection else None
+
+
+def current() -> str:
+    return selected() or DEFAULT_BACKEND
+
+
+def _call(backend: Backend, script_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return backend.run(script_name, input_data)
+    except UnsupportedOperation:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Error processing {script_name}: {e}")
+
+
+def run(script_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Run an operation (named by its R script) on the selected backend."""
+    script_path = os.path.join(R_SCRIPT_DIR, script_name)
+    if not os.path.exists(script_path):
+        raise FileNotFoundError(f"R script not found: {script_path}")
+
+    name, strict = _selected.get() or (DEFAULT_BACKEND, False)
+    try:
+        return _call(get_backend(name), script_name, input_data)
+    except UnsupportedOperation:
+        if strict:
+            raise
+        return _call(r_backend(), script_name, input_data)
+
+
+def status() -> Dict[str, Any]:
+    """Configured and available backends for the admin endpoint."""
+    return {
+        "default": DEFAULT_BACKEND,
+        "r_backend": r_backend().name,
+        "wire_format": R_WIRE_FORMAT,
+        "backends": {name: backend.available() for name, backend in BACKENDS.items()},
+        "native_scripts": BACKENDS["native"].scripts()
+    }
@@ -0,0 +1,479 @@
+import os
+from typing import Dict, List, Optional, Any, Iterator, Tuple, Callable
+
+import act_core
+import act_equations
+import act_index
+
+# Record generators behind the batch operations. Each yields one JSON-ready
+# record per input item and computes lazily in chunks, so a streaming
+# response only holds one chunk in memory and stops computing when the
+# client stops reading.
+
+CHUNK_SIZE = int(os.environ.get("ACT_BATCH_CHUNK_SIZE", "100"))
+LABEL_PAGE_SIZE = int(os.environ.get("ACT_LABEL_PAGE_SIZE", "1000"))
+
+
+def _chunks(items: List[Any], size: int = CHUNK_SIZE) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _fields(item: Any, kind: str, names: Tuple[str, ...]) -> Dict[str, Any]:
+    """The input record itself, if it is an object."""
+    if not isinstance(item, dict):
+        quoted = [f"'{name}'" for name in names]
+        raise ValueError(f"Invalid {kind}: expected an object with {', '.join(quoted[:-1])} and {quoted[-1]}.")
+    return item
+
+
+def _event_fundamentals(event: Any) -> List[float]:
+    """The 9 fundamentals of an {"actor", "behavior", "object"} event, validated."""
+    event = _fields(event, "event", ("actor", "behavior", "object"))
+    return [v for element in ("actor", "behavior", "object") for v in act_index.as_epa(event.get(element), element)]
+
+
+def _validate(chunk: List[Any], check: Callable[[Any], Any]) -> Tuple[List[Any], Dict[int, str]]:
+    """Checked values of the valid records of a chunk, and the errors of the others by position."""
+    values, errors = [], {}
+    for i, item in enumerate(chunk):
+        try:
+            values.append(check(item))
+        except ValueError as e:
+            errors[i] = str(e)
+    return values, errors
+
+
+def _deflections(fundamentals, transients) -> List[Dict[str, float]]:
+    """Per-event deflection as deflection.R reports it: total, actor, behavior and object."""
+    import act_native
+    parts = act_native.element_deflection(fundamentals, transients)
+    return [
+        dict(total=round(float(row.sum()), 4), **{
+            name: round(float(value), 4) for name, value in zip(act_native.ELEMENTS, row)
+        })
+        for row in parts
+    ]
+
+
+def iter_lookup_epa(labels: List[str], type: str, dictionary: str = "us_2015") -> Iterator[Dict[str, Any]]:
+    """Yield one lookup record per label, one R launch per chunk."""
+    for chunk in _chunks(labels):
+        result = act_core._run_r_script("lookup_batch.R", {
+            "labels": chunk,
+            "type": type,
+            "dictionary": dictionary
+        })
+        if "error" in result:
+            raise ValueError(result["error"])
+        for record in result.get("results", []):
+            yield record
+
+
+def iter_transients(
+    events: List[Dict[str, Any]],
+    equation_key: str = act_equations.DEFAULT_EQUATION_KEY,
+    equation_gender: str = act_equations.DEFAULT_EQUATION_GENDER
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield transient impressions and deflection per event. Uses the native
+    engine with the cached coefficient table when available, otherwise one
+    transient_impressions.R launch per event. Invalid events yield an
+    {"index", "error"} record; the others are still computed.
+    """
+    try:
+        equation = act_equations.get_equation(equation_key, equation_gender, "impressionabo")
+    except (ValueError, RuntimeError):
+        equation = None
+
+    if equation is None:
+        for index, event in enumerate(events):
+            try:
+                _event_fundamentals(event)
+            except ValueError as e:
+                yield {"index": index, "error": str(e)}
+                continue
+            result = act_core.compute_transient_impressions(dict(
+                event, equation_key=equation_key, equation_gender=equation_gender
+            ))
+            if "error" in result:
+                yield {"index": index, "error": result["error"]}
+                continue
+            transients = result["transient"]
+            deflection = act_core.compute_deflection(event, transients).get("deflection")
+            yield {"index": index, "transient": transients, "deflection": deflection}
+        return
+
+    import act_native
+
+    offset = 0
+    for chunk in _chunks(events):
+        rows, errors = _validate(chunk, _event_fundamentals)
+        if rows:
+            fundamentals = act_native.as_events(rows)
+            transients = act_native.apply_equation(fundamentals, equation)
+            deflections = _deflections(fundamentals, transients)
+        row = 0
+        for i in range(len(chunk)):
+            if i in errors:
+                yield {"index": offset + i, "error": errors[i]}
+                continue
+            yield {
+                "index": offset + i,
+                "transient": act_native.split_elements(transients[row]),
+                "deflection": deflections[row]
+            }
+            row += 1
+        offset += len(chunk)
+
+
+def iter_emotions(
+    events: List[Dict[str, Any]],
+    dictionary: Optional[str] = None,
+    label_component: str = "modifier",
+    n: int = 1
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield actor/object emotions per event, optionally with the nearest
+    dictionary terms (emotion modifiers by default) for each emotion.
+    Invalid events yield an {"index", "error"} record.
+    """
+    import act_native
+
+    index = None
+    if dictionary:
+        index = act_index.get_dictionary(dictionary)
+
+    offset = 0
+    for chunk in _chunks(events):
+        rows, errors = _validate(chunk, _event_fundamentals)
+        if rows:
+            fundamentals = act_native.as_events(rows)
+            actor_emotion, object_emotion = act_native.characteristic_emotions(
+                fundamentals[:, 0:3], fundamentals[:, 3:6], fundamentals[:, 6:9]
+            )
+        row = 0
+        for i in range(len(chunk)):
+            if i in errors:
+                yield {"index": offset + i, "error": errors[i]}
+                continue
+            record = {
+                "index": offset + i,
+                "emotions": {
+                    "actor": [round(float(v), 3) for v in actor_emotion[row]],
+                    "object": [round(float(v), 3) for v in object_emotion[row]]
+                }
+            }
+            if index is not None:
+                record["labels"] = {
+                    "actor": index.nearest(actor_emotion[row], label_component, n),
+                    "object": index.nearest(object_emotion[row], label_component, n)
+                }
+            yield record
+            row += 1
+        offset += len(chunk)
+
+
+def iter_reidentify(
+    events: List[Dict[str, Any]],
+    element: str = "actor",
+    dictionary: Optional[str] = None,
+    n: int = 5,
+    equation_key: str = act_equations.DEFAULT_EQUATION_KEY,
+    equation_gender: str = act_equations.DEFAULT_EQUATION_GENDER
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the deflection-minimizing actor or object EPA per event, with the
+    nearest k dictionary identities when a dictionary is given. Solved
+    natively in batches when the equation set is cached, otherwise one
+    reidentify.R launch per event. Invalid events yield an {"index", "error"}
+    record.
+    """
+    if element not in ("actor", "object"):
+        raise ValueError("element must be 'actor' or 'object'")
+
+    index = None
+    if dictionary:
+        index = act_index.get_dictionary(dictionary)
+
+    try:
+        equation = act_equations.get_equation(equation_key, equation_gender, "impressionabo")
+    except (ValueError, RuntimeError):
+        equation = None
+
+    if equation is None:
+        for i, event in enumerate(events):
+            try:
+                fundamentals = _event_fundamentals(event)
+            except ValueError as e:
+                yield {"index": i, "error": str(e)}
+                continue
+            result = act_core._run_r_script("reidentify.R", {
+                "actor": fundamentals[0:3],
+                "behavior": fundamentals[3:6],
+                "object": fundamentals[6:9],
+                "element": element,
+                "equation_key": equation_key,
+                "equation_gender": equation_gender
+            })
+            if "error" in result:
+                yield {"index": i, "error": result["error"]}
+                continue
+            record = {
+                "index": i,
+                "element": element,
+                "epa": result["reidentified"]["epa"],
+                "deflection": result["deflection"]
+            }
+            if index is not None:
+                record["matches"] = index.nearest(record["epa"], "identity", n)
+            yield record
+        return
+
+    import act_native
+
+    offset = 0
+    for chunk in _chunks(events):
+        rows, errors = _validate(chunk, _event_fundamentals)
+        if rows:
+            fundamentals = act_native.as_events(rows)
+            solved = act_native.solve_element(fundamentals, equation, element)
+            optimal = act_native.substitute(fundamentals, element, solved)
+            totals = act_native.deflection(optimal, act_native.apply_equation(optimal, equation))
+        row = 0
+        for i in range(len(chunk)):
+            if i in errors:
+                yield {"index": offset + i, "error": errors[i]}
+                continue
+            record = {
+                "index": offset + i,
+                "element": element,
+                "epa": [round(float(v), 3) for v in solved[row]],
+                "deflection": round(float(totals[row]), 4)
+            }
+            if index is not None:
+                record["matches"] = index.nearest(solved[row], "identity", n)
+            yield record
+            row += 1
+        offset += len(chunk)
+
+
+def iter_modify(
+    pairs: List[Dict[str, Any]],
+    dictionary: Optional[str] = None,
+    equation_key: str = act_equations.DEFAULT_EQUATION_KEY,
+    equation_gender: str = act_equations.DEFAULT_EQUATION_GENDER
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the modified identity of each modifier/identity pair. Pairs are
+    given as EPA vectors or, with a dictionary, as labels; labelled pairs
+    are read from the precomputed amalgamation table when one exists.
+    Invalid pairs yield an {"index", "error"} record.
+    """
+    try:
+        equation = act_equations.get_equation(equation_key, equation_gender, "traitid")
+    except (ValueError, RuntimeError):
+        equation = None
+
+    if dictionary:
+        # An unknown dictionary fails the whole request, not each pair
+        act_index.get_dictionary(dictionary)
+
+    def start(i: int, pair: Any) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"index": i}
+        pair = _fields(pair, "pair", ("modifier", "identity"))
+        if isinstance(pair.get("modifier"), str) and isinstance(pair.get("identity"), str):
+            record.update(modifier=pair["modifier"], identity=pair["identity"])
+        return record
+
+    if equation is None:
+        for i, pair in enumerate(pairs):
+            record = {"index": i}
+            try:
+                record = start(i, pair)
+                result = act_core._run_r_script("modify_identity.R", {
+                    "modifier": act_index.resolve_epa(pair.get("modifier"), "modifier", dictionary),
+                    "identity": act_index.resolve_epa(pair.get("identity"), "identity", dictionary),
+                    "equation_key": equation_key,
+                    "equation_gender": equation_gender
+                })
+            except ValueError as e:
+                result = {"error": str(e)}
+            if "error" in result:
+                yield dict(record, error=result["error"])
+            else:
+                yield dict(record, modified_identity=result["modified_identity"], source="computed")
+        return
+
+    import act_native
+
+    table = None
+    if dictionary:
+        import act_tables
+        table = act_tables.amalgamation_table(dictionary, equation_key, equation_gender)
+
+    offset = 0
+    for chunk in _chunks(pairs):
+        records: List[Dict[str, Any]] = []
+        pending, modifiers, identities = [], [], []
+        for i, pair in enumerate(chunk):
+            try:
+                record = start(offset + i, pair)
+            except ValueError as e:
+                records.append({"index": offset + i, "error": str(e)})
+                continue
+            labelled = "modifier" in record
+            cached = table.get(pair["modifier"], pair["identity"]) if labelled and table else None
+            if cached is not None:
+                record.update(modified_identity=[round(v, 3) for v in cached], source="table")
+            else:
+                try:
+                    modifier = act_index.resolve_epa(pair.get("modifier"), "modifier", dictionary)
+                    identity = act_index.resolve_epa(pair.get("identity"), "identity", dictionary)
+                    modifiers.append(modifier)
+                    identities.append(identity)
+                    pending.append(record)
+                except ValueError as e:
+                    record["error"] = str(e)
+            records.append(record)
+
+        if pending:
+            values = act_native.amalgamate(modifiers, identities, equation)
+            for record, value in zip(pending, values):
+                record.update(modified_identity=[round(float(v), 3) for v in value], source="computed")
+
+        for record in records:
+            yield record
+        offset += len(chunk)
+
+
+def iter_optimal_behavior(
+    pairs: List[Dict[str, Any]],
+    dictionary: Optional[str] = None,
+    n: int = 5,
+    equation_key: str = act_equations.DEFAULT_EQUATION_KEY,
+    equation_gender: str = act_equations.DEFAULT_EQUATION_GENDER
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the deflection-minimizing behavior EPA of each actor/object pair
+    (optionally in a setting), with the nearest k dictionary behaviors when a
+    dictionary is given. Pairs are EPA vectors or, with a dictionary, labels.
+    Solved natively in batches from the cached impressionabo (impressionabos
+    with a setting) coefficients, otherwise one optimal_behavior.R launch per
+    pair. Invalid pairs yield an {"index", "error"} record.
+    """
+    equations = {}
+    for type in ("impressionabo", "impressionabos"):
+        try:
+            equations[type] = act_equations.get_equation(equation_key, equation_gender, type)
+        except (ValueError, RuntimeError):
+            equations[type] = None
+
+    index = None
+    if dictionary:
+        index = act_index.get_dictionary(dictionary)
+
+    if equations["impressionabo"] is None:
+        for i, pair in enumerate(pairs):
+            record: Dict[str, Any] = {"index": i}
+            try:
+                pair = _fields(pair, "pair", ("actor", "object"))
+                if pair.get("setting") is not None:
+                    raise ValueError("Settings require the cached impressionabos equation")
+                actor = act_index.resolve_epa(pair.get("actor"), "identity", dictionary)
+                obj = act_index.resolve_epa(pair.get("object"), "identity", dictionary)
+                result = act_core._run_r_script("optimal_behavior.R", {
+                    "actor": actor,
+                    "object": obj,
+                    "equation_key": equation_key,
+                    "equation_gender": equation_gender
+                })
+            except ValueError as e:
+                result = {"error": str(e)}
+            if "error" not in result:
+                # Deflection of the event with the optimal behavior, as the native path reports it
+                event = {"actor": actor, "behavior": [float(v) for v in result["optimal_behavior"]], "object": obj}
+                transients = act_core.compute_transient_impressions(dict(
+                    event, equation_key=equation_key, equation_gender=equation_gender
+                ))
+                if "error" in transients:
+                    result = transients
+                else:
+                    deflection = act_core.compute_deflection(event, transients["transient"])
+                    result = dict(result, **deflection) if "error" not in deflection else deflection
+            if "error" in result:
+                record["error"] = result["error"]
+            else:
+                record["optimal_behavior"] = [round(float(v), 3) for v in result["optimal_behavior"]]
+                record["deflection"] = result["deflection"]["total"]
+                if index is not None:
+                    record["matches"] = index.nearest(record["optimal_behavior"], "behavior", n)
+            yield record
+        return
+
+    import act_native
+
+    offset = 0
+    for chunk in _chunks(pairs):
+        records: List[Dict[str, Any]] = []
+        # Events with a setting use the 12-input equation; solve each group at once
+        groups: Dict[str, Any] = {"impressionabo": ([], []), "impressionabos": ([], [])}
+        for i, pair in enumerate(chunk):
+            record = {"index": offset + i}
+            records.append(record)
+            try:
+                pair = _fields(pair, "pair", ("actor", "object"))
+                fundamentals = act_index.resolve_epa(pair.get("actor"), "identity", dictionary)
+                fundamentals += [0.0, 0.0, 0.0]
+                fundamentals += act_index.resolve_epa(pair.get("object"), "identity", dictionary)
+                type = "impressionabo"
+                if pair.get("setting") is not None:
+                    if equations["impressionabos"] is None:
+                        raise ValueError("Settings require the cached impressionabos equation")
+                    fundamentals += act_index.resolve_epa(pair["setting"], "setting", dictionary)
+                    type = "impressionabos"
+            except ValueError as e:
+                record["error"] = str(e)
+                continue
+            groups[type][0].append(record)
+            groups[type][1].append(fundamentals)
+
+        for type, (pending, rows) in groups.items():
+            if not pending:
+                continue
+            equation = equations[type]
+            fundamentals = act_native.as_events(rows)
+            solved = act_native.solve_element(fundamentals, equation, "behavior")
+            optimal = act_native.substitute(fundamentals, "behavior", solved)
+            totals = act_native.deflection(optimal, act_native.apply_equation(optimal, equation))
+            for record, epa, total in zip(pending, solved, totals):
+                record["optimal_behavior"] = [round(float(v), 3) for v in epa]
+                record["deflection"] = round(float(total), 4)
+                if index is not None:
+                    record["matches"] = index.nearest(epa, "behavior", n)
+
+        for record in records:
+            yield record
+        offset += len(chunk)
+
+
+def iter_trajectory(state: Dict[str, Any], behavior_labels: List[str]) -> Iterator[Dict[str, Any]]:
+    """Step the conversation through each behavior, yielding every step."""
+    for index, behavior_label in enumerate(behavior_labels):
+        state = act_core.step_conversation(state, behavior_label)
+        yield dict(state["last_result"], step=index, behavior_label=behavior_label)
+
+
+def iter_labels(dictionary: str, search_term: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield every matching term of a dictionary, paging through R."""
+    offset = 0
+    while True:
+        page = act_core.search_labels(dictionary, search_term, limit=LABEL_PAGE_SIZE, offset=offset)
+        if "error" in page:
+            raise ValueError(page["error"])
+        terms = page.get("terms", [])
+        for term in terms:
+            yield {"term": term}
+        offset += len(terms)
+        if not terms or offset >= page.get("total", 0):
+            return
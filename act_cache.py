@@ -0,0 +1,588 @@
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import hashlib
+import inspect
+import argparse
+import tempfile
+import functools
+import threading
+import socketserver
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from urllib.parse import urlparse
+
+import act_backends
+import act_singleflight
+
+# Result cache for act_core functions, shared across worker processes and,
+# with a network tier, across containers. Lookups go through three tiers:
+#
+#   local    in-process LRU of ACT_CACHE_LOCAL_SIZE entries
+#   shared   SQLite file ACT_CACHE_DB used by every process on the host
+#   network  optional RESP (Redis protocol) server at ACT_CACHE_URL,
+#            e.g. redis://cache:6379/0; `python act_cache.py serve` runs a
+#            small stand-in server for local use and tests
+#
+# A hit in a lower tier is copied into the tiers above it. Every entry has
+# its own TTL. Keys include the dictionary catalog version and the hash of
+# the equation sets, so a change of either moves all processes to a fresh
+# key space at once; entries of other versions are never read again and
+# are purged from the shared tier.
+#
+# The shared tier also holds leases for cross-process single flight: the
+# first process to miss a key claims its lease and computes; the others
+# poll the lease row until the leader stores the outcome there (act_
+# singleflight coalesces the threads within one process).
+
+ENABLED = os.environ.get("ACT_CACHE", "1").lower() not in ("0", "false", "no", "off")
+DEFAULT_TTL = int(os.environ.get("ACT_CACHE_TTL", "86400"))
+LOCAL_SIZE = int(os.environ.get("ACT_CACHE_LOCAL_SIZE", "1024"))
+CACHE_DB = os.environ.get("ACT_CACHE_DB", os.path.join(tempfile.gettempdir(), "act_cache.sqlite"))
+CACHE_URL = os.environ.get("ACT_CACHE_URL", "")
+NETWORK_TIMEOUT = float(os.environ.get("ACT_CACHE_NETWORK_TIMEOUT", "0.5"))
+NETWORK_RETRY_SECONDS = float(os.environ.get("ACT_CACHE_NETWORK_RETRY", "30"))
+# A lease outlives a crashed leader by at most LEASE_SECONDS (the request timeout)
+LEASE_SECONDS = float(os.environ.get("ACT_CACHE_LEASE", "120"))
+LEASE_POLL_SECONDS = float(os.environ.get("ACT_CACHE_LEASE_POLL", "0.05"))
+# How long a finished leader's outcome stays readable for its waiters
+LEASE_RESULT_SECONDS = float(os.environ.get("ACT_CACHE_LEASE_RESULT", "5"))
+
+# Bump when the format of cached values changes
+KEY_VERSION = "2"
+
+_MISSING = object()
+
+
+def _now() -> float:
+    return time.time()
+
+
+class LocalTier:
+    """Thread-safe LRU of (expires_at, value bytes)."""
+
+    def __init__(self, size: int = LOCAL_SIZE):
+        self.size = size
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= _now():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: bytes, expires_at: float) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteTier:
+    """Cache table in a SQLite file shared by all processes on the host."""
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str = CACHE_DB):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, outcome BLOB, expires_at REAL NOT NULL)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        row = self._connection().execute(
+            "SELECT expires_at, value FROM cache WHERE key = ? AND expires_at > ?", (key, _now())
+        ).fetchone()
+        return (row[0], bytes(row[1])) if row else None
+
+    def set(self, key: str, value: bytes, expires_at: float, namespace: str) -> None:
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, namespace, value, expires_at) VALUES (?, ?, ?, ?)",
+            (key, namespace, value, expires_at)
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge(namespace)
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def claim(self, key: str, owner: str, seconds: float) -> bool:
+        """Take the lease of a key unless another owner holds an unexpired one."""
+        conn = self._connection()
+        conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, _now()))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+            (key, owner, _now() + seconds)
+        )
+        return cursor.rowcount == 1
+
+    def lease(self, key: str) -> Optional[Tuple[Optional[bytes]]]:
+        """(outcome,) of an unexpired lease (outcome None while computing), else None."""
+        row = self._connection().execute(
+            "SELECT outcome FROM leases WHERE key = ? AND expires_at > ?", (key, _now())
+        ).fetchone()
+        return (None if row[0] is None else bytes(row[0]),) if row else None
+
+    def settle(self, key: str, owner: str, outcome: Optional[bytes], seconds: float) -> None:
+        """Publish a leader's outcome for seconds, or drop the lease when outcome is None."""
+        conn = self._connection()
+        if outcome is None:
+            conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+        else:
+            conn.execute(
+                "UPDATE leases SET outcome = ?, expires_at = ? WHERE key = ? AND owner = ?",
+                (outcome, _now() + seconds, key, owner)
+            )
+
+    def purge(self, namespace: Optional[str] = None) -> int:
+        """Drop expired entries and, given the current namespace, every other one."""
+        self._connection().execute("DELETE FROM leases WHERE expires_at <= ?", (_now(),))
+        if namespace is None:
+            cursor = self._connection().execute("DELETE FROM cache WHERE expires_at <= ?", (_now(),))
+        else:
+            cursor = self._connection().execute(
+                "DELETE FROM cache WHERE expires_at <= ? OR namespace != ?", (_now(), namespace)
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM cache")
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class RespError(Exception):
+    pass
+
+
+def _encode_command(*args: Any) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _read_reply(stream) -> Any:
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode("utf-8")
+    if kind == b"-":
+        raise RespError(rest.decode("utf-8"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(rest)
+        return None if length < 0 else [_read_reply(stream) for _ in range(length)]
+    raise RespError(f"Unexpected reply: {line!r}")
+
+
+class NetworkTier:
+    """Minimal RESP client (GET / SET PX / DEL) with one connection per thread."""
+
+    def __init__(self, url: str = CACHE_URL, timeout: float = NETWORK_TIMEOUT):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", "resp"):
+            raise ValueError(f"Unsupported cache URL: {url}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _command(self, *args: Any) -> Any:
+        if _now() < self._down_until:
+            raise ConnectionError("Network cache unavailable")
+        try:
+            stream = getattr(self._local, "stream", None)
+            if stream is None:
+                sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+                stream = sock.makefile("rwb")
+                self._local.stream = stream
+                if self.password:
+                    stream.write(_encode_command("AUTH", self.password))
+                    stream.flush()
+                    _read_reply(stream)
+                if self.db:
+                    stream.write(_encode_command("SELECT", self.db))
+                    stream.flush()
+                    _read_reply(stream)
+            stream.write(_encode_command(*args))
+            stream.flush()
+            return _read_reply(stream)
+        except (OSError, ConnectionError):
+            # Skip the network tier for a while instead of slowing every call
+            self._local.stream = None
+            self._down_until = _now() + NETWORK_RETRY_SECONDS
+            raise ConnectionError("Network cache unavailable")
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        # The value is prefixed with its expiry so upper tiers keep the TTL
+        data = self._command("GET", key)
+        if data is None:
+            return None
+        expires_at, _, value = data.partition(b"\n")
+        return float(expires_at), value
+
+    def set(self, key: str, value: bytes, expires_at: float) -> None:
+        ttl_ms = max(1, int((expires_at - _now()) * 1000))
+        self._command("SET", key, b"%r\n%s" % (expires_at, value), "PX", ttl_ms)
+
+    def delete(self, key: str) -> None:
+        self._command("DEL", key)
+
+
+_local = LocalTier()
+_shared: Optional[SQLiteTier] = SQLiteTier() if CACHE_DB else None
+_network: Optional[NetworkTier] = NetworkTier() if CACHE_URL else None
+_namespace: Optional[str] = None
+_stats = {
+    "local_hits": 0, "shared_hits": 0, "network_hits": 0, "misses": 0, "sets": 0, "errors": 0,
+    "leases": 0, "lease_joins": 0
+}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def namespace() -> str:
+    """
+    Key space of the current dictionary catalog and equation sets. When
+    either changes the local tier is dropped and the shared tier purged.
+    """
+    global _namespace
+    import act_equations
+    import act_index
+    catalog = act_index.available_catalog_version() or "uncatalogued"
+    equations = act_equations.available_catalog_hash() or "no-equations"
+    current = f"v{KEY_VERSION}:{catalog}:{equations}"
+    if current != _namespace:
+        previous, _namespace = _namespace, current
+        if previous is not None:
+            _local.clear()
+            if _shared is not None:
+                try:
+                    _shared.purge(current)
+                except sqlite3.Error:
+                    _count("errors")
+    return current
+
+
+def make_key(name: str, arguments: Dict[str, Any]) -> str:
+    digest = hashlib.sha256(
+        json.dumps([name, arguments], sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    ).hexdigest()
+    return f"act:{namespace()}:{digest}"
+
+
+def get(key: str) -> Any:
+    """Cached value of a key, or act_cache._MISSING."""
+    entry = _local.get(key)
+    if entry is not None:
+        _count("local_hits")
+        return json.loads(entry[1])
+
+    if _shared is not None:
+        try:
+            entry = _shared.get(key)
+        except sqlite3.Error:
+            _count("errors")
+            entry = None
+        if entry is not None:
+            _count("shared_hits")
+            _local.set(key, entry[1], entry[0])
+            return json.loads(entry[1])
+
+    if _network is not None:
+        try:
+            entry = _network.get(key)
+        except (ConnectionError, RespError, ValueError):
+            _count("errors")
+            entry = None
+        if entry is not None:
+            _count("network_hits")
+            _local.set(key, entry[1], entry[0])
+            if _shared is not None:
+                try:
+                    _shared.set(key, entry[1], entry[0], namespace())
+                except sqlite3.Error:
+                    _count("errors")
+            return json.loads(entry[1])
+
+    _count("misses")
+    return _MISSING
+
+
+def put(key: str, value: Any, ttl: Optional[int] = None) -> None:
+    """Store a JSON-serializable value in every tier for ttl seconds."""
+    data = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    expires_at = _now() + (DEFAULT_TTL if ttl is None else ttl)
+    _count("sets")
+    _local.set(key, data, expires_at)
+    if _shared is not None:
+        try:
+            _shared.set(key, data, expires_at, namespace())
+        except sqlite3.Error:
+            _count("errors")
+    if _network is not None:
+        try:
+            _network.set(key, data, expires_at)
+        except (ConnectionError, RespError):
+            _count("errors")
+
+
+def delete(key: str) -> None:
+    _local.delete(key)
+    for tier in (_shared, _network):
+        if tier is not None:
+            try:
+                tier.delete(key)
+            except (sqlite3.Error, ConnectionError, RespError):
+                _count("errors")
+
+
+def _across_processes(key: str, compute: Callable[[], Any]) -> Any:
+    """
+    Run compute as the only process computing key, or wait for the process
+    that holds its lease and return that process's outcome. Waiters take
+    over when the leader raises or its lease expires.
+    """
+    if _shared is None or not act_singleflight.ENABLED:
+        return compute()
+    owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    while True:
+        try:
+            if _shared.claim(key, owner, LEASE_SECONDS):
+                break
+            lease = _shared.lease(key)
+        except sqlite3.Error:
+            _count("errors")
+            return compute()
+        if lease is not None and lease[0] is not None:
+            _count("lease_joins")
+            return json.loads(lease[0])
+        if lease is None:
+            # Released without an outcome (the leader raised): claim it
+            continue
+        time.sleep(LEASE_POLL_SECONDS)
+
+    _count("leases")
+    outcome = None
+    try:
+        result = compute()
+        outcome = json.dumps(result, separators=(",", ":")).encode("utf-8")
+        return result
+    finally:
+        try:
+            _shared.settle(key, owner, outcome, LEASE_RESULT_SECONDS)
+        except sqlite3.Error:
+            _count("errors")
+
+
+def clear() -> None:
+    """Drop the local and shared tiers (network entries expire by TTL)."""
+    _local.clear()
+    if _shared is not None:
+        _shared.clear()
+
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        result: Dict[str, Any] = dict(_stats)
+    result.update(
+        enabled=ENABLED,
+        namespace=_namespace,
+        local_entries=len(_local._entries),
+        shared=CACHE_DB or None,
+        network=CACHE_URL or None,
+        pid=os.getpid()
+    )
+    return result
+
+
+def cached(ttl: Optional[int] = None) -> Callable:
+    """
+    Cache a function's JSON result by its bound arguments. Results that
+    carry an "error" key are not cached. Identical calls that miss the
+    cache while one is already computing wait for it: threads of a process
+    through act_singleflight, processes through a lease in the shared tier.
+    """
+    def decorator(func: Callable) -> Callable:
+        name = f"{func.__module__}.{func.__qualname__}"
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            # A backend chosen for one request (act_backends.use) gets its own
+            # entries, so its results are computed rather than served from
+            # another backend's
+            backend = act_backends.selected()
+            key = make_key(name if backend is None else f"{name}@{backend}", bound.arguments)
+            if ENABLED:
+                value = get(key)
+                if value is not _MISSING:
+                    return value
+
+            def compute():
+                result = func(*args, **kwargs)
+                if ENABLED and not (isinstance(result, dict) and "error" in result):
+                    put(key, result, ttl)
+                return result
+            return act_singleflight.do(key, lambda: _across_processes(key, compute), func.__name__)
+        return wrapper
+    return decorator
+
+
+# --- Stand-in network cache server ---
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """Serves the RESP subset used by NetworkTier from an in-memory dict."""
+
+    def handle(self) -> None:
+        store, lock = self.server.store, self.server.lock
+        while True:
+            try:
+                command = _read_reply(self.rfile)
+            except (ConnectionError, RespError, ValueError):
+                return
+            if not isinstance(command, list) or not command:
+                return
+            name = command[0].decode("utf-8").upper()
+            args = command[1:]
+            self.wfile.write(self._dispatch(name, args, store, lock))
+            self.wfile.flush()
+
+    @staticmethod
+    def _dispatch(name: str, args: List[bytes], store: Dict[bytes, Tuple[float, bytes]], lock) -> bytes:
+        if name == "PING":
+            return b"+PONG\r\n"
+        if name in ("SELECT", "AUTH"):
+            return b"+OK\r\n"
+        with lock:
+            if name == "GET" and len(args) == 1:
+                entry = store.get(args[0])
+                if entry is None or entry[0] <= _now():
+                    store.pop(args[0], None)
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(entry[1]), entry[1])
+            if name == "SET" and len(args) >= 2:
+                expires_at = float("inf")
+                options = [a.decode("utf-8").upper() for a in args[2:]]
+                if "PX" in options:
+                    expires_at = _now() + int(options[options.index("PX") + 1]) / 1000.0
+                elif "EX" in options:
+                    expires_at = _now() + int(options[options.index("EX") + 1])
+                store[args[0]] = (expires_at, args[1])
+                return b"+OK\r\n"
+            if name == "DEL":
+                removed = sum(store.pop(key, None) is not None for key in args)
+                return b":%d\r\n" % removed
+            if name == "FLUSHDB":
+                store.clear()
+                return b"+OK\r\n"
+        return b"-ERR unsupported command\r\n"
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int]):
+        super().__init__(address, _RespHandler)
+        self.store: Dict[bytes, Tuple[float, bytes]] = {}
+        self.lock = threading.Lock()
+
+
+def serve(host: str = "127.0.0.1", port: int = 6379) -> StandInServer:
+    """Start the stand-in server on a background thread and return it."""
+    server = StandInServer((host, port))
+    threading.Thread(target=server.serve_forever, name="act-cache-server", daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ACT result cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the stand-in network cache server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=6379)
+    commands.add_parser("clear", help="Clear the shared cache file")
+    commands.add_parser("purge", help="Drop expired entries from the shared cache file")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = StandInServer((args.host, args.port))
+        print(f"Serving cache on {args.host}:{args.port}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if _shared is None:
+        print("ACT_CACHE_DB is not set", file=sys.stderr)
+        return 1
+    if args.command == "clear":
+        _shared.clear()
+    else:
+        print(f"Purged {_shared.purge()} entries", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,46 +1,43 @@
-import os
-import json
-import subprocess
 from typing import Dict, List, Optional, Any, Union
 
-# Configuration
-# Assuming this file is in the same directory as the 'r' folder
-R_SCRIPT_DIR = os.path.join(os.path.dirname(__file__), 'r')
+import act_backends
+import act_cache
+import act_equations
+import act_index
+import act_tables
+
+# Configuration (see act_backends.py)
+R_SCRIPT_DIR = act_backends.R_SCRIPT_DIR
+R_WIRE_FORMAT = act_backends.R_WIRE_FORMAT
+R_MODE = act_backends.R_MODE
 
 def _run_r_script(script_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Executes an R script using subprocess, passing input as JSON via stdin
-    and parsing output JSON from stdout.
+    Runs an operation, named by its R script, on the selected compute
+    backend: Rscript, persistent R workers, embedded R (rpy2) or the native
+    engine (see act_backends.py). Every backend returns the script's output.
     """
-    script_path = os.path.join(R_SCRIPT_DIR, script_name)
-    if not os.path.exists(script_path):
-        raise FileNotFoundError(f"R script not found: {script_path}")
+    return act_backends.run(script_name, input_data)
 
+def _with_coefficients(
+    payload: Dict[str, Any],
+    equation_type: str = "impressionabo",
+    legacy_dictionary: bool = True
+) -> Dict[str, Any]:
+    """
+    Attach the cached coefficient table for the payload's equation set so the
+    R script can skip the actdata/inteRact equation lookup. Falls back to the
+    plain payload if the equation set is not cached.
+    """
+    selector = payload if legacy_dictionary else {k: v for k, v in payload.items() if k != "dictionary"}
+    key, gender = act_equations.parse_equation(selector)
     try:
-        process = subprocess.run(
-            ["Rscript", script_path],
-            input=json.dumps(input_data),
-            capture_output=True,
-            text=True,
-            check=False
-        )
-        
-        if process.returncode != 0:
-            raise RuntimeError(f"R script failed with error:\n{process.stderr}")
-
-        output = process.stdout.strip()
-        if not output:
-             # Try to provide more context if stderr is also empty
-             raise RuntimeError(f"R script returned empty output. Stderr: {process.stderr}")
-             
-        try:
-            return json.loads(output)
-        except json.JSONDecodeError as e:
-             raise RuntimeError(f"Failed to parse R output: {output}. Error: {e}")
-
-    except Exception as e:
-        raise RuntimeError(f"Error processing {script_name}: {e}")
+        eq = act_equations.get_equation(key, gender, equation_type)
+    except (ValueError, RuntimeError):
+        return payload
+    return dict(payload, coefficients=eq.to_payload())
 
+@act_cache.cached()
 def lookup_epa(label: str, type: str, dictionary: str = "us_2015") -> Dict[str, Any]:
     """Resolve a label to its fundamental EPA vector."""
     return _run_r_script("lookup_epa.R", {
@@ -67,10 +64,12 @@ def create_event(
         
     return event
 
+@act_cache.cached()
 def compute_transient_impressions(event: Dict[str, List[float]]) -> Dict[str, Any]:
     """Compute transient impressions for the event."""
-    return _run_r_script("transient_impressions.R", event)
+    return _run_r_script("transient_impressions.R", _with_coefficients(event))
 
+@act_cache.cached()
 def compute_deflection(
     fundamentals: Dict[str, List[float]],
     transients: Dict[str, List[float]],
@@ -155,37 +154,48 @@ def step_conversation(state: Dict[str, Any], behavior_label: str) -> Dict[str, A
     
     return state
 
-def search_labels(dictionary: str, search_term: Optional[str] = None) -> Dict[str, Any]:
-    """Search for terms in a dictionary."""
+@act_cache.cached()
+def search_labels(
+    dictionary: str,
+    search_term: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """Search for terms in a dictionary (limit <= 0 returns all matches)."""
     return _run_r_script("search_labels.R", {
         "dictionary": dictionary,
-        "search": search_term
+        "search": search_term,
+        "limit": limit,
+        "offset": offset
     })
 
+@act_cache.cached()
 def compute_optimal_behavior(
     actor_epa: List[float],
     object_epa: List[float],
     dictionary: str = "us_2015"
 ) -> Dict[str, Any]:
     """Calculate optimal behavior EPA."""
-    return _run_r_script("optimal_behavior.R", {
+    return _run_r_script("optimal_behavior.R", _with_coefficients({
         "actor": actor_epa,
         "object": object_epa,
         "dictionary": dictionary
-    })
+    }))
 
+@act_cache.cached()
 def compute_modified_identity(
     modifier_epa: List[float],
     identity_epa: List[float],
     dictionary: str = "us_2015"
 ) -> Dict[str, Any]:
     """Calculate modified identity EPA."""
-    return _run_r_script("modify_identity.R", {
+    return _run_r_script("modify_identity.R", _with_coefficients({
         "modifier": modifier_epa,
         "identity": identity_epa,
         "dictionary": dictionary
-    })
+    }, "traitid"))
 
+@act_cache.cached()
 def compute_transients(
     actor_epa: List[float],
     behavior_epa: List[float],
@@ -200,6 +210,7 @@ def compute_transients(
         "dictionary": dictionary
     })
 
+@act_cache.cached()
 def compute_emotions(
     actor_epa: List[float],
     behavior_epa: List[float],
@@ -214,6 +225,7 @@ def compute_emotions(
         "dictionary": dictionary
     })
 
+@act_cache.cached()
 def compute_reidentify(
     actor_epa: List[float],
     behavior_epa: List[float],
@@ -222,14 +234,15 @@ def compute_reidentify(
     dictionary: str = "us2010"
 ) -> Dict[str, Any]:
     """Calculate reidentified EPA to reduce deflection."""
-    return _run_r_script("reidentify.R", {
+    return _run_r_script("reidentify.R", _with_coefficients({
         "actor": actor_epa,
         "behavior": behavior_epa,
         "object": object_epa,
         "element": element,
         "dictionary": dictionary
-    })
+    }))
 
+@act_cache.cached()
 def find_closest_term(
     epa: List[float],
     term_type: str = "identity",
@@ -243,3 +256,259 @@ def find_closest_term(
         "dictionary": dictionary,
         "n": n
     })
+
+@act_cache.cached()
+def rank_behaviors(
+    actor_epa: Union[List[float], str],
+    object_epa: Union[List[float], str],
+    dictionary: str = "us_2015",
+    top_k: int = 10,
+    search: Optional[str] = None,
+    group: Optional[str] = None,
+    equation_key: str = "us2010",
+    equation_gender: str = "average"
+) -> Dict[str, Any]:
+    """
+    Rank every dictionary behavior for an actor/object pair by resulting
+    deflection. Actor and object may be identity labels; labelled pairs are
+    answered from precomputed rankings when available.
+    """
+    if isinstance(actor_epa, str) or isinstance(object_epa, str):
+        if isinstance(actor_epa, str) and isinstance(object_epa, str) and not search and not group:
+            try:
+                ranked = act_tables.ranked_behaviors(
+                    actor_epa, object_epa, dictionary, top_k, equation_key, equation_gender
+                )
+            except (ValueError, RuntimeError):
+                ranked = None
+            if ranked is not None:
+                return ranked
+        actor_epa = act_index.resolve_epa(actor_epa, "identity", dictionary)
+        object_epa = act_index.resolve_epa(object_epa, "identity", dictionary)
+
+    payload = {
+        "actor": actor_epa,
+        "object": object_epa,
+        "dictionary": dictionary,
+        "top_k": top_k,
+        "equation_key": equation_key,
+        "equation_gender": equation_gender
+    }
+    if search:
+        payload["search"] = search
+    if group:
+        payload["group"] = group
+
+    return _run_r_script("rank_behaviors.R", _with_coefficients(payload, legacy_dictionary=False))
+
+@act_cache.cached()
+def optimize_and_label(
+    actor_epa: List[float],
+    object_epa: List[float],
+    dictionary: str = "us_2015",
+    n: int = 5,
+    equation_key: str = "us2010",
+    equation_gender: str = "average"
+) -> Dict[str, Any]:
+    """Calculate optimal behavior EPA and return the closest dictionary behaviors."""
+    return _run_r_script("solve_and_label.R", _with_coefficients({
+        "actor": actor_epa,
+        "object": object_epa,
+        "element": "behavior",
+        "dictionary": dictionary,
+        "n": n,
+        "equation_key": equation_key,
+        "equation_gender": equation_gender
+    }, legacy_dictionary=False))
+
+@act_cache.cached()
+def reidentify_and_label(
+    actor_epa: List[float],
+    behavior_epa: List[float],
+    object_epa: List[float],
+    element: str = "actor",
+    dictionary: str = "us_2015",
+    n: int = 5,
+    equation_key: str = "us2010",
+    equation_gender: str = "average"
+) -> Dict[str, Any]:
+    """Calculate reidentified EPA and return the closest dictionary identities."""
+    return _run_r_script("solve_and_label.R", _with_coefficients({
+        "actor": actor_epa,
+        "behavior": behavior_epa,
+        "object": object_epa,
+        "element": element,
+        "dictionary": dictionary,
+        "n": n,
+        "equation_key": equation_key,
+        "equation_gender": equation_gender
+    }, legacy_dictionary=False))
+
+def list_equation_sets() -> Dict[str, Any]:
+    """List cached impression-formation equation sets with content hashes."""
+    return {
+        "hash": act_equations.catalog_hash(),
+        "equations": act_equations.list_equations()
+    }
+
+def lookup_epa_batch(labels: List[str], type: str, dictionary: str = "us_2015") -> Dict[str, Any]:
+    """Resolve many labels to their fundamental EPA vectors."""
+    import act_batch
+    return {
+        "dictionary": dictionary,
+        "type": type,
+        "results": list(act_batch.iter_lookup_epa(labels, type, dictionary))
+    }
+
+def compute_transients_batch(
+    events: List[Dict[str, List[float]]],
+    equation_key: str = "us2010",
+    equation_gender: str = "average"
+) -> Dict[str, Any]:
+    """Compute transient impressions and deflection for many actor/behavior/object events."""
+    import act_batch
+    return {
+        "results": list(act_batch.iter_transients(events, equation_key, equation_gender)),
+        "meta": {"equation_key": equation_key, "equation_gender": equation_gender}
+    }
+
+def simulate_trajectory(state: Dict[str, Any], behavior_labels: List[str]) -> Dict[str, Any]:
+    """Execute a sequence of ACT evaluation steps and return the final state."""
+    import act_batch
+    for _ in act_batch.iter_trajectory(state, behavior_labels):
+        pass
+    return state
+
+def plan_conversation(
+    state: Dict[str, Any],
+    horizon: int = 3,
+    beam_width: int = 20,
+    time_budget: Optional[float] = 5.0,
+    n_plans: int = 3,
+    start_with: str = "actor",
+    behaviors: Optional[List[str]] = None,
+    equation_key: str = "us2010",
+    equation_gender: str = "average",
+    carryover: bool = True
+) -> Dict[str, Any]:
+    """
+    Plan the next behaviors of a conversation: beam search over dictionary
+    behaviors (or the given ones) for the sequences of horizon events, with
+    actor and object taking turns from start_with, that minimize cumulative
+    deflection. Impressions carry over from event to event, starting from
+    the state's last step. With carryover false every event is scored from
+    the fundamentals; the turns are then independent and each plan is a
+    greedy per-turn ranking of the behaviors. The search keeps beam_width
+    partial plans per step and returns the best n_plans found within
+    time_budget seconds (None: no limit; 0: the first step only). The state
+    is not modified.
+    """
+    import act_planner
+    return act_planner.plan(
+        state, horizon, beam_width, time_budget, n_plans, start_with,
+        behaviors, equation_key, equation_gender, carryover
+    )
+
+def run_pipeline(steps: List[Dict[str, Any]], stop_on_error: bool = True) -> Dict[str, Any]:
+    """
+    Run several act_core operations in one call. Each step is
+    {"id": name, "op": operation, "args": {...}}; an argument may be
+    {"$ref": "<id>.<key>..."} to use (part of) an earlier step's output, e.g.
+    {"$ref": "event"} or {"$ref": "transients.transient"}. Returns every
+    step's result or error; after a failure the remaining steps are skipped
+    unless stop_on_error is false.
+    """
+    import act_pipeline
+    return act_pipeline.run(steps, stop_on_error)
+
+def submit_job(operation: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run any act_core operation (e.g. compute_transients_batch) as a background job."""
+    import act_jobs
+    return act_jobs.submit(operation, arguments)
+
+def get_job_status(job_id: str) -> Dict[str, Any]:
+    """Report status and progress of a background job."""
+    import act_jobs
+    return act_jobs.status(job_id)
+
+def get_job_result(job_id: str) -> Any:
+    """Retrieve the result of a finished background job."""
+    import act_jobs
+    return act_jobs.result(job_id)
+
+def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a queued or running background job."""
+    import act_jobs
+    return act_jobs.cancel(job_id)
+
+def compare_terms(
+    terms: List[str],
+    component: str = "identity",
+    dictionaries: Optional[List[str]] = None,
+    group: Optional[str] = None,
+    distances: bool = False
+) -> Dict[str, Any]:
+    """Compare EPA ratings of terms across dictionaries (all dictionaries by default)."""
+    import act_index
+    return act_index.compare_terms(terms, component, dictionaries, group, distances)
+
+def compute_emotions_batch(
+    events: List[Dict[str, List[float]]],
+    dictionary: Optional[str] = None,
+    label_component: str = "modifier",
+    n: int = 1
+) -> Dict[str, Any]:
+    """Predict emotions for many actor/behavior/object events, optionally labelled from a dictionary."""
+    import act_batch
+    return {
+        "dictionary": dictionary,
+        "results": list(act_batch.iter_emotions(events, dictionary, label_component, n))
+    }
+
+def compute_optimal_behavior_batch(
+    pairs: List[Dict[str, Any]],
+    dictionary: Optional[str] = None,
+    n: int = 5,
+    equation_key: str = "us2010",
+    equation_gender: str = "average"
+) -> Dict[str, Any]:
+    """Optimal behavior EPA for many actor/object pairs (optionally with settings), with nearest dictionary behaviors."""
+    import act_batch
+    return {
+        "dictionary": dictionary,
+        "results": list(act_batch.iter_optimal_behavior(pairs, dictionary, n, equation_key, equation_gender)),
+        "meta": {"equation_key": equation_key, "equation_gender": equation_gender}
+    }
+
+def reidentify_batch(
+    events: List[Dict[str, List[float]]],
+    element: str = "actor",
+    dictionary: Optional[str] = None,
+    n: int = 5,
+    equation_key: str = "us2010",
+    equation_gender: str = "average"
+) -> Dict[str, Any]:
+    """Solve for the deflection-minimizing actor or object EPA of many events, with nearest identities."""
+    import act_batch
+    return {
+        "element": element,
+        "dictionary": dictionary,
+        "results": list(act_batch.iter_reidentify(
+            events, element, dictionary, n, equation_key, equation_gender
+        )),
+        "meta": {"equation_key": equation_key, "equation_gender": equation_gender}
+    }
+
+def modify_identity_batch(
+    pairs: List[Dict[str, Any]],
+    dictionary: Optional[str] = None,
+    equation_key: str = "us2010",
+    equation_gender: str = "average"
+) -> Dict[str, Any]:
+    """Modified identities for many modifier/identity pairs, given as EPA vectors or dictionary labels."""
+    import act_batch
+    return {
+        "dictionary": dictionary,
+        "results": list(act_batch.iter_modify(pairs, dictionary, equation_key, equation_gender)),
+        "meta": {"equation_key": equation_key, "equation_gender": equation_gender}
+    }
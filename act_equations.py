@@ -0,0 +1,198 @@
+import os
+import json
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple
+
+# Impression-formation coefficient tables, extracted from actdata once per
+# process and shared by every backend (R scripts receive them via the
+# "coefficients" payload field, native code reads the arrays directly).
+
+DEFAULT_EQUATION_KEY = "us2010"
+DEFAULT_EQUATION_GENDER = "average"
+
+# Optional JSON file with a previous extraction (written on first load) so
+# that sibling processes and restarts skip the R launch entirely.
+EQUATIONS_CACHE_FILE = os.environ.get("ACT_EQUATIONS_CACHE", "")
+
+_lock = threading.Lock()
+_equations: Optional[Dict[Tuple[str, str, str], "EquationSet"]] = None
+_catalog_hash: Optional[str] = None
+_load_error: Optional[Exception] = None
+
+
+@dataclass(frozen=True)
+class EquationSet:
+    """Coefficient table of one (equation_key, equation_gender, type)."""
+    key: str
+    gender: str
+    type: str
+    terms: Tuple[str, ...]
+    matrix: Tuple[Tuple[float, ...], ...]
+    hash: str = field(default="", compare=False)
+    _arrays: Dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def inputs(self) -> int:
+        """Number of fundamentals entering the equation (9 for abo)."""
+        return len(self.terms[0].lstrip("Z")) if self.terms else 0
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Form passed to R scripts as the 'coefficients' field."""
+        return {
+            "type": self.type,
+            "terms": list(self.terms),
+            "matrix": [list(row) for row in self.matrix]
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "gender": self.gender,
+            "type": self.type,
+            "hash": self.hash,
+            "terms": list(self.terms),
+            "matrix": [list(row) for row in self.matrix]
+        }
+
+    def arrays(self):
+        """(selection, coefficients) as NumPy arrays for the native engine."""
+        if "selection" not in self._arrays:
+            import numpy as np
+            selection = np.array(
+                [[c == "1" for c in term.lstrip("Z")] for term in self.terms],
+                dtype=bool
+            )
+            self._arrays["selection"] = selection
+            self._arrays["coefficients"] = np.array(self.matrix, dtype=np.float64)
+        return self._arrays["selection"], self._arrays["coefficients"]
+
+
+def _content_hash(obj: Any) -> str:
+    canonical = json.dumps(obj, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _build(entries: List[Dict[str, Any]]) -> Dict[Tuple[str, str, str], EquationSet]:
+    table = {}
+    for entry in entries:
+        content = {
+            "key": entry["key"],
+            "gender": entry["gender"],
+            "type": entry["type"],
+            "terms": list(entry["terms"]),
+            "matrix": [[float(v) for v in row] for row in entry["matrix"]]
+        }
+        eq = EquationSet(
+            key=content["key"],
+            gender=content["gender"],
+            type=content["type"],
+            terms=tuple(content["terms"]),
+            matrix=tuple(tuple(row) for row in content["matrix"]),
+            hash=_content_hash(content)
+        )
+        table[(eq.key, eq.gender, eq.type)] = eq
+    return table
+
+
+def _extract() -> List[Dict[str, Any]]:
+    if EQUATIONS_CACHE_FILE and os.path.exists(EQUATIONS_CACHE_FILE):
+        with open(EQUATIONS_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)["equations"]
+
+    from act_core import _run_r_script
+    result = _run_r_script("equations.R", {})
+    if "error" in result:
+        raise RuntimeError(f"Equation extraction failed: {result['error']}")
+
+    entries = result.get("equations", [])
+    if EQUATIONS_CACHE_FILE:
+        tmp_path = f"{EQUATIONS_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"equations": entries}, f)
+        os.replace(tmp_path, EQUATIONS_CACHE_FILE)
+    return entries
+
+
+def load_equations(refresh: bool = False) -> Dict[Tuple[str, str, str], EquationSet]:
+    """Return all equation sets, extracting them on first use."""
+    global _equations, _catalog_hash, _load_error
+    if _equations is not None and not refresh:
+        return _equations
+
+    with _lock:
+        if _equations is None or refresh:
+            # A failed extraction is not retried on every call; pass
+            # refresh=True to try again.
+            if _load_error is not None and not refresh:
+                raise RuntimeError(f"Equation extraction failed earlier: {_load_error}")
+            try:
+                table = _build(_extract())
+            except Exception as e:
+                _load_error = e
+                raise
+            _catalog_hash = _content_hash(sorted(eq.hash for eq in table.values()))
+            _equations = table
+            _load_error = None
+    return _equations
+
+
+def catalog_hash() -> str:
+    """Hash over every cached equation set."""
+    load_equations()
+    return _catalog_hash
+
+
+def available_catalog_hash() -> Optional[str]:
+    """
+    Hash over every equation set if it can be had without running R: from
+    the loaded sets or the cache file, else None.
+    """
+    if _equations is None and not (EQUATIONS_CACHE_FILE and os.path.exists(EQUATIONS_CACHE_FILE)):
+        return None
+    try:
+        return catalog_hash()
+    except Exception:
+        return None
+
+
+def get_equation(
+    key: str = DEFAULT_EQUATION_KEY,
+    gender: str = DEFAULT_EQUATION_GENDER,
+    type: str = "impressionabo"
+) -> EquationSet:
+    """Look up one equation set; raises ValueError if it is not available."""
+    eq = load_equations().get((key, gender, type))
+    if eq is None:
+        raise ValueError(f"Equation not available: {key} / {gender} / {type}")
+    return eq
+
+
+def list_equations() -> List[Dict[str, Any]]:
+    """Summaries (without coefficients) of all cached equation sets."""
+    return [
+        {
+            "key": eq.key,
+            "gender": eq.gender,
+            "type": eq.type,
+            "terms": len(eq.terms),
+            "hash": eq.hash
+        }
+        for eq in sorted(load_equations().values(), key=lambda e: (e.key, e.gender, e.type))
+    ]
+
+
+def parse_equation(payload: Dict[str, Any]) -> Tuple[str, str]:
+    """Python mirror of parse_eq() in r/act_common.R."""
+    key = payload.get("equation_key")
+    gender = payload.get("equation_gender")
+
+    for field_name in ("eq_info", "dictionary"):
+        value = payload.get(field_name)
+        if key is None and gender is None and isinstance(value, str):
+            parts = value.split("_")
+            if len(parts) >= 2:
+                key, gender = parts[0], parts[1]
+
+    return key or DEFAULT_EQUATION_KEY, gender or DEFAULT_EQUATION_GENDER
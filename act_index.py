@@ -0,0 +1,416 @@
+import os
+import sys
+import json
+import argparse
+import hashlib
+import threading
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+# In-memory index over every actdata dictionary, exported by
+# r/export_dictionaries.R once per process (or read from
+# ACT_DICTIONARY_CACHE, written at image build time).
+#
+# The index can also be stored as memory-mappable .npy arrays
+# (`python act_index.py arrays`, ACT_DICTIONARY_ARRAYS) so that every
+# worker process maps the same pages instead of holding its own copy:
+#
+#   DIR/manifest.json       catalog version, component and group names
+#   DIR/<key>.epa.npy       float64 (rows, 3) EPA ratings
+#   DIR/<key>.terms.npy     UTF-8 terms
+#   DIR/<key>.component.npy uint8 component codes
+#   DIR/<key>.group.npy     uint16 rater group codes
+#   DIR/<key>.keys.npy      sorted "component\x1fterm" lookup keys
+#   DIR/<key>.order.npy     int32 row of each sorted key
+
+DICTIONARY_CACHE_FILE = os.environ.get("ACT_DICTIONARY_CACHE", "")
+DICTIONARY_ARRAY_DIR = os.environ.get("ACT_DICTIONARY_ARRAYS", "")
+
+ARRAY_NAMES = ("epa", "terms", "component", "group", "keys", "order")
+
+_lock = threading.Lock()
+_index: Optional[Dict[str, "DictionaryIndex"]] = None
+_catalog_version: Optional[str] = None
+_load_error: Optional[Exception] = None
+
+
+class _TermList:
+    """Read-only sequence of terms decoded from a UTF-8 byte-string array."""
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, row) -> str:
+        return self.values[row].decode("utf-8")
+
+    def __iter__(self):
+        for value in self.values:
+            yield value.decode("utf-8")
+
+
+def _lookup_key(component: str, term: str) -> bytes:
+    return f"{component.lower()}\x1f{term.lower()}".encode("utf-8")
+
+
+def _arrays(terms: List[str], components: List[str], groups: List[str], epa) -> Tuple[Dict[str, np.ndarray], List[str], List[str]]:
+    """Array form of one dictionary plus its component and group names."""
+    component_names = sorted(set(components))
+    group_names = sorted(set(groups))
+    component_code = {name: i for i, name in enumerate(component_names)}
+    group_code = {name: i for i, name in enumerate(group_names)}
+
+    keys = np.array([_lookup_key(c, t) for t, c in zip(terms, components)], dtype=bytes)
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    arrays = {
+        "epa": np.asarray(epa, dtype=np.float64).reshape(-1, 3),
+        "terms": np.array([t.encode("utf-8") for t in terms], dtype=bytes),
+        "component": np.array([component_code[c] for c in components], dtype=np.uint8),
+        "group": np.array([group_code[g] for g in groups], dtype=np.uint16),
+        "keys": keys[order],
+        "order": order,
+    }
+    return arrays, component_names, group_names
+
+
+class DictionaryIndex:
+    """Terms, components, rater groups and EPA ratings of one dictionary."""
+
+    def __init__(self, key: str, arrays: Dict[str, np.ndarray], component_names: List[str], group_names: List[str]):
+        self.key = key
+        self.arrays = arrays
+        self.epa = arrays["epa"]
+        self.terms = _TermList(arrays["terms"])
+        self.component_names = list(component_names)
+        self.group_names = list(group_names)
+        self._component_codes = arrays["component"]
+        self._group_codes = arrays["group"]
+        self._keys = arrays["keys"]
+        self._order = arrays["order"]
+
+    @classmethod
+    def from_lists(cls, key: str, terms: List[str], components: List[str], groups: List[str], epa) -> "DictionaryIndex":
+        arrays, component_names, group_names = _arrays(terms, components, groups, epa)
+        return cls(key, arrays, component_names, group_names)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def component(self, row: int) -> str:
+        return self.component_names[self._component_codes[row]]
+
+    def group(self, row: int) -> str:
+        return self.group_names[self._group_codes[row]]
+
+    def find(self, term: str, component: str, group: Optional[str] = None) -> Optional[int]:
+        """
+        Row of a term's rating in the given rater group, else its first
+        rating (the row lookup_epa.R and the other R scripts take).
+        """
+        key = _lookup_key(component, term)
+        start = np.searchsorted(self._keys, key, side="left")
+        stop = np.searchsorted(self._keys, key, side="right")
+        if start == stop:
+            return None
+        # The sort is stable, so rows of a key are in dictionary order
+        rows = [int(r) for r in self._order[start:stop]]
+        if group is not None:
+            matches = [r for r in rows if self.group(r) == group]
+            return matches[0] if matches else None
+        return rows[0]
+
+    def first_ratings(self, component: str) -> Tuple[List[str], np.ndarray]:
+        """Unique terms of a component with the EPA of their first rating, as the R scripts select them."""
+        terms, rows, seen = [], [], set()
+        for row in self.component_rows(component):
+            term = self.terms[row]
+            if term in seen:
+                continue
+            seen.add(term)
+            terms.append(term)
+            rows.append(row)
+        return terms, self.epa[rows] if rows else np.zeros((0, 3))
+
+    def component_rows(self, component: str) -> np.ndarray:
+        try:
+            code = self.component_names.index(component.lower())
+        except ValueError:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self._component_codes == code)
+
+    def nearest(self, epa, component: str, n: int = 5) -> List[Dict[str, Any]]:
+        """Closest unique terms of a component by Euclidean distance."""
+        rows = self.component_rows(component)
+        if rows.size == 0:
+            return []
+        distances = np.linalg.norm(self.epa[rows] - np.asarray(epa, dtype=np.float64), axis=1)
+        matches, seen = [], set()
+        for i in np.argsort(distances, kind="stable"):
+            term = self.terms[rows[i]]
+            if term in seen:
+                continue
+            seen.add(term)
+            matches.append({
+                "term": term,
+                "epa": [round(float(v), 3) for v in self.epa[rows[i]]],
+                "distance": round(float(distances[i]), 4),
+                "component": self.component(rows[i])
+            })
+            if len(matches) >= n:
+                break
+        return matches
+
+
+def _extract() -> List[Dict[str, Any]]:
+    if DICTIONARY_CACHE_FILE and os.path.exists(DICTIONARY_CACHE_FILE):
+        with open(DICTIONARY_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)["dictionaries"]
+
+    from act_core import _run_r_script
+    result = _run_r_script("export_dictionaries.R", {})
+    if "error" in result:
+        raise RuntimeError(f"Dictionary export failed: {result['error']}")
+
+    entries = result.get("dictionaries", [])
+    if DICTIONARY_CACHE_FILE:
+        tmp_path = f"{DICTIONARY_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dictionaries": entries}, f)
+        os.replace(tmp_path, DICTIONARY_CACHE_FILE)
+    return entries
+
+
+def _version(entries: List[Dict[str, Any]]) -> str:
+    digest = hashlib.sha256()
+    for entry in sorted(entries, key=lambda e: e["key"]):
+        digest.update(json.dumps(entry, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _arrays_available() -> bool:
+    return bool(DICTIONARY_ARRAY_DIR) and os.path.exists(os.path.join(DICTIONARY_ARRAY_DIR, "manifest.json"))
+
+
+def _map_arrays() -> Tuple[str, Dict[str, DictionaryIndex]]:
+    """Memory-map the stored arrays; pages are shared by every process."""
+    with open(os.path.join(DICTIONARY_ARRAY_DIR, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    index = {}
+    for entry in manifest["dictionaries"]:
+        arrays = {
+            name: np.load(os.path.join(DICTIONARY_ARRAY_DIR, f"{entry['key']}.{name}.npy"), mmap_mode="r")
+            for name in ARRAY_NAMES
+        }
+        index[entry["key"]] = DictionaryIndex(entry["key"], arrays, entry["components"], entry["groups"])
+    return manifest["catalog_version"], index
+
+
+def export_arrays(directory: str, entries: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Write the memory-mappable form of the index (default: all dictionaries)."""
+    if entries is None:
+        entries = _extract()
+    os.makedirs(directory, exist_ok=True)
+
+    manifest: Dict[str, Any] = {"catalog_version": _version(entries), "dictionaries": []}
+    for entry in entries:
+        arrays, component_names, group_names = _arrays(entry["terms"], entry["components"], entry["groups"], entry["epa"])
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{entry['key']}.{name}.npy"), arrays[name])
+        manifest["dictionaries"].append({
+            "key": entry["key"],
+            "rows": len(entry["terms"]),
+            "components": component_names,
+            "groups": group_names
+        })
+
+    # The manifest is written last so readers never see a partial export
+    tmp_path = os.path.join(directory, f"manifest.json.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(directory, "manifest.json"))
+    return {"path": directory, "dictionaries": len(entries), "catalog_version": manifest["catalog_version"]}
+
+
+def load_index(refresh: bool = False) -> Dict[str, DictionaryIndex]:
+    """Return the index of all dictionaries, building it on first use."""
+    global _index, _catalog_version, _load_error
+    if _index is not None and not refresh:
+        return _index
+
+    with _lock:
+        if _index is None or refresh:
+            if _load_error is not None and not refresh:
+                raise RuntimeError(f"Dictionary export failed earlier: {_load_error}")
+            try:
+                if _arrays_available():
+                    _catalog_version, _index = _map_arrays()
+                else:
+                    entries = _extract()
+                    _catalog_version = _version(entries)
+                    _index = {
+                        e["key"]: DictionaryIndex.from_lists(e["key"], e["terms"], e["components"], e["groups"], e["epa"])
+                        for e in entries
+                    }
+            except Exception as e:
+                _load_error = e
+                raise
+            _load_error = None
+    return _index
+
+
+def is_loaded() -> bool:
+    return _index is not None
+
+
+def preload() -> bool:
+    """
+    Load the index if that needs no R (stored arrays or cache file). Called
+    before forking workers so they share the mapped pages.
+    """
+    if not _arrays_available() and not (DICTIONARY_CACHE_FILE and os.path.exists(DICTIONARY_CACHE_FILE)):
+        return False
+    try:
+        load_index()
+    except Exception:
+        return False
+    return True
+
+
+def catalog_version() -> str:
+    """Content hash of all indexed dictionaries."""
+    load_index()
+    return _catalog_version
+
+
+def available_catalog_version() -> Optional[str]:
+    """
+    Catalog version if it can be had without running R: from the loaded
+    index, the dictionary store or the dictionary cache file, else None.
+    """
+    if _index is None:
+        import act_store
+        if act_store.available():
+            return act_store.catalog_version()
+    if _index is None and not _arrays_available() and not (
+        DICTIONARY_CACHE_FILE and os.path.exists(DICTIONARY_CACHE_FILE)
+    ):
+        return None
+    try:
+        return catalog_version()
+    except Exception:
+        return None
+
+
+def as_epa(value: Any, name: str) -> List[float]:
+    """Validate an [E, P, A] vector (mirrors as_epa() in r/act_common.R)."""
+    try:
+        epa = [float(v) for v in value]
+    except (TypeError, ValueError):
+        epa = []
+    if len(epa) != 3:
+        raise ValueError(f"Invalid {name}: expected numeric length 3.")
+    return epa
+
+
+def resolve_epa(value: Any, component: str, dictionary: Optional[str] = None) -> List[float]:
+    """
+    EPA of a term (its first rating, as in lookups) when value is a label,
+    else value itself validated as an EPA vector.
+    """
+    if isinstance(value, str):
+        if not dictionary:
+            raise ValueError(f"A dictionary is required to resolve '{value}'")
+        index = get_dictionary(dictionary)
+        row = index.find(value, component)
+        if row is None:
+            raise ValueError(f"Term not found: {value} in {dictionary} component {component}")
+        return [float(v) for v in index.epa[row]]
+    return as_epa(value, component)
+
+
+def dictionary_keys() -> List[str]:
+    return sorted(load_index().keys())
+
+
+def get_dictionary(key: str) -> DictionaryIndex:
+    """Index of one dictionary; raises ValueError if it is unknown."""
+    index = load_index().get(key)
+    if index is None:
+        raise ValueError(f"Dictionary not found: {key}")
+    return index
+
+
+def compare_terms(
+    terms: List[str],
+    component: str = "identity",
+    dictionaries: Optional[List[str]] = None,
+    group: Optional[str] = None,
+    distances: bool = False
+) -> Dict[str, Any]:
+    """Aligned terms x dictionaries EPA matrix with missing-term markers."""
+    keys = list(dictionaries) if dictionaries else dictionary_keys()
+    indexes = [get_dictionary(k) for k in keys]
+
+    epa = np.full((len(terms), len(keys), 3), np.nan)
+    for t, term in enumerate(terms):
+        for d, index in enumerate(indexes):
+            row = index.find(term, component, group)
+            if row is not None:
+                epa[t, d] = index.epa[row]
+    found = ~np.isnan(epa[:, :, 0])
+
+    result: Dict[str, Any] = {
+        "terms": list(terms),
+        "dictionaries": keys,
+        "component": component,
+        "epa": [
+            [[round(float(v), 3) for v in epa[t, d]] if found[t, d] else None for d in range(len(keys))]
+            for t in range(len(terms))
+        ],
+        "found": found.tolist(),
+    }
+
+    if distances:
+        stats = []
+        for t, term in enumerate(terms):
+            present = np.flatnonzero(found[t])
+            values = epa[t, present]
+            entry: Dict[str, Any] = {"term": term, "dictionaries": len(present)}
+            if len(present) > 0:
+                entry["mean"] = [round(float(v), 3) for v in values.mean(axis=0)]
+                entry["sd"] = [round(float(v), 3) for v in values.std(axis=0)]
+            if len(present) > 1:
+                pairwise = np.linalg.norm(values[:, np.newaxis, :] - values[np.newaxis, :, :], axis=2)
+                matrix = [[None] * len(keys) for _ in keys]
+                for i, a in enumerate(present):
+                    for j, b in enumerate(present):
+                        matrix[a][b] = round(float(pairwise[i, j]), 4)
+                upper = pairwise[np.triu_indices(len(present), k=1)]
+                entry["pairwise"] = matrix
+                entry["mean_distance"] = round(float(upper.mean()), 4)
+                entry["max_distance"] = round(float(upper.max()), 4)
+            stats.append(entry)
+        result["distances"] = stats
+
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ACT dictionary index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    arrays_parser = commands.add_parser("arrays", help="Export the index as memory-mappable arrays")
+    arrays_parser.add_argument("--output", default=DICTIONARY_ARRAY_DIR, help="Directory (default: ACT_DICTIONARY_ARRAYS)")
+    args = parser.parse_args(argv)
+
+    if not args.output:
+        parser.error("--output or ACT_DICTIONARY_ARRAYS is required")
+    summary = export_arrays(args.output)
+    print(f"Wrote {summary['dictionaries']} dictionaries to {summary['path']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
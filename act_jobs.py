@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Optional, Any, Iterator, Callable
+
+import act_backends
+import act_core
+import act_batch
+
+# Asynchronous jobs for computations that outlive a request timeout.
+# Jobs run on a local thread pool; status, results and cancel markers live
+# on disk under JOB_DIR so any worker process can poll or cancel a job
+# submitted to another. No external broker is involved.
+#
+#   JOB_DIR/<job_id>/status.json    job state and progress
+#   JOB_DIR/<job_id>/result.ndjson  one JSON record per line
+#   JOB_DIR/<job_id>/cancel         cancellation marker
+
+JOB_DIR = os.environ.get("ACT_JOB_DIR", os.path.join(tempfile.gettempdir(), "act_jobs"))
+JOB_WORKERS = int(os.environ.get("ACT_JOB_WORKERS", "2"))
+JOB_RETENTION_SECONDS = int(os.environ.get("ACT_JOB_RETENTION_SECONDS", "86400"))
+JOB_MAX_STORED = int(os.environ.get("ACT_JOB_MAX_STORED", "1000"))
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+# Batch operations run record by record so progress can be reported and
+# cancellation honoured between records: name -> (items argument, iterator)
+BATCH_OPERATIONS: Dict[str, Any] = {
+    "lookup_epa_batch": ("labels", act_batch.iter_lookup_epa),
+    "compute_transients_batch": ("events", act_batch.iter_transients),
+    "simulate_trajectory": ("behavior_labels", act_batch.iter_trajectory),
+    "compute_emotions_batch": ("events", act_batch.iter_emotions),
+    "reidentify_batch": ("events", act_batch.iter_reidentify),
+    "modify_identity_batch": ("pairs", act_batch.iter_modify),
+    "compute_optimal_behavior_batch": ("pairs", act_batch.iter_optimal_behavior),
+}
+
+# Job management functions are act_core tools too, but not job operations
+_EXCLUDED_OPERATIONS = {"submit_job", "get_job_status", "get_job_result", "cancel_job", "list_jobs"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_futures: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _job_path(job_id: str, name: str = "") -> str:
+    if not job_id or os.path.basename(job_id) != job_id:
+        raise ValueError(f"Invalid job id: {job_id}")
+    return os.path.join(JOB_DIR, job_id, name)
+
+
+def _write_status(status: Dict[str, Any]) -> None:
+    path = _job_path(status["job_id"], "status.json")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+
+
+def _read_status(job_id: str) -> Dict[str, Any]:
+    try:
+        with open(_job_path(job_id, "status.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Job not found: {job_id}")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _operations() -> Dict[str, Callable]:
+    import inspect
+    return {
+        name: func
+        for name, func in inspect.getmembers(act_core, inspect.isfunction)
+        if not name.startswith("_")
+        and func.__module__ == act_core.__name__
+        and name not in _EXCLUDED_OPERATIONS
+    }
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="act-job")
+        return _executor
+
+
+def _run(job_id: str, operation: str, arguments: Dict[str, Any]) -> None:
+    status = _read_status(job_id)
+    cancel_marker = _job_path(job_id, "cancel")
+    if os.path.exists(cancel_marker):
+        status.update(status="cancelled", finished_at=time.time())
+        _write_status(status)
+        return
+
+    status.update(status="running", started_at=time.time())
+    _write_status(status)
+
+    try:
+        with open(_job_path(job_id, "result.ndjson"), "w", encoding="utf-8") as out:
+            if operation in BATCH_OPERATIONS:
+                records = BATCH_OPERATIONS[operation][1](**arguments)
+            else:
+                records = iter([_operations()[operation](**arguments)])
+
+            last_update = 0.0
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+                status["progress"]["done"] += 1
+                if os.path.exists(cancel_marker):
+                    raise JobCancelled()
+                # Throttle status writes for large batches
+                now = time.time()
+                if now - last_update >= 0.5:
+                    _write_status(status)
+                    last_update = now
+
+        status.update(status="succeeded", finished_at=time.time())
+    except JobCancelled:
+        status.update(status="cancelled", finished_at=time.time())
+    except Exception as e:
+        status.update(status="failed", error=str(e), finished_at=time.time())
+    finally:
+        _write_status(status)
+
+
+def _cleanup() -> None:
+    """Apply the retention limits to finished jobs."""
+    if not os.path.isdir(JOB_DIR):
+        return
+    now = time.time()
+    finished = []
+    for job_id in os.listdir(JOB_DIR):
+        try:
+            status = _read_status(job_id)
+        except (FileNotFoundError, ValueError, json.JSONDecodeError):
+            continue
+        if status["status"] in FINISHED:
+            finished.append((status.get("finished_at") or status["created_at"], job_id))
+
+    finished.sort()
+    excess = max(0, len(finished) - JOB_MAX_STORED)
+    for index, (finished_at, job_id) in enumerate(finished):
+        if index < excess or now - finished_at > JOB_RETENTION_SECONDS:
+            shutil.rmtree(os.path.join(JOB_DIR, job_id), ignore_errors=True)
+
+
+def submit(operation: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Queue an act_core operation and return its initial status."""
+    arguments = arguments or {}
+    if operation not in _operations():
+        raise ValueError(f"Unknown operation: {operation}")
+
+    total = 1
+    if operation in BATCH_OPERATIONS:
+        items = arguments.get(BATCH_OPERATIONS[operation][0])
+        if not isinstance(items, list):
+            raise ValueError(f"'{BATCH_OPERATIONS[operation][0]}' must be a list")
+        total = len(items)
+
+    _cleanup()
+
+    job_id = uuid.uuid4().hex
+    os.makedirs(_job_path(job_id), exist_ok=True)
+    status = {
+        "job_id": job_id,
+        "operation": operation,
+        "batch": operation in BATCH_OPERATIONS,
+        "status": "queued",
+        "progress": {"done": 0, "total": total},
+        "owner_pid": os.getpid(),
+        "backend": act_backends.current(),
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "error": None
+    }
+    _write_status(status)
+
+    # Run in a copy of the caller's context, so the job computes on the
+    # backend the request selected (act_backends.use / X-ACT-Backend)
+    context = contextvars.copy_context()
+    future = _get_executor().submit(context.run, _run, job_id, operation, arguments)
+    with _lock:
+        _futures[job_id] = future
+    future.add_done_callback(lambda f: _futures.pop(job_id, None))
+    return status
+
+
+def status(job_id: str) -> Dict[str, Any]:
+    """Current status of a job, from any process."""
+    current = _read_status(job_id)
+    if current["status"] not in FINISHED and not _pid_alive(current["owner_pid"]):
+        # The owning worker exited before finishing the job
+        current.update(status="failed", error="Worker process exited", finished_at=time.time())
+        _write_status(current)
+    return current
+
+
+def iter_result(job_id: str) -> Iterator[Dict[str, Any]]:
+    """Yield the stored result records of a finished job."""
+    current = status(job_id)
+    if current["status"] != "succeeded":
+        raise ValueError(f"Job {job_id} is {current['status']}, no result available")
+    with open(_job_path(job_id, "result.ndjson"), "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def result(job_id: str) -> Any:
+    """Result of a finished job: the records for batch jobs, else the single result."""
+    current = status(job_id)
+    records = list(iter_result(job_id))
+    if current["batch"]:
+        return {"job_id": job_id, "results": records}
+    return records[0] if records else None
+
+
+def cancel(job_id: str) -> Dict[str, Any]:
+    """Request cancellation; queued jobs stop immediately, running jobs at the next record."""
+    current = status(job_id)
+    if current["status"] in FINISHED:
+        return current
+
+    open(_job_path(job_id, "cancel"), "w").close()
+    with _lock:
+        future = _futures.get(job_id)
+    if future is not None and future.cancel():
+        current.update(status="cancelled", finished_at=time.time())
+        _write_status(current)
+    return status(job_id)
+
+
+def list_jobs() -> List[Dict[str, Any]]:
+    """Status of every stored job, newest first."""
+    if not os.path.isdir(JOB_DIR):
+        return []
+    jobs = []
+    for job_id in os.listdir(JOB_DIR):
+        try:
+            jobs.append(status(job_id))
+        except (FileNotFoundError, ValueError, json.JSONDecodeError):
+            continue
+    return sorted(jobs, key=lambda s: s["created_at"], reverse=True)
@@ -0,0 +1,132 @@
+import os
+from typing import Dict, List, Optional, Any
+
+import act_index
+
+# Memory usage of the server processes, read from /proc (Linux). Shared
+# pages are the point of the memory-mapped dictionary arrays and of
+# loading them in the gunicorn master before it forks its workers.
+
+SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared_clean",
+    "Shared_Dirty": "shared_dirty",
+    "Private_Clean": "private_clean",
+    "Private_Dirty": "private_dirty",
+    "Swap": "swap",
+}
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _cmdline(pid: int) -> str:
+    return (_read(f"/proc/{pid}/cmdline") or "").replace("\0", " ").strip()
+
+
+def process_memory(pid: int) -> Optional[Dict[str, Any]]:
+    """RSS, PSS and shared/private page totals of a process, in bytes."""
+    rollup = _read(f"/proc/{pid}/smaps_rollup")
+    if rollup is None:
+        return None
+    usage: Dict[str, Any] = {"pid": pid}
+    for line in rollup.splitlines():
+        name, _, value = line.partition(":")
+        if name in SMAPS_FIELDS:
+            usage[SMAPS_FIELDS[name]] = int(value.split()[0]) * 1024
+    usage["shared"] = usage.get("shared_clean", 0) + usage.get("shared_dirty", 0)
+    usage["private"] = usage.get("private_clean", 0) + usage.get("private_dirty", 0)
+
+    arrays = mapped_usage(pid, act_index.DICTIONARY_ARRAY_DIR) if act_index.DICTIONARY_ARRAY_DIR else None
+    if arrays is not None:
+        usage["dictionary_arrays"] = arrays
+    return usage
+
+
+def rss(pid: int) -> Optional[int]:
+    """Resident set size of a process in bytes (cheap; no page walk)."""
+    status = _read(f"/proc/{pid}/status")
+    if status is None:
+        return None
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+def mapped_usage(pid: int, directory: str) -> Optional[Dict[str, int]]:
+    """Resident and shared bytes of the files mapped from a directory."""
+    smaps = _read(f"/proc/{pid}/smaps")
+    if smaps is None:
+        return None
+    prefix = os.path.abspath(directory) + os.sep
+    totals = {"mapped": 0, "rss": 0, "shared": 0}
+    inside = False
+    for line in smaps.splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        if not fields[0].endswith(":"):
+            # Mapping header: address perms offset dev inode [path]
+            inside = len(fields) >= 6 and fields[5].startswith(prefix)
+            continue
+        if not inside:
+            continue
+        if fields[0] == "Size:":
+            totals["mapped"] += int(fields[1]) * 1024
+        elif fields[0] == "Rss:":
+            totals["rss"] += int(fields[1]) * 1024
+        elif fields[0] in ("Shared_Clean:", "Shared_Dirty:"):
+            totals["shared"] += int(fields[1]) * 1024
+    return totals
+
+
+def _children(parent: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        stat = _read(f"/proc/{entry}/stat")
+        if stat is None:
+            continue
+        # The command name may contain spaces; fields after it are fixed
+        fields = stat[stat.rfind(")") + 2:].split()
+        if int(fields[1]) == parent:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def report() -> Dict[str, Any]:
+    """Memory of this process and, under gunicorn, of the master and every worker."""
+    pid = os.getpid()
+    if not os.path.isdir("/proc"):
+        raise RuntimeError("Memory reporting requires /proc")
+
+    parent = os.getppid()
+    if "gunicorn" in _cmdline(parent):
+        master: Optional[Dict[str, Any]] = process_memory(parent)
+        workers = [process_memory(child) for child in _children(parent)]
+    else:
+        master = None
+        workers = [process_memory(pid)]
+    workers = [w for w in workers if w is not None]
+
+    return {
+        "pid": pid,
+        "master": master,
+        "workers": workers,
+        "totals": {
+            "rss": sum(w.get("rss", 0) for w in workers),
+            "pss": sum(w.get("pss", 0) for w in workers),
+            "shared": sum(w.get("shared", 0) for w in workers),
+            "private": sum(w.get("private", 0) for w in workers)
+        },
+        "dictionary_arrays": act_index.DICTIONARY_ARRAY_DIR or None,
+        "index_loaded": act_index.is_loaded()
+    }
@@ -0,0 +1,157 @@
+import numpy as np
+
+# Native NumPy implementation of the impression-formation math in
+# r/act_common.R. All functions operate on arrays of events: fundamentals
+# are (n, inputs) arrays laid out as Ae Ap Aa Be Bp Ba Oe Op Oa (abo) or
+# Me Mp Ma Ie Ip Ia (traitid), and equations are act_equations.EquationSet.
+
+ELEMENTS = ("actor", "behavior", "object")
+ELEMENT_SLICES = {
+    "actor": slice(0, 3),
+    "behavior": slice(3, 6),
+    "object": slice(6, 9),
+    "setting": slice(9, 12),
+}
+
+
+def as_events(values) -> np.ndarray:
+    """Coerce a list of fundamentals (or a single one) to a 2-D float array."""
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 1:
+        arr = arr[np.newaxis, :]
+    return arr
+
+
+def term_matrix(fundamentals: np.ndarray, selection: np.ndarray) -> np.ndarray:
+    """(n, terms) matrix of the product terms of every event."""
+    # Multiply in the selected columns term by term; broadcasting to
+    # (n, terms, inputs) would hold the whole expansion in memory
+    products = np.ones((fundamentals.shape[0], selection.shape[0]))
+    for term, selected in enumerate(selection):
+        for column in np.flatnonzero(selected):
+            products[:, term] *= fundamentals[:, column]
+    return products
+
+
+def apply_equation(fundamentals, equation) -> np.ndarray:
+    """Transients (or amalgamations) for every row of fundamentals."""
+    fundamentals = as_events(fundamentals)
+    selection, coefficients = equation.arrays()
+    if fundamentals.shape[1] != selection.shape[1]:
+        raise ValueError(
+            f"Expected {selection.shape[1]} fundamentals per event, got {fundamentals.shape[1]}"
+        )
+    return term_matrix(fundamentals, selection) @ coefficients
+
+
+def deflection(fundamentals, transients) -> np.ndarray:
+    """Per-event total deflection (sum of squared differences)."""
+    diff = as_events(fundamentals) - as_events(transients)
+    return np.einsum("ij,ij->i", diff, diff)
+
+
+def element_deflection(fundamentals, transients) -> np.ndarray:
+    """(n, 3) deflection per actor/behavior/object element."""
+    diff = as_events(fundamentals) - as_events(transients)
+    squared = diff[:, :9] ** 2
+    return squared.reshape(-1, 3, 3).sum(axis=2)
+
+
+def split_elements(row) -> dict:
+    """Map a 9-vector onto {'actor': [...], 'behavior': [...], 'object': [...]}."""
+    return {name: [float(v) for v in row[ELEMENT_SLICES[name]]] for name in ELEMENTS}
+
+
+def characteristic_emotions(actor, behavior, obj):
+    """
+    Actor and object emotions for arrays of events, using the closed-form
+    equations of r/emotions.R. Returns two (n, 3) arrays.
+    """
+    a, b, o = as_events(actor), as_events(behavior), as_events(obj)
+    ae, ap, aa = a[:, 0], a[:, 1], a[:, 2]
+    be, bp, ba = b[:, 0], b[:, 1], b[:, 2]
+    oe, op, oa = o[:, 0], o[:, 1], o[:, 2]
+
+    actor_emotion = np.column_stack((
+        0.54 * ae + 0.25 * be + 0.11 * oe + 0.1 * (be * oe),
+        0.42 * ap + 0.31 * bp + 0.12 * op + 0.15 * (bp * op),
+        0.38 * aa + 0.35 * ba + 0.15 * oa + 0.12 * (ba * oa),
+    ))
+    # Receiving the behavior reduces the object's potency
+    object_emotion = np.column_stack((
+        0.48 * oe + 0.28 * be + 0.14 * ae + 0.1 * (ae * be),
+        0.35 * op + 0.22 * bp + 0.18 * ap + 0.25 * (-bp),
+        0.40 * oa + 0.32 * ba + 0.16 * aa + 0.12 * (ba * aa),
+    ))
+    return actor_emotion, object_emotion
+
+
+def simplified_transients(actor, behavior, obj):
+    """
+    Actor, behavior and object transients for arrays of events, using the
+    fixed closed-form coefficients of r/transients.R. Returns three (n, 3) arrays.
+    """
+    a, b, o = as_events(actor), as_events(behavior), as_events(obj)
+
+    actor_trans = (
+        np.array([0.616, 0.528, 0.597]) * a + np.array([0.221, 0.296, 0.159]) * b
+        + np.array([0.077, 0.083, 0.115]) * o + np.array([0.086, 0.093, 0.129]) * (b * o)
+    )
+    behavior_trans = (
+        np.array([0.158, 0.103, 0.117]) * a + np.array([0.521, 0.538, 0.542]) * b
+        + np.array([0.182, 0.198, 0.163]) * o + np.array([0.139, 0.161, 0.178]) * (a * o)
+    )
+    object_trans = (
+        np.array([0.081, 0.072, 0.099]) * a + np.array([0.189, 0.229, 0.168]) * b
+        + np.array([0.637, 0.564, 0.618]) * o + np.array([0.093, 0.135, 0.115]) * (a * b)
+    )
+    return actor_trans, behavior_trans, object_trans
+
+
+def solve_element(fundamentals, equation, element: str) -> np.ndarray:
+    """
+    Deflection-minimizing EPA of one element for every event.
+
+    Each equation term is linear in the free element's inputs, so the
+    transients are t0 + T x and the optimum is the least-squares solution
+    of (E - T) x = t0 - f0, solved as a batch of 3x3 normal equations.
+    Returns an (n, 3) array.
+    """
+    fundamentals = as_events(fundamentals)
+    selection, coefficients = equation.arrays()
+    free = np.arange(fundamentals.shape[1])[ELEMENT_SLICES[element]]
+
+    free_in_term = selection[:, free]
+    if (free_in_term.sum(axis=1) > 1).any():
+        raise ValueError(f"Equation is not linear in the {element} inputs")
+
+    base = fundamentals.copy()
+    base[:, free] = 0.0
+    fixed_selection = selection.copy()
+    fixed_selection[:, free] = False
+    products = term_matrix(base, fixed_selection)                       # (n, terms)
+
+    constant = ~free_in_term.any(axis=1)
+    t0 = (products * constant) @ coefficients                           # (n, inputs)
+    t = np.einsum("nj,jc,jk->nkc", products, free_in_term.astype(np.float64), coefficients)
+
+    e = np.zeros((fundamentals.shape[1], len(free)))
+    e[free, np.arange(len(free))] = 1.0
+    a = e[np.newaxis, :, :] - t                                         # (n, inputs, 3)
+    r = t0 - base
+
+    ata = np.einsum("nkc,nkd->ncd", a, a)
+    atr = np.einsum("nkc,nk->nc", a, r)
+    return np.linalg.solve(ata, atr[:, :, np.newaxis])[:, :, 0]
+
+
+def substitute(fundamentals, element: str, epa) -> np.ndarray:
+    """Copy of fundamentals with one element replaced by epa (n, 3)."""
+    out = as_events(fundamentals).copy()
+    out[:, ELEMENT_SLICES[element]] = as_events(epa)
+    return out
+
+
+def amalgamate(modifiers, identities, equation) -> np.ndarray:
+    """Modified-identity EPAs for arrays of modifier/identity pairs (traitid equation)."""
+    return apply_equation(np.hstack((as_events(modifiers), as_events(identities))), equation)
@@ -0,0 +1,360 @@
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+import act_backends
+import act_equations
+import act_index
+import act_native
+
+# Numerical parity of the fast paths against inteRact. Events are sampled
+# (or enumerated exhaustively) from each dictionary's terms and computed
+#
+#   - by the reference: inteRact, via r/parity.R on an R backend, and
+#   - by each alternative: "native" is act_native on whole arrays; an R
+#     backend (rscript, pool, rpy2) runs r/parity.R with the shared
+#     coefficient tables, i.e. the closed-form R code the scripts use,
+#
+# in chunks of CHUNK_SIZE events per call. Deflection is checked with the
+# transients: the reference's from inteRact::get_deflection, each backend's
+# from its deflection.R implementation (element_deflection() in R, the
+# native handler for "native"). The report gives, per
+# dictionary, equation set, operation and backend, the max and mean
+# absolute error against the reference and the speedup (reference time over
+# backend time, both measured from Python).
+#
+#   python act_parity.py --dictionary us_2015 --sample 2000 --backend native --backend pool
+
+OPERATIONS = ("transients", "deflection", "optimal_behavior", "amalgamate")
+CHUNK_SIZE = int(os.environ.get("ACT_PARITY_CHUNK_SIZE", "1000"))
+MAX_EVENTS = int(os.environ.get("ACT_PARITY_MAX_EVENTS", "1000000"))
+
+# Events of each computation: (fundamentals columns, term components)
+_LAYOUTS = {
+    "transients": ("identity", "behavior", "identity"),
+    "optimal_behavior": ("identity", "identity"),
+    "amalgamate": ("modifier", "identity"),
+}
+
+
+class EventSet:
+    """Fundamentals of sampled events and the term indices they came from."""
+
+    def __init__(self, components: Tuple[str, ...], terms: Dict[str, List[str]], rows: np.ndarray, epa: Dict[str, np.ndarray]):
+        self.components = components
+        self.terms = terms
+        self.rows = rows
+        self.values = np.hstack([epa[c][rows[:, i]] for i, c in enumerate(components)]).astype(np.float64)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def labels(self, i: int) -> List[str]:
+        return [self.terms[c][self.rows[i, j]] for j, c in enumerate(self.components)]
+
+
+def sample_events(
+    dictionary: str,
+    operation: str,
+    sample: Optional[int] = 1000,
+    seed: int = 0,
+    max_events: int = MAX_EVENTS
+) -> EventSet:
+    """
+    Events built from the dictionary's terms (first rating of each): a
+    uniform sample with replacement, or every combination when sample is None.
+    """
+    index = act_index.get_dictionary(dictionary)
+    components = _LAYOUTS[operation]
+    terms, epa = {}, {}
+    for component in set(components):
+        terms[component], epa[component] = index.first_ratings(component)
+        if not terms[component]:
+            raise ValueError(f"No {component} terms in dictionary {dictionary}")
+    sizes = [len(terms[c]) for c in components]
+
+    if sample is None:
+        total = int(np.prod(sizes, dtype=np.float64))
+        if total > max_events:
+            raise ValueError(
+                f"{operation} on {dictionary} has {total} combinations (limit {max_events}); use a sample"
+            )
+        grids = np.meshgrid(*[np.arange(n) for n in sizes], indexing="ij")
+        rows = np.column_stack([g.ravel() for g in grids])
+    else:
+        rng = np.random.default_rng(seed)
+        rows = np.column_stack([rng.integers(0, n, size=sample) for n in sizes])
+    return EventSet(components, terms, rows, epa)
+
+
+def _chunks(values: np.ndarray) -> List[np.ndarray]:
+    return [values[start:start + CHUNK_SIZE] for start in range(0, len(values), CHUNK_SIZE)]
+
+
+def _run_r(operation: str, events: np.ndarray, key: str, gender: str, backend: str,
+           coefficients: Optional[Dict[str, Any]] = None
+           ) -> Tuple[np.ndarray, np.ndarray, float, Optional[np.ndarray]]:
+    """
+    r/parity.R over all events on an R backend; returns (values, failed
+    mask, seconds, deflections; None except for transients).
+    """
+    values, deflections, failed = [], [], np.zeros(len(events), dtype=bool)
+    started = time.perf_counter()
+    offset = 0
+    for chunk in _chunks(events):
+        payload = {
+            "operation": operation,
+            "events": chunk.tolist(),
+            "equation_key": key,
+            "equation_gender": gender
+        }
+        if coefficients is not None:
+            payload["coefficients"] = coefficients
+        with act_backends.use(backend, strict=True):
+            result = act_backends.run("parity.R", payload)
+        if "error" in result:
+            raise RuntimeError(f"parity.R ({operation}) on {backend}: {result['error']}")
+        values.append(np.asarray(result["values"], dtype=np.float64).reshape(len(chunk), -1))
+        if "deflection" in result:
+            deflections.append(np.asarray(result["deflection"], dtype=np.float64).reshape(len(chunk)))
+        for i in result.get("failed") or []:
+            failed[offset + int(i)] = True
+        offset += len(chunk)
+    seconds = time.perf_counter() - started
+    return np.vstack(values), failed, seconds, np.concatenate(deflections) if deflections else None
+
+
+def _native_deflection(fundamentals: np.ndarray, transients: np.ndarray) -> np.ndarray:
+    """Deflection of each event from the native backend's deflection.R handler."""
+    elements = ("actor", "behavior", "object")
+    totals = np.empty(len(fundamentals))
+    with act_backends.use("native", strict=True):
+        for i, (f, t) in enumerate(zip(fundamentals, transients)):
+            result = act_backends.run("deflection.R", {
+                "fundamentals": {name: f[3 * j:3 * j + 3].tolist() for j, name in enumerate(elements)},
+                "transients": {name: t[3 * j:3 * j + 3].tolist() for j, name in enumerate(elements)}
+            })
+            if "error" in result:
+                raise RuntimeError(f"deflection.R on native: {result['error']}")
+            totals[i] = result["deflection"]["total"]
+    return totals
+
+
+def _run_native(operation: str, events: np.ndarray, equation
+                ) -> Tuple[np.ndarray, np.ndarray, float, Optional[np.ndarray]]:
+    values = []
+    started = time.perf_counter()
+    for chunk in _chunks(events):
+        if operation == "transients":
+            values.append(act_native.apply_equation(chunk, equation))
+        elif operation == "optimal_behavior":
+            fundamentals = np.hstack((chunk[:, :3], np.zeros((len(chunk), 3)), chunk[:, 3:]))
+            values.append(act_native.solve_element(fundamentals, equation, "behavior"))
+        else:
+            values.append(act_native.amalgamate(chunk[:, :3], chunk[:, 3:], equation))
+    seconds = time.perf_counter() - started
+    values = np.vstack(values)
+    deflection = _native_deflection(events, values) if operation == "transients" else None
+    return values, np.zeros(len(events), dtype=bool), seconds, deflection
+
+
+def _errors(reference: np.ndarray, values: np.ndarray, mask: np.ndarray, events: EventSet,
+            seconds: Optional[float], reference_seconds: float) -> Dict[str, Any]:
+    """Max/mean absolute error over the events both sides computed, and the speedup."""
+    report: Dict[str, Any] = {"events": int(mask.sum()), "failed": int((~mask).sum())}
+    if mask.any():
+        error = np.abs(values[mask] - reference[mask])
+        worst = int(np.flatnonzero(mask)[error.max(axis=1).argmax()])
+        report.update({
+            "max_abs_error": float(error.max()),
+            "mean_abs_error": float(error.mean()),
+            "worst": {"terms": events.labels(worst), "fundamentals": [float(v) for v in events.values[worst]]}
+        })
+    if seconds is not None:
+        report["seconds"] = round(seconds, 4)
+        report["reference_seconds"] = round(reference_seconds, 4)
+        report["speedup"] = round(reference_seconds / seconds, 2) if seconds > 0 else None
+    return report
+
+
+def _equation(key: str, gender: str, operation: str):
+    type = "traitid" if operation == "amalgamate" else "impressionabo"
+    return act_equations.get_equation(key, gender, type)
+
+
+def compare_operation(
+    events: EventSet,
+    operation: str,
+    key: str,
+    gender: str,
+    backends: List[str],
+    reference_backend: str
+) -> Dict[str, Dict[str, Any]]:
+    """Errors and speedups of each backend for one operation (transients also yields deflection)."""
+    reference, ref_failed, ref_seconds, ref_deflection = _run_r(
+        operation, events.values, key, gender, reference_backend
+    )
+    results: Dict[str, Dict[str, Any]] = {operation: {}}
+    if operation == "transients":
+        results["deflection"] = {}
+
+    for backend in backends:
+        try:
+            equation = _equation(key, gender, operation)
+            if backend == "native":
+                values, failed, seconds, deflection = _run_native(operation, events.values, equation)
+            else:
+                values, failed, seconds, deflection = _run_r(
+                    operation, events.values, key, gender, backend, equation.to_payload()
+                )
+        except Exception as e:
+            results[operation][backend] = {"error": str(e)}
+            if operation == "transients":
+                results["deflection"][backend] = {"error": str(e)}
+            continue
+
+        mask = ~(ref_failed | failed)
+        results[operation][backend] = _errors(reference, values, mask, events, seconds, ref_seconds)
+        if operation == "transients":
+            if ref_deflection is None or deflection is None:
+                results["deflection"][backend] = {"error": "parity.R returned no deflection"}
+            else:
+                results["deflection"][backend] = _errors(
+                    ref_deflection[:, np.newaxis], deflection[:, np.newaxis], mask, events, None, ref_seconds
+                )
+    return results
+
+
+def run(
+    dictionaries: Optional[List[str]] = None,
+    equations: Optional[List[Tuple[str, str]]] = None,
+    backends: Optional[List[str]] = None,
+    operations: Optional[List[str]] = None,
+    sample: Optional[int] = 1000,
+    seed: int = 0,
+    reference_backend: Optional[str] = None
+) -> Dict[str, Any]:
+    """Parity report for every dictionary x equation set x operation x backend."""
+    dictionaries = dictionaries or act_index.dictionary_keys()
+    if not equations:
+        equations = sorted({
+            (eq["key"], eq["gender"]) for eq in act_equations.list_equations() if eq["type"] == "impressionabo"
+        })
+    backends = backends or ["native"]
+    operations = operations or list(OPERATIONS)
+    for name in backends:
+        act_backends.get_backend(name)
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operation(s): {', '.join(sorted(unknown))}")
+    reference_backend = reference_backend or act_backends.r_backend().name
+    if reference_backend not in ("rscript", "pool", "rpy2"):
+        raise ValueError("The reference backend must be an R backend (rscript, pool or rpy2)")
+
+    # Deflection comes with the transients
+    computations = [op for op in _LAYOUTS if op in operations or (op == "transients" and "deflection" in operations)]
+
+    results = []
+    for dictionary in dictionaries:
+        for operation in computations:
+            events = sample_events(dictionary, operation, sample, seed)
+            for key, gender in equations:
+                entry = {"dictionary": dictionary, "equation_key": key, "equation_gender": gender}
+                try:
+                    compared = compare_operation(events, operation, key, gender, backends, reference_backend)
+                except Exception as e:
+                    results.append(dict(entry, operation=operation, error=str(e)))
+                    continue
+                for name, per_backend in compared.items():
+                    if name in operations:
+                        results.append(dict(entry, operation=name, backends=per_backend))
+
+    return {
+        "reference": {"backend": reference_backend, "implementation": "inteRact"},
+        "sample": sample,
+        "seed": seed,
+        "chunk_size": CHUNK_SIZE,
+        "results": results
+    }
+
+
+def _summary_lines(report: Dict[str, Any]) -> List[str]:
+    lines = [f"{'dictionary':<16} {'equations':<18} {'operation':<17} {'backend':<8} {'events':>8} {'max err':>10} {'mean err':>10} {'speedup':>8}"]
+    for entry in report["results"]:
+        label = f"{entry['dictionary']:<16} {entry['equation_key'] + '/' + entry['equation_gender']:<18} {entry['operation']:<17}"
+        if "error" in entry:
+            lines.append(f"{label} error: {entry['error']}")
+            continue
+        for backend, r in entry["backends"].items():
+            if "error" in r:
+                lines.append(f"{label} {backend:<8} error: {r['error']}")
+                continue
+            speedup = r.get("speedup")
+            lines.append(
+                f"{label} {backend:<8} {r['events']:>8} {r.get('max_abs_error', float('nan')):>10.2e}"
+                f" {r.get('mean_abs_error', float('nan')):>10.2e} {(f'{speedup:.1f}x' if speedup else '-'):>8}"
+            )
+    return lines
+
+
+def _exceeds(report: Dict[str, Any], tolerance: float) -> bool:
+    for entry in report["results"]:
+        if "error" in entry:
+            return True
+        for r in entry["backends"].values():
+            if "error" in r or r.get("failed") or r.get("max_abs_error", 0.0) > tolerance:
+                return True
+    return False
+
+
+def _equation_arg(value: str) -> Tuple[str, str]:
+    key, sep, gender = value.partition("_")
+    if not sep or not gender:
+        raise argparse.ArgumentTypeError(f"expected <key>_<gender>, e.g. us2010_average: {value}")
+    return key, gender
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare ACT backends with inteRact across dictionaries.")
+    parser.add_argument("--dictionary", action="append", help="dictionary key (repeatable; default: all)")
+    parser.add_argument("--equation", action="append", type=_equation_arg,
+                        help="equation set as <key>_<gender> (repeatable; default: every cached set)")
+    parser.add_argument("--backend", action="append", help="backend to compare (repeatable; default: native)")
+    parser.add_argument("--operation", action="append", choices=OPERATIONS, help="repeatable; default: all")
+    parser.add_argument("--reference", help="R backend running inteRact (default: that of ACT_R_MODE)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--sample", type=int, default=1000, help="events per dictionary and operation (default 1000)")
+    group.add_argument("--exhaustive", action="store_true", help="every combination of terms")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, help="exit 1 if any max error exceeds this")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+
+    args = parser.parse_args(argv)
+    try:
+        report = run(
+            args.dictionary, args.equation, args.backend, args.operation,
+            None if args.exhaustive else args.sample, args.seed, args.reference
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    sys.stderr.write("\n".join(_summary_lines(report)) + "\n")
+
+    if args.tolerance is not None and _exceeds(report, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import os
+import copy
+import inspect
+from typing import Dict, List, Optional, Any, Callable
+
+import act_core
+
+# Declarative multi-step requests: a list of act_core operations whose
+# arguments may reference the outputs of earlier steps, run server-side in
+# one call. One agent turn (look up actor, behavior and object, build the
+# event, compute transients and deflection) becomes one tool call.
+#
+#   [{"id": "actor", "op": "lookup_epa", "args": {"label": "doctor", "type": "identity"}},
+#    {"id": "event", "op": "create_event", "args": {"actor_identity": {"$ref": "actor"}, ...}},
+#    {"id": "deflection", "op": "compute_deflection",
+#     "args": {"fundamentals": {"$ref": "event"}, "transients": {"$ref": "transients.transient"}}}]
+#
+# A reference is {"$ref": "<step id>[.<key or list index>...]"}.
+
+MAX_STEPS = int(os.environ.get("ACT_PIPELINE_MAX_STEPS", "50"))
+
+# Pipelines do not nest, and job management is not a computation
+_EXCLUDED_OPERATIONS = {"run_pipeline", "submit_job", "get_job_status", "get_job_result", "cancel_job"}
+
+
+def _operations() -> Dict[str, Callable]:
+    return {
+        name: func
+        for name, func in inspect.getmembers(act_core, inspect.isfunction)
+        if not name.startswith("_")
+        and func.__module__ == act_core.__name__
+        and name not in _EXCLUDED_OPERATIONS
+    }
+
+
+def _is_ref(value: Any) -> bool:
+    return isinstance(value, dict) and set(value) == {"$ref"} and isinstance(value["$ref"], str)
+
+
+def _refs(value: Any) -> List[str]:
+    if _is_ref(value):
+        return [value["$ref"]]
+    if isinstance(value, dict):
+        return [ref for v in value.values() for ref in _refs(v)]
+    if isinstance(value, list):
+        return [ref for v in value for ref in _refs(v)]
+    return []
+
+
+def _lookup(ref: str, results: Dict[str, Any]) -> Any:
+    step_id, *path = ref.split(".")
+    value = results[step_id]
+    for key in path:
+        if isinstance(value, list) and key.lstrip("-").isdigit():
+            index = int(key)
+            if not -len(value) <= index < len(value):
+                raise ValueError(f"Reference '{ref}': index {key} out of range")
+            value = value[index]
+        elif isinstance(value, dict) and key in value:
+            value = value[key]
+        else:
+            raise ValueError(f"Reference '{ref}': no '{key}' in the output of step '{step_id}'")
+    return value
+
+
+def _resolve(value: Any, results: Dict[str, Any]) -> Any:
+    if _is_ref(value):
+        # Later steps must not see (or cause) mutations of earlier outputs
+        return copy.deepcopy(_lookup(value["$ref"], results))
+    if isinstance(value, dict):
+        return {k: _resolve(v, results) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, results) for v in value]
+    return value
+
+
+def validate(steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Check operations, step ids, references and argument names before
+    anything runs, so a malformed pipeline fails without launching R.
+    """
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("'steps' must be a non-empty list")
+    if len(steps) > MAX_STEPS:
+        raise ValueError(f"Pipeline has {len(steps)} steps; the limit is {MAX_STEPS}")
+
+    operations = _operations()
+    seen = set()
+    normalized = []
+    for i, step in enumerate(steps):
+        if not isinstance(step, dict):
+            raise ValueError(f"steps[{i}] must be an object")
+        op = step.get("op")
+        if op not in operations:
+            raise ValueError(f"steps[{i}]: unknown operation '{op}'")
+        step_id = str(step.get("id", i))
+        if step_id in seen:
+            raise ValueError(f"steps[{i}]: duplicate id '{step_id}'")
+        if "." in step_id:
+            raise ValueError(f"steps[{i}]: id '{step_id}' must not contain '.'")
+        args = step.get("args", {})
+        if not isinstance(args, dict):
+            raise ValueError(f"steps[{i}]: 'args' must be an object")
+        for ref in _refs(args):
+            if ref.split(".")[0] not in seen:
+                raise ValueError(f"steps[{i}]: reference '{ref}' does not name an earlier step")
+        try:
+            inspect.signature(operations[op]).bind(**args)
+        except TypeError as e:
+            raise ValueError(f"steps[{i}] ({op}): {e}")
+        seen.add(step_id)
+        normalized.append({"id": step_id, "op": op, "args": args})
+    return normalized
+
+
+def run(steps: List[Dict[str, Any]], stop_on_error: bool = True) -> Dict[str, Any]:
+    """Run the steps in order and return every step's output."""
+    operations = _operations()
+    results: Dict[str, Any] = {}
+    records = []
+    failed: Optional[str] = None
+
+    for step in validate(steps):
+        record: Dict[str, Any] = {"id": step["id"], "op": step["op"]}
+        records.append(record)
+        if failed is not None and stop_on_error:
+            record["skipped"] = True
+            continue
+        try:
+            if any(ref.split(".")[0] not in results for ref in _refs(step["args"])):
+                raise ValueError("depends on a step that failed")
+            output = operations[step["op"]](**_resolve(step["args"], results))
+        except Exception as e:
+            output = {"error": str(e)}
+        # R-backed operations report failures as {"error": ...}
+        if isinstance(output, dict) and "error" in output:
+            record["error"] = output["error"]
+            failed = failed or step["id"]
+            continue
+        record["result"] = output
+        results[step["id"]] = output
+
+    return {
+        "ok": failed is None,
+        "failed": failed,
+        "steps": records
+    }
@@ -0,0 +1,234 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+import act_equations
+import act_index
+import act_native
+
+# Lookahead planning for a conversation: beam search over sequences of
+# dictionary behaviors with alternating turns (the actor acts on the
+# object, then the object on the actor, ...), minimizing the summed
+# deflection of the events over the horizon.
+#
+# Impressions carry over between events as in ACT: each event starts from
+# the interactants' current transient impressions (the behavior from its
+# fundamental), beginning with the state's last step, and its deflection
+# compares the transients with the fundamentals. An early behavior thus
+# changes the deflection of the later events. Without carryover every
+# event starts from the fundamentals, the events do not interact, and the
+# search reduces to a greedy per-turn ranking of the behaviors. Each depth
+# evaluates every (plan, behavior) extension of the beam as one array of
+# events, split into chunks of CHUNK_ROWS that run on WORKERS threads
+# (NumPy releases the GIL in the array operations).
+
+CHUNK_ROWS = int(os.environ.get("ACT_PLANNER_CHUNK_ROWS", "8192"))
+WORKERS = int(os.environ.get("ACT_PLANNER_WORKERS", str(os.cpu_count() or 1)))
+MAX_HORIZON = int(os.environ.get("ACT_PLANNER_MAX_HORIZON", "10"))
+MAX_BEAM_WIDTH = int(os.environ.get("ACT_PLANNER_MAX_BEAM_WIDTH", "1000"))
+
+PARTIES = ("actor", "object")
+
+
+def _candidates(dictionary: str, behaviors: Optional[List[str]]) -> Tuple[List[str], np.ndarray]:
+    """Behavior terms (first rating of each) and their EPA, all or the named ones."""
+    index = act_index.get_dictionary(dictionary)
+    if not behaviors:
+        terms, epa = index.first_ratings("behavior")
+        if not terms:
+            raise ValueError(f"No behaviors found in {dictionary}")
+        return terms, np.asarray(epa, dtype=np.float64)
+
+    terms, rows = [], []
+    for label in dict.fromkeys(behaviors):
+        row = index.find(label, "behavior")
+        if row is None:
+            raise ValueError(f"Term not found: {label} in {dictionary} component behavior")
+        terms.append(index.terms[row])
+        rows.append(row)
+    return terms, index.epa[rows].astype(np.float64)
+
+
+def _party(state: Dict[str, Any], name: str) -> Tuple[str, List[float]]:
+    party = state.get(name)
+    if not isinstance(party, dict) or "epa" not in party:
+        raise ValueError(f"state.{name} must be a lookup result with 'epa' (see init_conversation)")
+    epa = [float(v) for v in party["epa"]]
+    if len(epa) != 3:
+        raise ValueError(f"Invalid state.{name}.epa: expected numeric length 3.")
+    return str(party.get("term", name)), epa
+
+
+def _initial_impressions(state: Dict[str, Any], fundamentals: np.ndarray) -> np.ndarray:
+    """Current impressions of actor and object: the last step's transients, else the fundamentals."""
+    transients = (state.get("last_result") or {}).get("transients")
+    if not isinstance(transients, dict):
+        return fundamentals.copy()
+    impressions = fundamentals.copy()
+    for i, name in enumerate(PARTIES):
+        value = transients.get(name)
+        if value is not None and len(value) == 3:
+            impressions[i] = [float(v) for v in value]
+    return impressions
+
+
+def _evaluate(
+    impressions: np.ndarray,
+    parents: np.ndarray,
+    behaviors: np.ndarray,
+    behavior_epa: np.ndarray,
+    identities: np.ndarray,
+    acting: int,
+    equation
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Transients (n, 9) and deflections (n,) of the extensions (parent plan, behavior)."""
+    acted_on = 1 - acting
+    pre = np.hstack((impressions[parents, acting], behavior_epa[behaviors], impressions[parents, acted_on]))
+    transients = act_native.apply_equation(pre, equation)
+    fundamentals = np.hstack((
+        np.broadcast_to(identities[acting], (len(behaviors), 3)),
+        behavior_epa[behaviors],
+        np.broadcast_to(identities[acted_on], (len(behaviors), 3))
+    ))
+    return transients, act_native.deflection(fundamentals, transients)
+
+
+def plan(
+    state: Dict[str, Any],
+    horizon: int = 3,
+    beam_width: int = 20,
+    time_budget: Optional[float] = 5.0,
+    n_plans: int = 3,
+    start_with: str = "actor",
+    behaviors: Optional[List[str]] = None,
+    equation_key: str = act_equations.DEFAULT_EQUATION_KEY,
+    equation_gender: str = act_equations.DEFAULT_EQUATION_GENDER,
+    carryover: bool = True,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Beam search for the behavior sequences with the lowest cumulative
+    deflection. A time_budget of None searches to the horizon; any other
+    value (0 included) stops after the first depth once it is spent.
+    """
+    started = time.monotonic()
+    if not 1 <= int(horizon) <= MAX_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {MAX_HORIZON}")
+    if not 1 <= int(beam_width) <= MAX_BEAM_WIDTH:
+        raise ValueError(f"beam_width must be between 1 and {MAX_BEAM_WIDTH}")
+    if start_with not in PARTIES:
+        raise ValueError("start_with must be 'actor' or 'object'")
+    horizon, beam_width, n_plans = int(horizon), int(beam_width), max(1, int(n_plans))
+    deadline = None if time_budget is None else started + max(0.0, float(time_budget))
+    workers = max(1, int(workers or WORKERS))
+
+    dictionary = state.get("dictionary", "us_2015")
+    names, identity_epa = zip(*(_party(state, name) for name in PARTIES))
+    identities = np.asarray(identity_epa, dtype=np.float64)                 # (2, 3)
+    terms, behavior_epa = _candidates(dictionary, behaviors)
+    equation = act_equations.get_equation(equation_key, equation_gender, "impressionabo")
+
+    # Beam: impressions (k, 2, 3) of actor and object, cumulative deflection (k,)
+    impressions = (_initial_impressions(state, identities) if carryover else identities.copy())[np.newaxis]
+    cumulative = np.zeros(1)
+    # Per completed depth: parent plan, behavior, event deflection and transients of each beam entry
+    levels: List[Dict[str, np.ndarray]] = []
+    expanded = 0
+    truncated = False
+    first = PARTIES.index(start_with)
+    nb = len(terms)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for depth in range(horizon):
+            if levels and deadline is not None and time.monotonic() > deadline:
+                truncated = True
+                break
+            acting = (first + depth) % 2
+            total = len(cumulative) * nb
+            starts = range(0, total, CHUNK_ROWS)
+
+            def evaluate(start: int) -> Tuple[np.ndarray, np.ndarray]:
+                rows = np.arange(start, min(start + CHUNK_ROWS, total))
+                return _evaluate(impressions, rows // nb, rows % nb, behavior_epa, identities, acting, equation)
+
+            futures = [pool.submit(evaluate, start) for start in starts]
+            transients, deflections = [], []
+            for future in futures:
+                # The first depth always completes so there is a plan to return
+                if levels and deadline is not None and time.monotonic() > deadline:
+                    truncated = True
+                    break
+                t, d = future.result()
+                transients.append(t)
+                deflections.append(d)
+            if truncated:
+                for future in futures:
+                    future.cancel()
+                break
+
+            transients_all = np.vstack(transients)
+            scores = np.repeat(cumulative, nb) + np.concatenate(deflections)
+            expanded += total
+
+            keep = min(beam_width, total)
+            best = np.argpartition(scores, keep - 1)[:keep] if keep < total else np.arange(total)
+            best = best[np.argsort(scores[best], kind="stable")]
+
+            parents, chosen = best // nb, best % nb
+            impressions = impressions[parents].copy()
+            if carryover:
+                impressions[:, acting] = transients_all[best, 0:3]
+                impressions[:, 1 - acting] = transients_all[best, 6:9]
+            cumulative = scores[best]
+            levels.append({
+                "parent": parents,
+                "behavior": chosen,
+                "deflection": np.concatenate(deflections)[best],
+                "transients": transients_all[best]
+            })
+
+    plans = []
+    for rank in range(min(n_plans, len(cumulative))):
+        steps, node = [], rank
+        for depth in range(len(levels) - 1, -1, -1):
+            level = levels[depth]
+            acting = (first + depth) % 2
+            behavior = int(level["behavior"][node])
+            transient = act_native.split_elements(level["transients"][node])
+            steps.append({
+                "turn": PARTIES[acting],
+                "actor": names[acting],
+                "behavior": terms[behavior],
+                "object": names[1 - acting],
+                "behavior_epa": [round(float(v), 3) for v in behavior_epa[behavior]],
+                "deflection": round(float(level["deflection"][node]), 4),
+                "transients": {k: [round(v, 3) for v in values] for k, values in transient.items()}
+            })
+            node = int(level["parent"][node])
+        steps.reverse()
+        plans.append({
+            "behaviors": [step["behavior"] for step in steps],
+            "cumulative_deflection": round(float(cumulative[rank]), 4),
+            "steps": steps
+        })
+
+    return {
+        "actor": names[0],
+        "object": names[1],
+        "dictionary": dictionary,
+        "plans": plans,
+        "search": {
+            "horizon": horizon,
+            "depth": len(levels),
+            "beam_width": beam_width,
+            "candidates": nb,
+            "expanded": expanded,
+            "workers": workers,
+            "truncated": truncated,
+            "elapsed": round(time.monotonic() - started, 4)
+        },
+        "meta": {"equation_key": equation_key, "equation_gender": equation_gender, "carryover": bool(carryover)}
+    }
@@ -0,0 +1,137 @@
+import os
+import json
+import math
+import functools
+from typing import Dict, List, Any
+
+import act_index
+
+# Contents of the MCP dictionary resources, read from the in-memory
+# dictionary index (no R per request):
+#
+#   act://dictionaries                                      all dictionaries
+#   act://dictionaries/{dictionary}                         components, groups, page links
+#   act://dictionaries/{dictionary}/{component}/{page}      one page of terms with EPA
+#
+# Contents are fixed for a catalog version, which every document carries,
+# so clients may cache them until it changes. Rendered documents are cached
+# here per catalog version as well.
+
+URI_PREFIX = "act://dictionaries"
+PAGE_SIZE = int(os.environ.get("ACT_RESOURCE_PAGE_SIZE", "500"))
+CACHE_SIZE = int(os.environ.get("ACT_RESOURCE_CACHE_SIZE", "256"))
+
+
+def dictionary_uri(dictionary: str) -> str:
+    return f"{URI_PREFIX}/{dictionary}"
+
+
+def page_uri(dictionary: str, component: str, page: int) -> str:
+    return f"{URI_PREFIX}/{dictionary}/{component}/{page}"
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _component_terms(version: str, dictionary: str, component: str) -> List[Dict[str, Any]]:
+    """
+    Unique terms of a component in alphabetical order, each with its first
+    rating (as in lookups).
+    """
+    index = act_index.get_dictionary(dictionary)
+    rows: Dict[str, int] = {}
+    for row in index.component_rows(component):
+        row = int(row)
+        term = index.terms[row]
+        if term not in rows:
+            rows[term] = row
+    return [
+        {
+            "term": term,
+            "epa": [round(float(v), 3) for v in index.epa[row]],
+            "group": index.group(row)
+        }
+        for term, row in sorted(rows.items())
+    ]
+
+
+def _pages(count: int) -> int:
+    return max(1, math.ceil(count / PAGE_SIZE))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _render_dictionaries(version: str) -> str:
+    index = act_index.load_index()
+    return json.dumps({
+        "catalog_version": version,
+        "dictionaries": [
+            {
+                "key": key,
+                "terms": len(index[key]),
+                "components": sorted(set(index[key].component_names)),
+                "uri": dictionary_uri(key)
+            }
+            for key in sorted(index)
+        ]
+    })
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _render_dictionary(version: str, dictionary: str) -> str:
+    index = act_index.get_dictionary(dictionary)
+    components = []
+    for component in sorted(set(index.component_names)):
+        count = len(_component_terms(version, dictionary, component))
+        if count == 0:
+            continue
+        components.append({
+            "component": component,
+            "terms": count,
+            "pages": _pages(count),
+            "first_page": page_uri(dictionary, component, 1)
+        })
+    return json.dumps({
+        "catalog_version": version,
+        "dictionary": dictionary,
+        "groups": sorted(set(index.group_names)),
+        "page_size": PAGE_SIZE,
+        "components": components
+    })
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _render_page(version: str, dictionary: str, component: str, page: int) -> str:
+    terms = _component_terms(version, dictionary, component)
+    if not terms:
+        raise ValueError(f"No {component} terms in dictionary {dictionary}")
+    pages = _pages(len(terms))
+    if not 1 <= page <= pages:
+        raise ValueError(f"Page {page} out of range (1-{pages})")
+    start = (page - 1) * PAGE_SIZE
+    return json.dumps({
+        "catalog_version": version,
+        "dictionary": dictionary,
+        "component": component,
+        "page": page,
+        "pages": pages,
+        "total": len(terms),
+        "next": page_uri(dictionary, component, page + 1) if page < pages else None,
+        "terms": terms[start:start + PAGE_SIZE]
+    })
+
+
+def dictionaries() -> str:
+    """JSON list of all dictionaries with their resource URIs."""
+    return _render_dictionaries(act_index.catalog_version())
+
+
+def dictionary(key: str) -> str:
+    """JSON summary of one dictionary: components, term counts and first pages."""
+    return _render_dictionary(act_index.catalog_version(), key)
+
+
+def terms_page(key: str, component: str, page: Any) -> str:
+    """JSON page of a component's terms with EPA ratings and a link to the next page."""
+    try:
+        page = int(page)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid page: {page}")
+    return _render_page(act_index.catalog_version(), key, component.lower(), page)
@@ -0,0 +1,425 @@
+import os
+import time
+import struct
+import atexit
+import itertools
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Any
+
+import act_memory
+import act_wire
+
+# Persistent R workers (r/worker.R) for act_core._run_r_script when
+# ACT_R_MODE=worker. Each worker is one long-lived Rscript process that
+# serves many calls over its stdin/stdout pipes using length-prefixed ACTB
+# frames tagged with request ids. Several requests can be in flight on one
+# worker (answered in order); a pool spreads concurrent calls over
+# ACT_R_WORKERS processes. A supervisor thread pings idle workers so a hung
+# or dead process is replaced before the next call lands on it, retires
+# workers that exceed their memory, call or age limits once their in-flight
+# calls are answered, and restarts crashed workers with exponential backoff.
+
+R_SCRIPT_DIR = os.path.join(os.path.dirname(__file__), "r")
+WORKER_SCRIPT = os.path.join(R_SCRIPT_DIR, "worker.R")
+
+POOL_SIZE = int(os.environ.get("ACT_R_WORKERS", "2"))
+CALL_TIMEOUT_SECONDS = float(os.environ.get("ACT_R_CALL_TIMEOUT", "120"))
+HEARTBEAT_SECONDS = float(os.environ.get("ACT_R_HEARTBEAT_SECONDS", "10"))
+HEARTBEAT_TIMEOUT_SECONDS = float(os.environ.get("ACT_R_HEARTBEAT_TIMEOUT", "5"))
+
+# Recycling limits; 0 disables a limit
+MAX_RSS_MB = float(os.environ.get("ACT_R_WORKER_MAX_RSS_MB", "1024"))
+MAX_CALLS = int(os.environ.get("ACT_R_WORKER_MAX_CALLS", "1000"))
+MAX_AGE_SECONDS = float(os.environ.get("ACT_R_WORKER_MAX_AGE", "3600"))
+
+RESTART_BACKOFF_SECONDS = float(os.environ.get("ACT_R_RESTART_BACKOFF", "1"))
+RESTART_BACKOFF_MAX_SECONDS = float(os.environ.get("ACT_R_RESTART_BACKOFF_MAX", "60"))
+
+
+class WorkerDied(RuntimeError):
+    pass
+
+
+def _read_exact(stream, size: int) -> Optional[bytes]:
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class RWorker:
+    """One worker.R process with pipelined, id-tagged requests."""
+
+    def __init__(self, slot: int = 0):
+        self.slot = slot
+        self.process = subprocess.Popen(
+            ["Rscript", WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        self.pid = self.process.pid
+        self.started_at = time.time()
+        self.last_seen = self.started_at
+        self.calls = 0
+        self.rss: Optional[int] = None
+        self.exit_reason: Optional[str] = None
+        # Set when the worker is retired on purpose (not a crash)
+        self.retiring: Optional[str] = None
+
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._stderr: deque = deque(maxlen=50)
+
+        threading.Thread(target=self._read_replies, name=f"act-rworker-{self.pid}", daemon=True).start()
+        threading.Thread(target=self._drain_stderr, name=f"act-rworker-{self.pid}-err", daemon=True).start()
+
+    @property
+    def alive(self) -> bool:
+        return self.exit_reason is None and self.process.poll() is None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.started_at
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "pid": self.pid,
+            "slot": self.slot,
+            "alive": self.alive,
+            "pending": self.pending,
+            "calls": self.calls,
+            "rss": self.rss,
+            "age": round(self.age, 1),
+            "started_at": self.started_at,
+            "last_seen": self.last_seen,
+            "retiring": self.retiring,
+            "exit_reason": self.exit_reason
+        }
+
+    def sample_rss(self) -> Optional[int]:
+        self.rss = act_memory.rss(self.pid) if self.alive else None
+        return self.rss
+
+    def over_limit(self) -> Optional[str]:
+        """Reason this worker should be recycled, if any."""
+        if MAX_CALLS > 0 and self.calls >= MAX_CALLS:
+            return f"served {self.calls} calls (limit {MAX_CALLS})"
+        if MAX_AGE_SECONDS > 0 and self.age >= MAX_AGE_SECONDS:
+            return f"running for {self.age:.0f}s (limit {MAX_AGE_SECONDS:g}s)"
+        if MAX_RSS_MB > 0 and self.rss is not None and self.rss >= MAX_RSS_MB * 1024 * 1024:
+            return f"RSS {self.rss / 1048576:.0f} MB (limit {MAX_RSS_MB:g} MB)"
+        return None
+
+    def retire(self, reason: str) -> None:
+        """Stop once the calls already sent to this worker are answered."""
+        if self.retiring is None:
+            self.retiring = reason
+        if self.pending == 0:
+            self.close(f"recycled: {reason}")
+
+    def _read_replies(self) -> None:
+        stream = self.process.stdout
+        reason = "R worker exited"
+        try:
+            while True:
+                header = _read_exact(stream, 4)
+                if header is None:
+                    break
+                body = _read_exact(stream, struct.unpack("<I", header)[0])
+                if body is None:
+                    break
+                message = act_wire.decode_frame(body)
+                self.last_seen = time.time()
+                with self._lock:
+                    future = self._pending.pop(message.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except Exception as e:
+            reason = f"R worker protocol error: {e}"
+        self.close(reason)
+
+    def _drain_stderr(self) -> None:
+        for line in iter(self.process.stderr.readline, b""):
+            self._stderr.append(line.decode("utf-8", errors="replace").rstrip())
+
+    def _send(self, message: Dict[str, Any]) -> Future:
+        message = dict(message, id=next(self._ids))
+        frame = act_wire.encode_frame(message)
+        future: Future = Future()
+        with self._lock:
+            if not self.alive:
+                raise WorkerDied(f"R worker {self.pid} is not running: {self.exit_reason}")
+            self._pending[message["id"]] = future
+            try:
+                self.process.stdin.write(struct.pack("<I", len(frame)) + frame)
+                self.process.stdin.flush()
+            except (OSError, ValueError) as e:
+                self._pending.pop(message["id"], None)
+                raise WorkerDied(f"R worker {self.pid} is not accepting requests: {e}")
+        return future
+
+    def call(self, script_name: str, input_data: Dict[str, Any], timeout: float = CALL_TIMEOUT_SECONDS) -> Any:
+        """Run one script in this worker and return its output."""
+        future = self._send({"type": "call", "script": script_name, "input": input_data})
+        try:
+            reply = future.result(timeout)
+        except FutureTimeout:
+            # Requests are served in order, so a stuck call blocks the worker
+            self.close(f"call to {script_name} timed out after {timeout:g}s", kill=True)
+            raise RuntimeError(f"R worker {self.pid} timed out running {script_name}")
+        self.calls += 1
+        if self.retiring is not None and self.pending == 0:
+            self.close(f"recycled: {self.retiring}")
+        if reply.get("type") == "error":
+            raise RuntimeError(f"R script failed with error:\n{reply.get('error')}")
+        return reply.get("output")
+
+    def ping(self, timeout: float = HEARTBEAT_TIMEOUT_SECONDS) -> bool:
+        """Heartbeat; a worker that does not answer in time is stopped."""
+        try:
+            self._send({"type": "ping"}).result(timeout)
+            return True
+        except FutureTimeout:
+            self.close(f"no heartbeat reply within {timeout:g}s", kill=True)
+        except WorkerDied:
+            pass
+        return False
+
+    def close(self, reason: str = "shut down", kill: bool = False) -> None:
+        """Stop the process and fail every request still in flight."""
+        with self._lock:
+            if self.exit_reason is None:
+                self.exit_reason = reason
+            pending, self._pending = self._pending, {}
+        detail = "\n".join(self._stderr)
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(WorkerDied(f"R worker {self.pid}: {reason}\n{detail}".rstrip()))
+
+        if self.process.poll() is None:
+            if not kill:
+                try:
+                    frame = act_wire.encode_frame({"id": 0, "type": "shutdown"})
+                    self.process.stdin.write(struct.pack("<I", len(frame)) + frame)
+                    self.process.stdin.close()
+                    self.process.wait(timeout=2)
+                    return
+                except (OSError, ValueError, subprocess.TimeoutExpired):
+                    pass
+            self.process.kill()
+
+
+class RWorkerPool:
+    """
+    Fixed number of worker slots, started on demand. A supervisor thread
+    recycles workers past their limits and restarts crashed ones with backoff.
+    """
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = max(1, size)
+        self._workers: List[Optional[RWorker]] = [None] * self.size
+        self._failures = [0] * self.size
+        self._restart_at = [0.0] * self.size
+        self._draining: List[RWorker] = []
+        self._exits: deque = deque(maxlen=20)
+        self._recycled = 0
+        self._crashed = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+
+    def _reap(self, slot: int) -> None:
+        """Record a dead worker in a slot and schedule its restart (lock held)."""
+        worker = self._workers[slot]
+        if worker is None or worker.alive:
+            return
+        self._workers[slot] = None
+        self._record_exit(worker, "crashed")
+        self._crashed += 1
+        self._failures[slot] += 1
+        delay = min(RESTART_BACKOFF_MAX_SECONDS, RESTART_BACKOFF_SECONDS * 2 ** (self._failures[slot] - 1))
+        self._restart_at[slot] = time.time() + delay
+
+    def _record_exit(self, worker: RWorker, kind: str) -> None:
+        self._exits.append({
+            "pid": worker.pid,
+            "slot": worker.slot,
+            "kind": kind,
+            "reason": worker.exit_reason,
+            "calls": worker.calls,
+            "age": round(worker.age, 1),
+            "at": time.time()
+        })
+
+    def _start(self, slot: int) -> RWorker:
+        self._workers[slot] = RWorker(slot)
+        self._start_supervisor()
+        return self._workers[slot]
+
+    def _acquire(self) -> RWorker:
+        deadline = time.time() + CALL_TIMEOUT_SECONDS
+        while True:
+            with self._lock:
+                if self._stopped.is_set():
+                    raise WorkerDied("R worker pool is shut down")
+                for slot in range(self.size):
+                    self._reap(slot)
+                alive = [w for w in self._workers if w is not None and w.alive and w.retiring is None]
+                idle = [w for w in alive if w.pending == 0]
+                if idle:
+                    return idle[0]
+                # Every running worker is busy: start another one if a slot is free
+                now = time.time()
+                free = [s for s in range(self.size) if self._workers[s] is None]
+                for slot in free:
+                    if self._restart_at[slot] <= now:
+                        return self._start(slot)
+                if alive:
+                    return min(alive, key=lambda w: w.pending)
+                wake = min(self._restart_at[s] for s in free) if free else now + 0.1
+            # Every slot is waiting out its restart backoff
+            if wake > deadline:
+                raise WorkerDied("R workers keep crashing; restart backoff exceeds the call timeout")
+            time.sleep(max(0.0, wake - time.time()))
+
+    def _start_supervisor(self) -> None:
+        if self._supervisor is None and HEARTBEAT_SECONDS > 0:
+            self._supervisor = threading.Thread(target=self._supervise, name="act-rworker-supervisor", daemon=True)
+            self._supervisor.start()
+
+    def _supervise(self) -> None:
+        while not self._stopped.wait(HEARTBEAT_SECONDS):
+            with self._lock:
+                workers = [w for w in self._workers if w is not None and w.alive]
+            for worker in workers:
+                # Busy workers are covered by the call timeout instead
+                if worker.pending == 0:
+                    worker.ping()
+                worker.sample_rss()
+                self.check(worker)
+            with self._lock:
+                now = time.time()
+                for slot in range(self.size):
+                    self._reap(slot)
+                    worker = self._workers[slot]
+                    if worker is None and self._failures[slot] and self._restart_at[slot] <= now:
+                        # Bring a crashed slot back once its backoff has passed
+                        self._start(slot)
+                    elif worker is not None and worker.calls > 0:
+                        self._failures[slot] = 0
+                for worker in [w for w in self._draining if not w.alive]:
+                    self._draining.remove(worker)
+                    self._record_exit(worker, "recycled")
+
+    def check(self, worker: RWorker) -> None:
+        """Retire a worker past its limits; its slot is refilled on demand."""
+        reason = worker.over_limit()
+        if reason is None or worker.retiring is not None:
+            return
+        with self._lock:
+            if self._workers[worker.slot] is not worker:
+                return
+            self._workers[worker.slot] = None
+            self._draining.append(worker)
+            self._recycled += 1
+        worker.retire(reason)
+
+    def call(self, script_name: str, input_data: Dict[str, Any]) -> Any:
+        worker = self._acquire()
+        try:
+            result = worker.call(script_name, input_data)
+        except WorkerDied:
+            # The worker died before answering; retry once on a fresh process
+            return self._acquire().call(script_name, input_data)
+        self.check(worker)
+        return result
+
+    def workers(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [w.info() for w in self._workers if w is not None]
+
+    def status(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            slots = []
+            for slot, worker in enumerate(self._workers):
+                entry: Dict[str, Any] = {"slot": slot, "failures": self._failures[slot]}
+                if worker is not None:
+                    entry["worker"] = worker.info()
+                elif self._restart_at[slot] > now:
+                    entry["restart_in"] = round(self._restart_at[slot] - now, 1)
+                slots.append(entry)
+            return {
+                "size": self.size,
+                "slots": slots,
+                "draining": [w.info() for w in self._draining],
+                "recycled": self._recycled,
+                "crashed": self._crashed,
+                "recent_exits": list(self._exits)
+            }
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            workers = self._workers + self._draining
+            self._workers, self._draining = [None] * self.size, []
+        for worker in workers:
+            if worker is not None:
+                worker.close()
+
+
+_pool: Optional[RWorkerPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> RWorkerPool:
+    """The worker pool of this process (a forked child gets its own)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = RWorkerPool()
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def call(script_name: str, input_data: Dict[str, Any]) -> Any:
+    return get_pool().call(script_name, input_data)
+
+
+def status() -> Dict[str, Any]:
+    """Worker pool state for the admin endpoint (without starting a pool)."""
+    limits = {
+        "max_rss_mb": MAX_RSS_MB,
+        "max_calls": MAX_CALLS,
+        "max_age": MAX_AGE_SECONDS,
+        "restart_backoff": RESTART_BACKOFF_SECONDS,
+        "restart_backoff_max": RESTART_BACKOFF_MAX_SECONDS
+    }
+    with _pool_lock:
+        pool = _pool if _pool_pid == os.getpid() else None
+    state = pool.status() if pool is not None else {"size": POOL_SIZE, "slots": [], "draining": [], "recycled": 0, "crashed": 0, "recent_exits": []}
+    return dict(state, limits=limits)
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown()
+        _pool = None
+
+
+atexit.register(shutdown)
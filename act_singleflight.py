@@ -0,0 +1,100 @@
+import os
+import copy
+import threading
+from typing import Dict, Optional, Any, Callable
+
+# Single-flight coalescing: while a computation for a key is running, other
+# threads asking for the same key wait for it and share its result (or
+# exception) instead of starting their own R process. Keys come from
+# act_cache.make_key, i.e. the canonicalized arguments under the current
+# catalog version.
+#
+# This coalesces the threads of one process. Across processes (e.g. the
+# sync gunicorn workers) act_cache.cached adds a lease in the shared
+# SQLite tier; the counters here describe the current process only.
+
+ENABLED = os.environ.get("ACT_SINGLEFLIGHT", "1").lower() not in ("0", "false", "no", "off")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time."""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, field: str) -> None:
+        counters = self._stats.setdefault(name, {"calls": 0, "executions": 0, "coalesced": 0})
+        counters[field] += 1
+
+    def do(self, key: str, fn: Callable[[], Any], name: str = "") -> Any:
+        with self._lock:
+            self._count(name, "calls")
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._count(name, "executions")
+            else:
+                call.waiters += 1
+                self._count(name, "coalesced")
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Waiters get their own copy; callers may modify results
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            functions = {name: dict(counters) for name, counters in self._stats.items()}
+            in_flight = len(self._calls)
+        return {
+            "enabled": ENABLED,
+            "in_flight": in_flight,
+            "calls": sum(c["calls"] for c in functions.values()),
+            "executions": sum(c["executions"] for c in functions.values()),
+            "coalesced": sum(c["coalesced"] for c in functions.values()),
+            "functions": functions
+        }
+
+
+_flight = SingleFlight()
+
+
+def do(key: str, fn: Callable[[], Any], name: str = "") -> Any:
+    """Run fn for key, or wait for the identical computation already running."""
+    if not ENABLED:
+        return fn()
+    return _flight.do(key, fn, name)
+
+
+def stats() -> Dict[str, Any]:
+    return _flight.stats()
@@ -0,0 +1,268 @@
+import os
+import re
+import sys
+import json
+import queue
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Iterator
+
+# Indexed SQLite copy of every actdata dictionary, built once at image build
+# time (`python act_store.py build`) from the same export as act_index. The
+# label lookup, search and closest-term paths of act_core query it through
+# a per-process pool of read-only connections instead of evaluating
+# actdata::epa_subset in R on every call. Dictionaries missing from the
+# store still go through R, and so do lookups in a store built from an
+# export without the rows' metadata (every actdata column, which
+# lookup_epa.R returns).
+
+DICTIONARY_DB = os.environ.get("ACT_DICTIONARY_DB", "")
+POOL_SIZE = int(os.environ.get("ACT_DICTIONARY_DB_POOL", "4"))
+
+COMPONENTS = ("identity", "behavior", "modifier", "setting")
+
+SCHEMA = (
+    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE dictionaries (key TEXT PRIMARY KEY, rows INTEGER NOT NULL)",
+    "CREATE TABLE terms ("
+    " id INTEGER PRIMARY KEY,"
+    " dictionary TEXT NOT NULL,"
+    " term TEXT NOT NULL,"
+    " term_lower TEXT NOT NULL,"
+    " component TEXT NOT NULL,"
+    " rater_group TEXT NOT NULL,"
+    " e REAL NOT NULL, p REAL NOT NULL, a REAL NOT NULL,"
+    " metadata TEXT)",
+    "CREATE INDEX terms_term ON terms (dictionary, component, term_lower)",
+    "CREATE INDEX terms_group ON terms (dictionary, rater_group)",
+    # Trigram tokens give substring matching, like grep() in search_labels.R
+    "CREATE VIRTUAL TABLE terms_fts USING fts5(term_lower, tokenize='trigram', content='terms', content_rowid='id')",
+)
+
+# Searches with regex syntax are left to R, which treats them as patterns
+_REGEX_CHARS = re.compile(r"[.^$*+?()\[\]{}|\\]")
+
+
+def build(path: str, entries: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Write the store for the given act_index export entries (default: all)."""
+    import act_index
+    if entries is None:
+        entries = act_index._extract()
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for statement in SCHEMA:
+            conn.execute(statement)
+        rows = 0
+        for entry in entries:
+            terms = entry["terms"]
+            metadata = entry.get("metadata") or [None] * len(terms)
+            conn.executemany(
+                "INSERT INTO terms (dictionary, term, term_lower, component, rater_group, e, p, a, metadata)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (entry["key"], term, term.lower(), component, group, float(epa[0]), float(epa[1]), float(epa[2]), row)
+                    for term, component, group, epa, row in zip(
+                        terms, entry["components"], entry["groups"], entry["epa"], metadata
+                    )
+                )
+            )
+            conn.execute("INSERT INTO dictionaries (key, rows) VALUES (?, ?)", (entry["key"], len(terms)))
+            rows += len(terms)
+        conn.execute("INSERT INTO terms_fts (terms_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO meta (key, value) VALUES ('catalog_version', ?)", (act_index._version(entries),))
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return {"path": path, "dictionaries": len(entries), "rows": rows}
+
+
+class _ConnectionPool:
+    """Read-only connections to an immutable database file."""
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.Semaphore(max(1, size))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+
+
+_pool: Optional[_ConnectionPool] = None
+_pool_pid: Optional[int] = None
+_keys: Optional[frozenset] = None
+_columns: Optional[frozenset] = None
+_lock = threading.Lock()
+
+
+def available() -> bool:
+    return bool(DICTIONARY_DB) and os.path.exists(DICTIONARY_DB)
+
+
+def _connection():
+    """Pooled connection of this process (a forked child opens its own)."""
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = _ConnectionPool(DICTIONARY_DB)
+            _pool_pid = os.getpid()
+        return _pool.connection()
+
+
+def has_dictionary(key: str) -> bool:
+    """Whether the store can answer queries for a dictionary."""
+    global _keys
+    if not available():
+        return False
+    if _keys is None:
+        with _connection() as conn:
+            _keys = frozenset(row[0] for row in conn.execute("SELECT key FROM dictionaries"))
+    return key in _keys
+
+
+def _has_metadata() -> bool:
+    """Whether the store holds the rows' metadata (stores built before it was exported do not)."""
+    global _columns
+    if _columns is None:
+        with _connection() as conn:
+            _columns = frozenset(row[1] for row in conn.execute("PRAGMA table_info(terms)"))
+    return "metadata" in _columns
+
+
+def catalog_version() -> Optional[str]:
+    """Catalog version the store was built from (same as act_index.catalog_version())."""
+    if not available():
+        return None
+    with _connection() as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'catalog_version'").fetchone()
+    return row[0] if row else None
+
+
+def lookup(label: str, type: str, dictionary: str) -> Dict[str, Any]:
+    """
+    Same result as r/lookup_epa.R: first row of the term in the component.
+    metadata is None if the store does not hold the rows' metadata.
+    """
+    component = type.lower() if isinstance(type, str) else None
+    if component not in COMPONENTS:
+        return {"error": f"Invalid type: {type}"}
+    metadata = "metadata" if _has_metadata() else "NULL"
+    with _connection() as conn:
+        row = conn.execute(
+            f"SELECT term, e, p, a, {metadata} FROM terms"
+            " WHERE dictionary = ? AND component = ? AND term_lower = ? ORDER BY id LIMIT 1",
+            (dictionary, component, label.lower())
+        ).fetchone()
+    if row is None:
+        return {"error": f"Term not found: {label} in {dictionary} component {component}"}
+    term, e, p, a, metadata = row
+    return {"term": term, "epa": [e, p, a], "metadata": json.loads(metadata) if metadata else None}
+
+
+def search(dictionary: str, search_term: Optional[str] = None, limit: int = 100, offset: int = 0) -> Optional[Dict[str, Any]]:
+    """
+    Same result as r/search_labels.R for plain (case-insensitive substring)
+    searches. Returns None for regex searches, which only R can answer.
+    """
+    if search_term and _REGEX_CHARS.search(search_term):
+        return None
+
+    where, params = "t.dictionary = ?", [dictionary]
+    source = "terms t"
+    needle = (search_term or "").lower()
+    if len(needle) >= 3:
+        source = "terms_fts f JOIN terms t ON t.id = f.rowid"
+        where += " AND terms_fts MATCH ?"
+        params.append('"' + needle.replace('"', '""') + '"')
+    elif needle:
+        where += " AND instr(t.term_lower, ?) > 0"
+        params.append(needle)
+
+    offset = max(0, int(offset))
+    with _connection() as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params).fetchone()[0]
+        # LIMIT -1 is unlimited, matching limit <= 0 in search_labels.R
+        rows = conn.execute(
+            f"SELECT t.term FROM {source} WHERE {where} ORDER BY t.id LIMIT ? OFFSET ?",
+            params + [int(limit) if limit > 0 else -1, offset]
+        )
+        terms = [row[0] for row in rows]
+    return {"dictionary": dictionary, "count": len(terms), "total": total, "offset": offset, "terms": terms}
+
+
+def closest(epa: List[float], type: str, dictionary: str, n: int = 5) -> Dict[str, Any]:
+    """Same result as r/closest_term.R: nearest unique terms of a component."""
+    try:
+        target = [float(v) for v in epa]
+    except (TypeError, ValueError):
+        target = []
+    if len(target) != 3:
+        return {"error": "epa must be [E, P, A] array"}
+    component = (type or "").lower()
+    where, params = "dictionary = ?", [dictionary]
+    if component:
+        where += " AND component = ?"
+        params.append(component)
+    with _connection() as conn:
+        rows = conn.execute(
+            "SELECT term, e, p, a, component,"
+            " (e - ?) * (e - ?) + (p - ?) * (p - ?) + (a - ?) * (a - ?) AS d2"
+            f" FROM terms WHERE {where} ORDER BY d2, id",
+            [target[0], target[0], target[1], target[1], target[2], target[2]] + params
+        )
+        matches, seen = [], set()
+        for term, e, p, a, comp, d2 in rows:
+            if term in seen:
+                continue
+            seen.add(term)
+            matches.append({
+                "term": term,
+                "epa": [round(e, 3), round(p, 3), round(a, 3)],
+                "distance": round(d2 ** 0.5, 4),
+                "component": comp
+            })
+            if len(matches) >= n:
+                break
+    if not matches:
+        return {"error": f"No terms found for type: {component}"}
+    return {"target_epa": target, "dictionary": dictionary, "type": component, "matches": matches}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ACT dictionary store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Build the SQLite dictionary store")
+    build_parser.add_argument("--output", default=DICTIONARY_DB, help="Database path (default: ACT_DICTIONARY_DB)")
+    args = parser.parse_args(argv)
+
+    if not args.output:
+        parser.error("--output or ACT_DICTIONARY_DB is required")
+    summary = build(args.output)
+    print(f"Wrote {summary['rows']} rows of {summary['dictionaries']} dictionaries to {summary['path']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+import os
+import sys
+import json
+import argparse
+import threading
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+import act_equations
+import act_index
+import act_native
+
+# Precomputed lookup tables, stored as .npy arrays with a JSON sidecar and
+# memory-mapped on load so that processes share the pages.
+#
+#   TABLE_DIR/amalgamation__<dictionary>__<key>__<gender>.npy   float32 (modifiers, identities, 3)
+#   TABLE_DIR/amalgamation__<dictionary>__<key>__<gender>.json  term lists and equation hash
+#   TABLE_DIR/behaviors__<dictionary>__<key>__<gender>.npy      (pairs, k) behavior row + deflection
+#   TABLE_DIR/behaviors__<dictionary>__<key>__<gender>.json     pairs, behaviors and their EPA
+
+TABLE_DIR = os.environ.get("ACT_TABLE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables"))
+
+_lock = threading.Lock()
+_tables: Dict[Tuple[str, ...], Optional[Any]] = {}
+
+# Events evaluated together when building behavior rankings (pairs x behaviors rows)
+RANKING_CHUNK_ROWS = int(os.environ.get("ACT_RANKING_CHUNK_ROWS", "50000"))
+
+# Bump when the way tables are built changes; tables of other versions are stale
+TABLE_VERSION = 2
+
+
+class AmalgamationTable:
+    """Modifier x identity amalgamations of one dictionary and equation set."""
+
+    def __init__(self, values: np.ndarray, meta: Dict[str, Any]):
+        self.values = values
+        self.meta = meta
+        # Terms that differ only in case resolve to the first, as lookups do
+        self.modifiers = {t.lower(): i for i, t in reversed(list(enumerate(meta["modifiers"])))}
+        self.identities = {t.lower(): i for i, t in reversed(list(enumerate(meta["identities"])))}
+
+    def get(self, modifier: str, identity: str) -> Optional[List[float]]:
+        m = self.modifiers.get(modifier.lower())
+        i = self.identities.get(identity.lower())
+        if m is None or i is None:
+            return None
+        return [float(v) for v in self.values[m, i]]
+
+
+class BehaviorRanking:
+    """Top-k behaviors by deflection for a fixed list of identity pairs."""
+
+    def __init__(self, values: np.ndarray, meta: Dict[str, Any]):
+        self.values = values
+        self.meta = meta
+        self.behaviors = meta["behaviors"]
+        self.behavior_epa = np.asarray(meta["behavior_epa"], dtype=np.float64)
+        self.identities = {t.lower(): epa for t, epa in meta["identities"].items()}
+        self.pairs = {(a.lower(), o.lower()): i for i, (a, o) in enumerate(meta["pairs"])}
+
+    @property
+    def k(self) -> int:
+        return self.values.shape[1]
+
+    def get(self, actor: str, object_: str) -> Optional[np.ndarray]:
+        row = self.pairs.get((actor.lower(), object_.lower()))
+        return None if row is None else self.values[row]
+
+
+def _table_path(kind: str, *parts: str) -> str:
+    return os.path.join(TABLE_DIR, "__".join((kind,) + parts))
+
+
+def build_amalgamations(
+    dictionary: str,
+    equation_key: str = act_equations.DEFAULT_EQUATION_KEY,
+    equation_gender: str = act_equations.DEFAULT_EQUATION_GENDER
+) -> str:
+    """Compute and store every modifier x identity amalgamation; returns the table path."""
+    equation = act_equations.get_equation(equation_key, equation_gender, "traitid")
+    index = act_index.get_dictionary(dictionary)
+    modifiers, modifier_epa = index.first_ratings("modifier")
+    identities, identity_epa = index.first_ratings("identity")
+
+    os.makedirs(TABLE_DIR, exist_ok=True)
+    path = _table_path("amalgamation", dictionary, equation_key, equation_gender)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+
+    values = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=np.float32, shape=(len(modifiers), len(identities), 3)
+    )
+    for m in range(len(modifiers)):
+        values[m] = act_native.amalgamate(
+            np.repeat(modifier_epa[m:m + 1], len(identities), axis=0), identity_epa, equation
+        )
+    values.flush()
+    del values
+    os.replace(tmp_path, f"{path}.npy")
+
+    with open(f"{path}.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "dictionary": dictionary,
+            "equation_key": equation_key,
+            "equation_gender": equation_gender,
+            "equation_hash": equation.hash,
+            "catalog_version": act_index.catalog_version(),
+            "table_version": TABLE_VERSION,
+            "modifiers": modifiers,
+            "identities": identities
+        }, f)
+
+    with _lock:
+        _tables.pop((dictionary, equation_key, equation_gender), None)
+    return f"{path}.npy"
+
+
+def amalgamation_table(
+    dictionary: str,
+    equation_key: str = act_equations.DEFAULT_EQUATION_KEY,
+    equation_gender: str = act_equations.DEFAULT_EQUATION_GENDER
+) -> Optional[AmalgamationTable]:
+    """Memory-mapped table if one was built for the current equation set and dictionaries, else None."""
+    cache_key = (dictionary, equation_key, equation_gender)
+    with _lock:
+        if cache_key in _tables:
+            return _tables[cache_key]
+
+    table = None
+    path = _table_path("amalgamation", dictionary, equation_key, equation_gender)
+    if os.path.exists(f"{path}.npy") and os.path.exists(f"{path}.json"):
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        try:
+            current = act_equations.get_equation(equation_key, equation_gender, "traitid").hash
+        except (ValueError, RuntimeError):
+            current = None
+        version = act_index.available_catalog_version()
+        # A table built from other coefficients or other ratings is stale
+        if meta.get("table_version") == TABLE_VERSION and (
+            current is None or meta.get("equation_hash") == current
+        ) and (version is None or meta.get("catalog_version") == version):
+            table = AmalgamationTable(np.load(f"{path}.npy", mmap_mode="r"), meta)
+
+    with _lock:
+        _tables[cache_key] = table
+    return table
+
+
+def build_behavior_rankings(
+    dictionary: str,
+    pairs: List[Tuple[str, str]],
+    top_k: int = 20,
+    equation_key: str = act_equations.DEFAULT_EQUATION_KEY,
+    equation_gender: str = act_equations.DEFAULT_EQUATION_GENDER
+) -> str:
+    """Rank every dictionary behavior for each identity pair and store the top k; returns the table path."""
+    equation = act_equations.get_equation(equation_key, equation_gender, "impressionabo")
+    index = act_index.get_dictionary(dictionary)
+    behaviors, behavior_epa = index.first_ratings("behavior")
+    if not behaviors:
+        raise ValueError(f"No behaviors found in {dictionary}")
+    top_k = max(1, min(int(top_k), len(behaviors)))
+
+    identities: Dict[str, List[float]] = {}
+    for label in {term for pair in pairs for term in pair}:
+        row = index.find(label, "identity")
+        if row is None:
+            raise ValueError(f"Term not found: {label} in {dictionary} component identity")
+        identities[label] = [float(v) for v in index.epa[row]]
+
+    os.makedirs(TABLE_DIR, exist_ok=True)
+    path = _table_path("behaviors", dictionary, equation_key, equation_gender)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+
+    values = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=np.dtype([("behavior", "<i4"), ("deflection", "<f4")]),
+        shape=(len(pairs), top_k)
+    )
+    nb = len(behaviors)
+    step = max(1, RANKING_CHUNK_ROWS // nb)
+    for start in range(0, len(pairs), step):
+        chunk = pairs[start:start + step]
+        actors = np.array([identities[a] for a, _ in chunk])
+        objects = np.array([identities[o] for _, o in chunk])
+        fundamentals = np.hstack((
+            np.repeat(actors, nb, axis=0),
+            np.tile(behavior_epa, (len(chunk), 1)),
+            np.repeat(objects, nb, axis=0)
+        ))
+        totals = act_native.deflection(fundamentals, act_native.apply_equation(fundamentals, equation))
+        totals = totals.reshape(len(chunk), nb)
+        best = np.argpartition(totals, top_k - 1, axis=1)[:, :top_k]
+        order = np.argsort(np.take_along_axis(totals, best, axis=1), axis=1, kind="stable")
+        best = np.take_along_axis(best, order, axis=1)
+        values["behavior"][start:start + len(chunk)] = best
+        values["deflection"][start:start + len(chunk)] = np.take_along_axis(totals, best, axis=1)
+    values.flush()
+    del values
+    os.replace(tmp_path, f"{path}.npy")
+
+    with open(f"{path}.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "dictionary": dictionary,
+            "equation_key": equation_key,
+            "equation_gender": equation_gender,
+            "equation_hash": equation.hash,
+            "catalog_version": act_index.catalog_version(),
+            "table_version": TABLE_VERSION,
+            "top_k": top_k,
+            "pairs": [list(pair) for pair in pairs],
+            "identities": identities,
+            "behaviors": behaviors,
+            "behavior_epa": behavior_epa.tolist()
+        }, f)
+
+    with _lock:
+        _tables.pop(("behaviors", dictionary, equation_key, equation_gender), None)
+    return f"{path}.npy"
+
+
+def behavior_ranking(
+    dictionary: str,
+    equation_key: str = act_equations.DEFAULT_EQUATION_KEY,
+    equation_gender: str = act_equations.DEFAULT_EQUATION_GENDER
+) -> Optional[BehaviorRanking]:
+    """Memory-mapped rankings if built for the current equation set and dictionaries, else None."""
+    cache_key = ("behaviors", dictionary, equation_key, equation_gender)
+    with _lock:
+        if cache_key in _tables:
+            return _tables[cache_key]
+
+    table = None
+    path = _table_path("behaviors", dictionary, equation_key, equation_gender)
+    if os.path.exists(f"{path}.npy") and os.path.exists(f"{path}.json"):
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        try:
+            current = act_equations.get_equation(equation_key, equation_gender, "impressionabo").hash
+        except (ValueError, RuntimeError):
+            current = None
+        version = act_index.available_catalog_version()
+        # Rankings built from other coefficients or other ratings are stale
+        if meta.get("table_version") == TABLE_VERSION and (
+            current is None or meta.get("equation_hash") == current
+        ) and (version is None or meta.get("catalog_version") == version):
+            table = BehaviorRanking(np.load(f"{path}.npy", mmap_mode="r"), meta)
+
+    with _lock:
+        _tables[cache_key] = table
+    return table
+
+
+def ranked_behaviors(
+    actor: str,
+    object_: str,
+    dictionary: str,
+    top_k: int = 10,
+    equation_key: str = act_equations.DEFAULT_EQUATION_KEY,
+    equation_gender: str = act_equations.DEFAULT_EQUATION_GENDER
+) -> Optional[Dict[str, Any]]:
+    """
+    rank_behaviors result for a labelled pair from the stored rankings, or
+    None if the pair (or that many behaviors) is not in the table.
+    """
+    table = behavior_ranking(dictionary, equation_key, equation_gender)
+    if table is None or top_k > table.k:
+        return None
+    ranked = table.get(actor, object_)
+    if ranked is None:
+        return None
+    equation = act_equations.get_equation(equation_key, equation_gender, "impressionabo")
+
+    actor_epa = table.identities[actor.lower()]
+    object_epa = table.identities[object_.lower()]
+    rows = [int(r) for r in ranked["behavior"][:max(0, top_k)]]
+    fundamentals = np.hstack((
+        np.tile(actor_epa, (len(rows), 1)),
+        table.behavior_epa[rows].reshape(len(rows), 3),
+        np.tile(object_epa, (len(rows), 1))
+    ))
+    transients = act_native.apply_equation(fundamentals, equation) if rows else np.zeros((0, 9))
+    totals = act_native.deflection(fundamentals, transients) if rows else np.zeros(0)
+
+    def rounded(values) -> List[float]:
+        return [round(float(v), 3) for v in values]
+
+    return {
+        "actor": actor_epa,
+        "object": object_epa,
+        "dictionary": dictionary,
+        "evaluated": len(table.behaviors),
+        "behaviors": [
+            {
+                "term": table.behaviors[row],
+                "epa": rounded(fundamentals[i, 3:6]),
+                "deflection": round(float(totals[i]), 4),
+                "transient": {
+                    "actor": rounded(transients[i, 0:3]),
+                    "behavior": rounded(transients[i, 3:6]),
+                    "object": rounded(transients[i, 6:9])
+                }
+            }
+            for i, row in enumerate(rows)
+        ],
+        "meta": {"equation_key": equation_key, "equation_gender": equation_gender},
+        "source": "table"
+    }
+
+
+def _read_pairs(roster: Optional[str], pairs: Optional[str]) -> List[Tuple[str, str]]:
+    """Identity pairs from a roster (every ordered pair) and/or a JSON list of [actor, object]."""
+    result: List[Tuple[str, str]] = []
+    if roster:
+        with open(roster, "r", encoding="utf-8") as f:
+            names = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        result.extend((a, o) for a in names for o in names)
+    if pairs:
+        with open(pairs, "r", encoding="utf-8") as f:
+            result.extend((str(a), str(o)) for a, o in json.load(f))
+    # Keep the first occurrence of each pair
+    return list(dict.fromkeys(result))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build precomputed ACT lookup tables.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    amalgamations = sub.add_parser("amalgamations", help="modifier x identity amalgamation table")
+    amalgamations.add_argument("--dictionary", required=True)
+    amalgamations.add_argument("--equation-key", default=act_equations.DEFAULT_EQUATION_KEY)
+    amalgamations.add_argument("--equation-gender", default=act_equations.DEFAULT_EQUATION_GENDER)
+
+    behaviors = sub.add_parser("behaviors", help="top-k behaviors by deflection for identity pairs")
+    behaviors.add_argument("--dictionary", required=True)
+    behaviors.add_argument("--roster", help="file with one identity per line; every ordered pair is ranked")
+    behaviors.add_argument("--pairs", help="JSON file with a list of [actor, object] identity pairs")
+    behaviors.add_argument("--top-k", type=int, default=20)
+    behaviors.add_argument("--equation-key", default=act_equations.DEFAULT_EQUATION_KEY)
+    behaviors.add_argument("--equation-gender", default=act_equations.DEFAULT_EQUATION_GENDER)
+
+    args = parser.parse_args(argv)
+    if args.command == "amalgamations":
+        path = build_amalgamations(args.dictionary, args.equation_key, args.equation_gender)
+        sys.stderr.write(f"Wrote {path}\n")
+    elif args.command == "behaviors":
+        pairs = _read_pairs(args.roster, args.pairs)
+        if not pairs:
+            parser.error("--roster or --pairs with at least one pair is required")
+        path = build_behavior_rankings(args.dictionary, pairs, args.top_k, args.equation_key, args.equation_gender)
+        sys.stderr.write(f"Wrote {path} ({len(pairs)} pairs)\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
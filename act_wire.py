@@ -0,0 +1,118 @@
+import json
+import struct
+import sys
+from array import array
+from typing import Any, List, Optional, Tuple
+
+# Binary framing for the Python <-> R channel (see read_input() and
+# write_output() in r/act_common.R):
+#
+#   b"ACTB" | uint32 LE header length | header JSON | float64 LE blobs
+#
+# The header is {"blobs": [[offset, count], ...], "data": payload}. Numeric
+# arrays with at least MIN_PACK values are moved out of the JSON into the
+# blob section as packed doubles and referenced as {"$blob": i, "shape": s}
+# (row-major for 2-D arrays).
+
+MAGIC = b"ACTB"
+MIN_PACK = 16
+
+
+def is_frame(data: bytes) -> bool:
+    return data[:4] == MAGIC
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _numeric_shape(value: Any) -> Optional[Tuple[int, ...]]:
+    """Shape of a 1-D or rectangular 2-D list of numbers, else None."""
+    if hasattr(value, "shape") and hasattr(value, "dtype") and value.dtype.kind in "iuf":
+        return tuple(value.shape) if value.ndim in (1, 2) else None
+    if not isinstance(value, (list, tuple)) or not value:
+        return None
+    if all(_is_number(v) for v in value):
+        return (len(value),)
+    if all(isinstance(v, (list, tuple)) for v in value):
+        width = len(value[0])
+        if width and all(len(v) == width and all(_is_number(x) for x in v) for v in value):
+            return (len(value), width)
+    return None
+
+
+def _flatten(value: Any, shape: Tuple[int, ...]) -> array:
+    if hasattr(value, "dtype"):
+        return array("d", value.astype("float64").ravel().tolist())
+    if len(shape) == 1:
+        return array("d", value)
+    return array("d", (x for row in value for x in row))
+
+
+def encode_frame(payload: Any, min_pack: int = MIN_PACK) -> bytes:
+    """Encode a JSON-compatible payload, packing large numeric arrays."""
+    blobs: List[array] = []
+
+    def pack(value: Any) -> Any:
+        shape = _numeric_shape(value)
+        if shape is not None and _count(shape) >= min_pack:
+            blobs.append(_flatten(value, shape))
+            return {"$blob": len(blobs) - 1, "shape": list(shape)}
+        if isinstance(value, dict):
+            return {k: pack(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [pack(v) for v in value]
+        return value
+
+    data = pack(payload)
+    offsets, offset = [], 0
+    for blob in blobs:
+        offsets.append([offset, len(blob)])
+        offset += len(blob)
+
+    header = json.dumps({"blobs": offsets, "data": data}).encode("utf-8")
+    body = array("d")
+    for blob in blobs:
+        body.extend(blob)
+    if sys.byteorder != "little":
+        body.byteswap()
+    return MAGIC + struct.pack("<I", len(header)) + header + body.tobytes()
+
+
+def _count(shape: Tuple[int, ...]) -> int:
+    count = 1
+    for dim in shape:
+        count *= dim
+    return count
+
+
+def decode_frame(data: bytes) -> Any:
+    """Decode a frame produced by encode_frame() or write_output() in R."""
+    if not is_frame(data):
+        raise ValueError("Not an ACTB frame")
+    (header_length,) = struct.unpack_from("<I", data, 4)
+    header = json.loads(data[8:8 + header_length].decode("utf-8"))
+
+    values = array("d")
+    values.frombytes(data[8 + header_length:])
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    blobs = header.get("blobs") or []
+
+    def unpack(value: Any) -> Any:
+        if isinstance(value, dict):
+            if "$blob" in value:
+                offset, count = blobs[int(value["$blob"])]
+                flat = values[int(offset):int(offset) + int(count)].tolist()
+                shape = value["shape"] if isinstance(value["shape"], list) else [value["shape"]]
+                if len(shape) == 2:
+                    rows, cols = int(shape[0]), int(shape[1])
+                    return [flat[r * cols:(r + 1) * cols] for r in range(rows)]
+                return flat
+            return {k: unpack(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [unpack(v) for v in value]
+        return value
+
+    return unpack(header.get("data"))
@@ -1,10 +1,69 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Request, Response, g, has_request_context, jsonify, make_response, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
 import os
+import gzip
 import json
+import zlib
+import hashlib
+import functools
 import subprocess
 from typing import Dict, List, Optional, Any, Union
 
+try:
+    import msgpack
+except ImportError:  # MessagePack is optional; the API then speaks JSON only
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip and deflate are always offered
+    brotli = None
+
+# --- Content Negotiation ---
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, "application/x-msgpack")
+
+def _wants_msgpack() -> bool:
+    """MessagePack responses are requested via the Accept header."""
+    if msgpack is None or not has_request_context():
+        return False
+    best = request.accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES)
+    return best in MSGPACK_MIMETYPES
+
+class ActRequest(Request):
+    """Request that also decodes MessagePack bodies for request.json."""
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if self.mimetype not in MSGPACK_MIMETYPES:
+            return super().get_json(force=force, silent=silent, cache=cache)
+        if msgpack is None:
+            raise UnsupportedMediaType("MessagePack support is not installed on this server")
+        try:
+            return msgpack.unpackb(self.get_data(cache=cache), raw=False)
+        except Exception as e:
+            if silent:
+                return None
+            raise BadRequest(f"Failed to decode MessagePack body: {e}")
+
+class ActJSONProvider(DefaultJSONProvider):
+    """jsonify() that answers in MessagePack when the client prefers it."""
+
+    def response(self, *args, **kwargs) -> Response:
+        if _wants_msgpack():
+            obj = self._prepare_response_obj(args, kwargs)
+            body = msgpack.packb(obj, default=self.default, use_bin_type=True)
+            response = self._app.response_class(body, mimetype=MSGPACK_MIMETYPE)
+        else:
+            response = super().response(*args, **kwargs)
+        response.vary.add("Accept")
+        return response
+
 app = Flask(__name__)
+app.request_class = ActRequest
+app.json = ActJSONProvider(app)
 
 # Configuration
 R_SCRIPT_DIR = os.path.join(os.path.dirname(__file__), 'r')
@@ -23,8 +82,43 @@ from act_core import (
     compute_transients,
     compute_emotions,
     compute_reidentify,
-    find_closest_term
+    find_closest_term,
+    rank_behaviors,
+    optimize_and_label,
+    reidentify_and_label,
+    list_equation_sets,
+    lookup_epa_batch,
+    compute_transients_batch,
+    simulate_trajectory,
+    plan_conversation,
+    compare_terms,
+    compute_emotions_batch,
+    reidentify_batch,
+    modify_identity_batch,
+    compute_optimal_behavior_batch,
+    run_pipeline
 )
+import act_backends
+import act_batch
+import act_cache
+import act_core
+import act_equations
+import act_index
+import act_jobs
+import act_memory
+import act_rworker
+import act_singleflight
+
+# Load the memory-mapped dictionary index and cached equations at import
+# time, so with `gunicorn --preload` the master maps them once and every
+# forked worker shares the pages. Never runs R.
+if os.environ.get("ACT_PRELOAD", "1").lower() not in ("0", "false", "no"):
+    act_index.preload()
+    if act_equations.EQUATIONS_CACHE_FILE and os.path.exists(act_equations.EQUATIONS_CACHE_FILE):
+        try:
+            act_equations.load_equations()
+        except Exception:
+            pass
 
 # Note: _run_r_script is internal to act_core now, but if needed locally it can be imported.
 # It seems app.py endpoints don't call it directly except in api_dictionaries which duplicates logic.
@@ -35,9 +129,158 @@ from act_core import (
 
 
 
+# --- Streaming Helpers ---
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+def _wants_stream() -> bool:
+    """Streaming is requested via ?stream=1 or an NDJSON Accept header."""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+def _ndjson_response(records) -> Response:
+    """
+    Stream records as newline-delimited JSON. The generator is only advanced
+    when the server is ready to write, so computation follows the client's
+    read pace. A failure mid-stream is reported as a final error record.
+    """
+    def generate():
+        try:
+            for record in records:
+                yield json.dumps(record) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+# --- Compute Backend Selection ---
+
+BACKEND_HEADER = "X-ACT-Backend"
+
+@app.before_request
+def _select_backend():
+    """
+    Run this request's computations on the backend named by the
+    X-ACT-Backend header or ?backend= (see act_backends.py).
+    """
+    name = request.headers.get(BACKEND_HEADER) or request.args.get('backend')
+    if not name:
+        return None
+    try:
+        g.backend_token = act_backends.select(name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.teardown_request
+def _reset_backend(exc):
+    token = g.pop("backend_token", None)
+    if token is not None:
+        act_backends.reset(token)
+
+
+# --- Conditional Requests and Compression ---
+
+CATALOG_MAX_AGE = int(os.environ.get("ACT_CATALOG_MAX_AGE", "300"))
+COMPRESS_MIN_SIZE = int(os.environ.get("ACT_COMPRESS_MIN_SIZE", "500"))
+COMPRESS_LEVEL = int(os.environ.get("ACT_COMPRESS_LEVEL", "6"))
+
+@functools.lru_cache(maxsize=1)
+def _route_set() -> str:
+    """Digest of the registered routes, so a deploy that changes them changes the ETags."""
+    rules = sorted(f"{rule.rule} {','.join(sorted(rule.methods or ()))}" for rule in app.url_map.iter_rules())
+    return hashlib.sha256("\n".join(rules).encode("utf-8")).hexdigest()
+
+def _catalog_etag() -> Optional[str]:
+    """
+    ETag for a read-only view whose body depends only on the dictionary
+    catalog, the routes (the index lists them) and the request: catalog
+    version, route set, path, query and negotiated representation. None
+    when the catalog version is not known without R.
+    """
+    version = act_index.available_catalog_version()
+    if version is None:
+        return None
+    parts = [
+        version,
+        _route_set(),
+        request.path,
+        request.query_string.decode("utf-8", errors="replace"),
+        MSGPACK_MIMETYPE if _wants_msgpack() else JSON_MIMETYPE,
+        NDJSON_MIMETYPE if _wants_stream() else ""
+    ]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:32]
+
+def _catalog_cached(view):
+    """
+    Conditional GET for catalog views: a matching If-None-Match is answered
+    with 304 before the view (and R) runs; fresh responses carry the ETag
+    and a public Cache-Control lifetime.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = _catalog_etag()
+        if etag is not None and request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        if etag is not None:
+            response.set_etag(etag, weak=True)
+        response.cache_control.public = True
+        response.cache_control.max_age = CATALOG_MAX_AGE
+        response.vary.add("Accept")
+        return response
+    return wrapper
+
+def _encode_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=min(COMPRESS_LEVEL, 11))
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+    return zlib.compress(body, COMPRESS_LEVEL)
+
+@app.after_request
+def _conditional_and_compress(response: Response) -> Response:
+    """
+    Give buffered GET responses a content ETag (so unchanged bodies are
+    answered with 304), then compress bodies per Accept-Encoding.
+    Streamed responses pass through untouched.
+    """
+    if response.is_streamed or response.direct_passthrough:
+        return response
+
+    if request.method in ("GET", "HEAD") and response.status_code == 200:
+        if response.get_etag()[0] is None:
+            response.set_etag(hashlib.sha256(response.get_data()).hexdigest()[:32], weak=True)
+        response.make_conditional(request)
+
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if "Content-Encoding" in response.headers:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    offered = (("br",) if brotli is not None else ()) + ("gzip", "deflate")
+    encoding = request.accept_encodings.best_match(offered)
+    if encoding is None:
+        return response
+
+    response.set_data(_encode_body(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
 # --- Flask Endpoints ---
 
 @app.route('/', methods=['GET'])
+@_catalog_cached
 def index():
     return jsonify({
         "status": "running", 
@@ -45,8 +288,12 @@ def index():
         "endpoints": {
             "GET /health": "Service health status",
             "GET /r-check": "R environment and package verification",
+            "GET /admin/memory": "Per-worker memory usage and shared pages",
+            "GET /admin/cache": "Result cache and in-flight deduplication counters",
+            "GET /admin/r-workers": "Persistent R worker state, limits and recent restarts",
+            "GET /admin/backends": "Compute backends, their availability and the default",
             "GET /act/dictionaries": "List available ACT dictionaries",
-            "GET /act/labels": "Search for terms in a dictionary (params: dictionary, search)",
+            "GET /act/labels": "Search for terms in a dictionary (params: dictionary, search, limit, offset; streamable)",
             "POST /act/lookup": "Resolve EPA values for a term",
             "POST /act/init": "Initialize conversation state",
             "POST /act/step": "Execute simulation step",
@@ -56,7 +303,27 @@ def index():
             "POST /act/transients": "Calculate transient impressions after an event",
             "POST /act/emotions": "Predict emotional response",
             "POST /act/reidentify": "Calculate reidentified EPA to reduce deflection",
-            "POST /act/closest": "Find closest dictionary term to an EPA vector"
+            "POST /act/closest": "Find closest dictionary term to an EPA vector",
+            "POST /act/rank-behaviors": "Rank dictionary behaviors for an actor/object pair by deflection",
+            "POST /act/optimize-label": "Calculate optimal behavior and its closest dictionary behaviors",
+            "POST /act/reidentify-label": "Calculate reidentified EPA and its closest dictionary identities",
+            "GET /act/equations": "List cached impression-formation equation sets with content hashes",
+            "GET /act/equations/<key>/<gender>": "Coefficient table of one equation set (param: type)",
+            "POST /act/lookup/batch": "Resolve EPA values for many terms (streamable)",
+            "POST /act/transients/batch": "Transient impressions and deflection for many events (streamable)",
+            "POST /act/trajectory": "Execute a sequence of simulation steps (streamable)",
+            "POST /act/plan": "Plan behavior sequences minimizing cumulative deflection (beam search)",
+            "POST /act/jobs": "Submit a long-running operation as a background job",
+            "GET /act/jobs": "List background jobs",
+            "GET /act/jobs/<job_id>": "Status and progress of a background job",
+            "GET /act/jobs/<job_id>/result": "Result of a finished background job (streamable)",
+            "DELETE /act/jobs/<job_id>": "Cancel a background job",
+            "POST /act/compare": "Compare EPA ratings of terms across dictionaries",
+            "POST /act/emotions/batch": "Predict emotions for many events, optionally labelled (streamable)",
+            "POST /act/reidentify/batch": "Reidentify actor or object for many events with nearest identities (streamable)",
+            "POST /act/modify/batch": "Modified identities for many modifier/identity pairs (streamable)",
+            "POST /act/optimize/batch": "Optimal behaviors for many actor/object pairs with nearest behaviors (streamable)",
+            "POST /act/pipeline": "Run several operations in one request, passing outputs between steps"
         }
     }), 200
 
@@ -64,6 +331,38 @@ def index():
 def health():
     return jsonify({"status": "healthy", "service": "act-r-runtime"}), 200
 
+@app.route('/admin/memory', methods=['GET'])
+def admin_memory():
+    """Per-worker RSS, PSS and shared pages, including the mapped dictionary arrays."""
+    try:
+        return jsonify(act_memory.report()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/r-workers', methods=['GET'])
+def admin_r_workers():
+    """Persistent R worker slots, their RSS, call counts and age, and recent exits."""
+    try:
+        return jsonify(dict(act_rworker.status(), mode=act_core.R_MODE)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/backends', methods=['GET'])
+def admin_backends():
+    """Default and per-request compute backends and which of them are available."""
+    try:
+        return jsonify(dict(act_backends.status(), selected=act_backends.current())), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/cache', methods=['GET'])
+def admin_cache():
+    """Result cache hits per tier and single-flight deduplication counters."""
+    try:
+        return jsonify({"cache": act_cache.stats(), "singleflight": act_singleflight.stats()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/r-check', methods=['GET'])
 def r_check():
     try:
@@ -136,6 +435,7 @@ def r_check():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/act/dictionaries', methods=['GET'])
+@_catalog_cached
 def api_dictionaries():
     """List available ACT dictionaries."""
     try:
@@ -212,15 +512,21 @@ def api_step():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/act/labels', methods=['GET'])
+@_catalog_cached
 def api_labels():
     dictionary = request.args.get('dictionary')
     search = request.args.get('search')
+    limit = request.args.get('limit', 100, type=int)
+    offset = request.args.get('offset', 0, type=int)
     
     if not dictionary:
         return jsonify({"error": "Missing 'dictionary' parameter"}), 400
+
+    if _wants_stream():
+        return _ndjson_response(act_batch.iter_labels(dictionary, search))
         
     try:
-        result = search_labels(dictionary, search)
+        result = search_labels(dictionary, search, limit, offset)
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -346,6 +652,375 @@ def api_closest():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/act/rank-behaviors', methods=['POST'])
+def api_rank_behaviors():
+    data = request.json
+    actor = data.get('actor')
+    object_ = data.get('object')
+    dictionary = data.get('dictionary', 'us_2015')
+    top_k = data.get('top_k', 10)
+    search = data.get('search')
+    group = data.get('group')
+    equation_key = data.get('equation_key', 'us2010')
+    equation_gender = data.get('equation_gender', 'average')
+
+    if not actor or not object_:
+        return jsonify({"error": "Missing 'actor' or 'object'"}), 400
+
+    try:
+        result = rank_behaviors(
+            actor, object_, dictionary, top_k, search, group,
+            equation_key, equation_gender
+        )
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/optimize-label', methods=['POST'])
+def api_optimize_label():
+    data = request.json
+    actor = data.get('actor')
+    object_ = data.get('object')
+    dictionary = data.get('dictionary', 'us_2015')
+    n = data.get('n', 5)
+    equation_key = data.get('equation_key', 'us2010')
+    equation_gender = data.get('equation_gender', 'average')
+
+    if not actor or not object_:
+        return jsonify({"error": "Missing 'actor' or 'object'"}), 400
+
+    try:
+        result = optimize_and_label(actor, object_, dictionary, n, equation_key, equation_gender)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/reidentify-label', methods=['POST'])
+def api_reidentify_label():
+    data = request.json
+    actor = data.get('actor')
+    behavior = data.get('behavior')
+    obj = data.get('object')
+    element = data.get('element', 'actor')
+    dictionary = data.get('dictionary', 'us_2015')
+    n = data.get('n', 5)
+    equation_key = data.get('equation_key', 'us2010')
+    equation_gender = data.get('equation_gender', 'average')
+
+    if not actor or not behavior or not obj:
+        return jsonify({"error": "Missing 'actor', 'behavior', or 'object'"}), 400
+
+    try:
+        result = reidentify_and_label(
+            actor, behavior, obj, element, dictionary, n,
+            equation_key, equation_gender
+        )
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/equations', methods=['GET'])
+def api_equations():
+    try:
+        result = list_equation_sets()
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/equations/<key>/<gender>', methods=['GET'])
+def api_equation(key, gender):
+    type_ = request.args.get('type', 'impressionabo')
+
+    try:
+        eq = act_equations.get_equation(key, gender, type_)
+        return jsonify(eq.to_dict())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/lookup/batch', methods=['POST'])
+def api_lookup_batch():
+    data = request.json
+    labels = data.get('labels')
+    type_ = data.get('type')
+    dictionary = data.get('dictionary', 'us_2015')
+
+    if not labels or not type_:
+        return jsonify({"error": "Missing 'labels' or 'type'"}), 400
+
+    if _wants_stream():
+        return _ndjson_response(act_batch.iter_lookup_epa(labels, type_, dictionary))
+
+    try:
+        result = lookup_epa_batch(labels, type_, dictionary)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/transients/batch', methods=['POST'])
+def api_transients_batch():
+    data = request.json
+    events = data.get('events')
+    equation_key = data.get('equation_key', 'us2010')
+    equation_gender = data.get('equation_gender', 'average')
+
+    if not events:
+        return jsonify({"error": "Missing 'events'"}), 400
+
+    if _wants_stream():
+        return _ndjson_response(act_batch.iter_transients(events, equation_key, equation_gender))
+
+    try:
+        result = compute_transients_batch(events, equation_key, equation_gender)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/trajectory', methods=['POST'])
+def api_trajectory():
+    data = request.json
+    state = data.get('state')
+    behaviors = data.get('behaviors')
+
+    if not state or not behaviors:
+        return jsonify({"error": "Missing 'state' or 'behaviors'"}), 400
+
+    if _wants_stream():
+        return _ndjson_response(act_batch.iter_trajectory(state, behaviors))
+
+    try:
+        result = simulate_trajectory(state, behaviors)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/plan', methods=['POST'])
+def api_plan():
+    data = request.json
+    state = data.get('state')
+
+    if not state:
+        if not data.get('actor') or not data.get('object'):
+            return jsonify({"error": "Missing 'state' or 'actor' and 'object'"}), 400
+
+    try:
+        if not state:
+            state = init_conversation(data['actor'], data['object'], data.get('dictionary', 'us_2015'))
+        result = plan_conversation(
+            state,
+            horizon=data.get('horizon', 3),
+            beam_width=data.get('beam_width', 20),
+            time_budget=data.get('time_budget', 5.0),
+            n_plans=data.get('n_plans', 3),
+            start_with=data.get('start_with', 'actor'),
+            behaviors=data.get('behaviors'),
+            equation_key=data.get('equation_key', 'us2010'),
+            equation_gender=data.get('equation_gender', 'average'),
+            carryover=bool(data.get('carryover', True))
+        )
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/jobs', methods=['POST'])
+def api_submit_job():
+    data = request.json
+    operation = data.get('operation')
+    arguments = data.get('arguments', {})
+
+    if not operation:
+        return jsonify({"error": "Missing 'operation'"}), 400
+
+    try:
+        result = act_jobs.submit(operation, arguments)
+        return jsonify(result), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/jobs', methods=['GET'])
+def api_list_jobs():
+    try:
+        return jsonify({"jobs": act_jobs.list_jobs()})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    try:
+        return jsonify(act_jobs.status(job_id))
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/jobs/<job_id>/result', methods=['GET'])
+def api_job_result(job_id):
+    try:
+        status = act_jobs.status(job_id)
+        if status["status"] != "succeeded":
+            return jsonify({"error": f"Job is {status['status']}", "status": status}), 409
+        if _wants_stream():
+            return _ndjson_response(act_jobs.iter_result(job_id))
+        return jsonify(act_jobs.result(job_id))
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/jobs/<job_id>', methods=['DELETE'])
+def api_cancel_job(job_id):
+    try:
+        return jsonify(act_jobs.cancel(job_id))
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/compare', methods=['POST'])
+def api_compare():
+    data = request.json
+    terms = data.get('terms') or ([data['term']] if data.get('term') else None)
+    component = data.get('type', 'identity')
+    dictionaries = data.get('dictionaries')
+    group = data.get('group')
+    distances = bool(data.get('distances', False))
+
+    if not terms:
+        return jsonify({"error": "Missing 'terms'"}), 400
+
+    try:
+        result = compare_terms(terms, component, dictionaries, group, distances)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/emotions/batch', methods=['POST'])
+def api_emotions_batch():
+    data = request.json
+    events = data.get('events')
+    dictionary = data.get('dictionary')
+    label_component = data.get('label_type', 'modifier')
+    n = data.get('n', 1)
+
+    if not events:
+        return jsonify({"error": "Missing 'events'"}), 400
+
+    if _wants_stream():
+        return _ndjson_response(act_batch.iter_emotions(events, dictionary, label_component, n))
+
+    try:
+        result = compute_emotions_batch(events, dictionary, label_component, n)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/reidentify/batch', methods=['POST'])
+def api_reidentify_batch():
+    data = request.json
+    events = data.get('events')
+    element = data.get('element', 'actor')
+    dictionary = data.get('dictionary')
+    n = data.get('n', 5)
+    equation_key = data.get('equation_key', 'us2010')
+    equation_gender = data.get('equation_gender', 'average')
+
+    if not events:
+        return jsonify({"error": "Missing 'events'"}), 400
+
+    if _wants_stream():
+        return _ndjson_response(act_batch.iter_reidentify(
+            events, element, dictionary, n, equation_key, equation_gender
+        ))
+
+    try:
+        result = reidentify_batch(events, element, dictionary, n, equation_key, equation_gender)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/modify/batch', methods=['POST'])
+def api_modify_batch():
+    data = request.json
+    pairs = data.get('pairs')
+    dictionary = data.get('dictionary')
+    equation_key = data.get('equation_key', 'us2010')
+    equation_gender = data.get('equation_gender', 'average')
+
+    if not pairs:
+        return jsonify({"error": "Missing 'pairs'"}), 400
+
+    if _wants_stream():
+        return _ndjson_response(act_batch.iter_modify(pairs, dictionary, equation_key, equation_gender))
+
+    try:
+        result = modify_identity_batch(pairs, dictionary, equation_key, equation_gender)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/optimize/batch', methods=['POST'])
+def api_optimize_batch():
+    data = request.json
+    pairs = data.get('pairs')
+    dictionary = data.get('dictionary')
+    n = data.get('n', 5)
+    equation_key = data.get('equation_key', 'us2010')
+    equation_gender = data.get('equation_gender', 'average')
+
+    if not pairs:
+        return jsonify({"error": "Missing 'pairs'"}), 400
+
+    if _wants_stream():
+        return _ndjson_response(act_batch.iter_optimal_behavior(
+            pairs, dictionary, n, equation_key, equation_gender
+        ))
+
+    try:
+        result = compute_optimal_behavior_batch(pairs, dictionary, n, equation_key, equation_gender)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/act/pipeline', methods=['POST'])
+def api_pipeline():
+    data = request.json
+    steps = data.get('steps')
+    stop_on_error = bool(data.get('stop_on_error', True))
+
+    if not steps:
+        return jsonify({"error": "Missing 'steps'"}), 400
+
+    try:
+        result = run_pipeline(steps, stop_on_error)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
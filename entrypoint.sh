@@ -4,10 +4,18 @@ set -e
 # Default to REST if not set
 MODE=${RUN_MODE:-REST}
 
-if [ "$MODE" = "MCP" ]; then
+if [ "$MODE" = "UNIFIED" ]; then
+    echo "Starting unified server (REST on /, MCP SSE on /mcp)..."
+    # One process so REST and MCP share caches, indexes and R workers
+    exec python3 server.py
+elif [ "$MODE" = "MCP" ]; then
     echo "Starting MCP Server (SSE transport)..."
     exec python3 mcp_server.py
 else
     echo "Starting REST API (Gunicorn)..."
-    exec gunicorn --bind 0.0.0.0:5000 --timeout 120 --log-level debug app:app
+    # --preload maps the dictionary arrays in the master so forked workers
+    # share the pages; the worker count follows WEB_CONCURRENCY. Identical
+    # requests in different workers coalesce through the shared cache's
+    # leases (act_cache.py)
+    exec gunicorn --bind 0.0.0.0:5000 --timeout 120 --log-level debug --preload app:app
 fi
@@ -19,11 +19,12 @@ def create_mcp_wrapper(func):
     # We must preserve the signature for FastMCP inspection, 
     # but the return type will always be the normalized dict.
     @functools.wraps(func)
-    def wrapper(*args, **kwargs) -> Dict[str, Any]:
+    async def wrapper(*args, **kwargs) -> Dict[str, Any]:
         try:
-            # Call the synchronous act_core function
-            # Note: FastMCP supports async, but act_core is sync.
-            result = func(*args, **kwargs)
+            # act_core is synchronous and may wait on R for seconds; run it in
+            # a worker thread so the event loop (shared with the REST API in
+            # server.py) keeps serving other requests meanwhile.
+            result = await asyncio.to_thread(func, *args, **kwargs)
             
             return {
                 "ok": True,
@@ -84,9 +85,50 @@ def register_act_tools():
         
     sys.stderr.write(f"Registered {count} tools from act_core.\n")
 
+def register_dictionary_resources():
+    """
+    Exposes dictionaries and their terms as read-only MCP resources, served
+    from the in-memory dictionary index (see act_resources.py).
+    """
+    import act_resources
+
+    @mcp.resource(
+        act_resources.URI_PREFIX,
+        name="dictionaries",
+        description="All ACT dictionaries with term counts and resource URIs.",
+        mime_type="application/json"
+    )
+    def dictionaries() -> str:
+        return act_resources.dictionaries()
+
+    @mcp.resource(
+        act_resources.URI_PREFIX + "/{dictionary}",
+        name="dictionary",
+        description="Components, rater groups, term counts and first term page of one dictionary.",
+        mime_type="application/json"
+    )
+    def dictionary(dictionary: str) -> str:
+        return act_resources.dictionary(dictionary)
+
+    @mcp.resource(
+        act_resources.URI_PREFIX + "/{dictionary}/{component}/{page}",
+        name="dictionary_terms",
+        description=(
+            "One page (from 1) of a dictionary's identity, behavior, modifier or setting terms "
+            "with EPA ratings, sorted alphabetically; 'next' links the following page. "
+            "Contents only change with 'catalog_version'."
+        ),
+        mime_type="application/json"
+    )
+    def dictionary_terms(dictionary: str, component: str, page: str) -> str:
+        return act_resources.terms_page(dictionary, component, page)
+
+    sys.stderr.write("Registered dictionary resources.\n")
+
 # Register tools immediately so they are available when importing 'mcp' for uvicorn
 try:
     register_act_tools()
+    register_dictionary_resources()
 except Exception as e:
     sys.stderr.write(f"Critical error registering tools: {e}\n")
     # We don't exit here to avoid breaking imports if something minor fails,
@@ -0,0 +1,32 @@
+import os
+import sys
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+# Unified server (RUN_MODE=UNIFIED): the REST API and the MCP SSE transport
+# in one process, so both share the result cache, the dictionary index and
+# store, the cached equations and the R worker pool instead of warming up
+# two copies of each. MCP is mounted under ACT_MCP_PATH (default /mcp:
+# GET /mcp/sse, POST /mcp/messages/); everything else goes to Flask.
+
+from app import app as flask_app
+from mcp_server import mcp
+
+MCP_PATH = "/" + os.environ.get("ACT_MCP_PATH", "/mcp").strip("/")
+HOST = os.environ.get("ACT_HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", "5000"))
+
+
+app = Starlette(routes=[
+    # The SSE transport derives its message URL from the mount's root_path
+    Mount(MCP_PATH, app=mcp.sse_app()),
+    Mount("/", app=WSGIMiddleware(flask_app))
+])
+
+
+if __name__ == "__main__":
+    import uvicorn
+    sys.stderr.write(f"Serving REST on / and MCP (SSE) on {MCP_PATH} at {HOST}:{PORT}\n")
+    uvicorn.run(app, host=HOST, port=PORT)
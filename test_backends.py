@@ -0,0 +1,175 @@
+import sys
+import time
+import numbers
+
+import act_backends
+import act_cache
+import act_core
+import act_jobs
+import act_singleflight
+
+# Conformance tests for the compute backends (act_backends.py). Every
+# backend-dispatched act_core operation, batch operations and background
+# jobs included, runs on each available backend with the fixtures below,
+# and its result must match the reference backend (the first available R
+# backend) within TOLERANCE.
+#
+#   python test_backends.py [--reference rscript] [native pool rpy2 ...]
+#
+# Backends run strict: an operation a backend does not implement is skipped
+# rather than falling back to R.
+
+TOLERANCE = 2e-3
+DICTIONARY = "us_2015"
+# Legacy equation selector of the operations whose dictionary argument names the equation set
+EQUATION = "us2010_average"
+
+DOCTOR = [1.64, 1.6, 0.25]
+PATIENT = [0.45, -0.83, -0.86]
+HELP = [2.24, 1.56, 0.85]
+TEASE = [-0.72, 0.29, 1.1]
+CRUEL = [-2.43, 0.47, 0.61]
+
+FIXTURES = [
+    ("lookup_epa", lambda: act_core.lookup_epa("doctor", "identity", DICTIONARY)),
+    ("lookup_epa (metadata keys)", lambda: sorted(act_core.lookup_epa("doctor", "identity", DICTIONARY)["metadata"])),
+    ("lookup_epa (missing term)", lambda: act_core.lookup_epa("no such term", "identity", DICTIONARY)),
+    ("lookup_epa_batch", lambda: act_core.lookup_epa_batch(["doctor", "patient", "no such term"], "identity", DICTIONARY)),
+    ("search_labels", lambda: act_core.search_labels(DICTIONARY, "doc", 20, 0)),
+    ("find_closest_term", lambda: act_core.find_closest_term(DOCTOR, "identity", DICTIONARY, 5)),
+    ("compute_transient_impressions", lambda: act_core.compute_transient_impressions(
+        act_core.create_event({"epa": DOCTOR}, {"epa": HELP}, {"epa": PATIENT}))),
+    ("compute_deflection", lambda: act_core.compute_deflection(
+        {"actor": DOCTOR, "behavior": HELP, "object": PATIENT},
+        {"actor": [1.2, 1.1, 0.3], "behavior": [1.9, 1.4, 0.6], "object": [0.8, -0.5, -0.7]})),
+    ("compute_transients", lambda: act_core.compute_transients(DOCTOR, TEASE, PATIENT)),
+    ("compute_emotions", lambda: act_core.compute_emotions(DOCTOR, HELP, PATIENT)),
+    ("compute_emotions (invalid)", lambda: act_core.compute_emotions(DOCTOR, [1.0], PATIENT)),
+    ("compute_optimal_behavior", lambda: act_core.compute_optimal_behavior(DOCTOR, PATIENT, EQUATION)),
+    ("compute_modified_identity", lambda: act_core.compute_modified_identity(CRUEL, DOCTOR, EQUATION)),
+    ("compute_reidentify (actor)", lambda: act_core.compute_reidentify(DOCTOR, TEASE, PATIENT, "actor")),
+    ("compute_reidentify (object)", lambda: act_core.compute_reidentify(DOCTOR, TEASE, PATIENT, "object")),
+    ("compute_reidentify (invalid)", lambda: act_core.compute_reidentify(DOCTOR, [1.0], PATIENT, "actor")),
+    ("rank_behaviors", lambda: act_core.rank_behaviors(DOCTOR, PATIENT, DICTIONARY, 10)),
+    ("rank_behaviors (search)", lambda: act_core.rank_behaviors(DOCTOR, PATIENT, DICTIONARY, 5, search="help")),
+    ("compute_transients_batch", lambda: act_core.compute_transients_batch([
+        {"actor": DOCTOR, "behavior": HELP, "object": PATIENT},
+        {"actor": PATIENT, "behavior": TEASE, "object": DOCTOR},
+        {"actor": DOCTOR, "behavior": [1.0], "object": PATIENT}])),
+    ("compute_emotions_batch", lambda: act_core.compute_emotions_batch([
+        {"actor": DOCTOR, "behavior": HELP, "object": PATIENT},
+        {"actor": PATIENT, "behavior": TEASE, "object": DOCTOR}], DICTIONARY, n=3)),
+    ("lookup_epa_batch (job)", lambda: run_job("lookup_epa_batch", {
+        "labels": ["doctor", "patient"], "type": "identity", "dictionary": DICTIONARY})),
+    ("reidentify_batch", lambda: act_core.reidentify_batch([
+        {"actor": DOCTOR, "behavior": TEASE, "object": PATIENT},
+        {"actor": PATIENT, "behavior": HELP, "object": DOCTOR}], "actor", DICTIONARY, 3)),
+    ("modify_identity_batch", lambda: act_core.modify_identity_batch(
+        [{"modifier": CRUEL, "identity": DOCTOR}, {"modifier": CRUEL, "identity": PATIENT}])),
+    ("compute_optimal_behavior_batch", lambda: act_core.compute_optimal_behavior_batch(
+        [{"actor": DOCTOR, "object": PATIENT}, {"actor": PATIENT, "object": DOCTOR}], DICTIONARY, 3)),
+    ("simulate_trajectory", lambda: act_core.simulate_trajectory(
+        act_core.init_conversation("doctor", "patient", DICTIONARY), ["help", "tease"])),
+    ("optimize_and_label", lambda: act_core.optimize_and_label(DOCTOR, PATIENT, DICTIONARY, 5)),
+    ("reidentify_and_label", lambda: act_core.reidentify_and_label(DOCTOR, TEASE, PATIENT, "object", DICTIONARY, 5)),
+]
+
+
+def run_job(operation, arguments):
+    """Result records of a background job, which must run on the selected backend."""
+    job = act_core.submit_job(operation, arguments)
+    while act_core.get_job_status(job["job_id"])["status"] not in act_jobs.FINISHED:
+        time.sleep(0.05)
+    backend = act_core.get_job_status(job["job_id"])["backend"]
+    if backend != act_backends.current():
+        raise RuntimeError(f"job ran on {backend}, not {act_backends.current()}")
+    return act_core.get_job_result(job["job_id"])["results"]
+
+
+def compare(expected, actual, path="result"):
+    """Differences between two results; numbers may differ by TOLERANCE."""
+    if isinstance(expected, bool) or isinstance(expected, str) or expected is None:
+        return [] if expected == actual else [f"{path}: expected {expected!r}, got {actual!r}"]
+    if isinstance(expected, numbers.Number):
+        if not isinstance(actual, numbers.Number) or isinstance(actual, bool):
+            return [f"{path}: expected {expected!r}, got {actual!r}"]
+        return [] if abs(expected - actual) <= TOLERANCE else [f"{path}: expected {expected}, got {actual}"]
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict):
+            return [f"{path}: expected an object, got {actual!r}"]
+        # Error messages may be worded differently; both must fail
+        if "error" in expected:
+            return [] if "error" in actual else [f"{path}: expected an error, got {actual!r}"]
+        diffs = []
+        for key, value in expected.items():
+            if key not in actual:
+                diffs.append(f"{path}.{key}: missing")
+            else:
+                diffs.extend(compare(value, actual[key], f"{path}.{key}"))
+        return diffs
+    if isinstance(expected, list):
+        if not isinstance(actual, list) or len(actual) != len(expected):
+            return [f"{path}: expected {len(expected)} items, got {actual!r}"]
+        return [d for i, (e, a) in enumerate(zip(expected, actual)) for d in compare(e, a, f"{path}[{i}]")]
+    return [] if expected == actual else [f"{path}: expected {expected!r}, got {actual!r}"]
+
+
+def run_fixture(backend, fixture):
+    with act_backends.use(backend, strict=True):
+        return fixture()
+
+
+def main(argv):
+    reference = None
+    if argv[:1] == ["--reference"]:
+        reference, argv = argv[1], argv[2:]
+    candidates = argv or [name for name in act_backends.BACKENDS if name != "auto"]
+
+    # Every call must reach its backend
+    act_cache.ENABLED = False
+    act_singleflight.ENABLED = False
+
+    if reference is None:
+        reference = next((name for name in ("rscript", "pool", "rpy2")
+                          if act_backends.get_backend(name).available()), None)
+    if reference is None:
+        print("SKIP: no R backend available as the reference")
+        return 0
+    print(f"Reference backend: {reference}")
+
+    failures = 0
+    for backend in candidates:
+        if backend == reference:
+            continue
+        if not act_backends.get_backend(backend).available():
+            print(f"\n{backend}: SKIP (not available)")
+            continue
+        print(f"\nTesting backend {backend}...")
+        for name, fixture in FIXTURES:
+            try:
+                expected = run_fixture(reference, fixture)
+            except Exception as e:
+                print(f"  {name}: SKIP (reference failed: {e})")
+                continue
+            try:
+                actual = run_fixture(backend, fixture)
+            except act_backends.UnsupportedOperation as e:
+                print(f"  {name}: SKIP ({e})")
+                continue
+            except Exception as e:
+                actual = {"exception": str(e)}
+            diffs = compare(expected, actual)
+            if diffs:
+                failures += 1
+                print(f"  {name}: FAIL")
+                for diff in diffs[:10]:
+                    print(f"    {diff}")
+            else:
+                print(f"  {name}: PASS")
+
+    print(f"\n{failures} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,176 @@
+import os
+import sys
+import socket
+import tempfile
+
+# The shared tier is configured at import time; use a scratch file and no
+# network tier unless a test sets one up
+_tmp = tempfile.mkdtemp(prefix="act_cache_test_")
+os.environ["ACT_CACHE_DB"] = os.path.join(_tmp, "cache.sqlite")
+os.environ["ACT_CACHE_URL"] = ""
+
+import act_cache
+import act_equations
+import act_index
+
+# Tests for the result cache (act_cache.py): key namespaces, TTL expiry
+# and falling back when the network tier is unreachable. Needs neither R
+# nor a running server.
+#
+#   python test_cache.py
+
+
+class _Versions:
+    """Pins the catalog version and equation hash that namespace() sees."""
+
+    def __init__(self):
+        self.catalog = "catalog-1"
+        self.equations = "equations-1"
+        self._saved = (act_index.available_catalog_version, act_equations.available_catalog_hash)
+
+    def __enter__(self):
+        act_index.available_catalog_version = lambda: self.catalog
+        act_equations.available_catalog_hash = lambda: self.equations
+        return self
+
+    def __exit__(self, *exc):
+        act_index.available_catalog_version, act_equations.available_catalog_hash = self._saved
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _reset(network=None) -> None:
+    act_cache.clear()
+    act_cache._network = network
+
+
+def test_namespace_catalog_change():
+    print("Testing key namespace under a catalog change...")
+    _reset()
+    with _Versions() as versions:
+        key = act_cache.make_key("f", {"x": 1})
+        act_cache.put(key, {"value": 1})
+        same = act_cache.get(act_cache.make_key("f", {"x": 1}))
+
+        versions.catalog = "catalog-2"
+        moved = act_cache.make_key("f", {"x": 1})
+        stale = act_cache.get(key)
+        shared_left = act_cache._shared.count()
+
+    assert same == {"value": 1}, same
+    assert moved != key, key
+    assert stale is act_cache._MISSING, stale
+    assert shared_left == 0, shared_left
+    print("PASS")
+
+
+def test_namespace_equation_change():
+    print("\nTesting key namespace under an equation table change...")
+    _reset()
+    with _Versions() as versions:
+        key = act_cache.make_key("f", {"x": 1})
+        act_cache.put(key, {"value": 1})
+
+        versions.equations = "equations-2"
+        moved = act_cache.make_key("f", {"x": 1})
+        stale = act_cache.get(key)
+
+    assert moved != key and versions.equations in moved, (key, moved)
+    assert stale is act_cache._MISSING, stale
+    print("PASS")
+
+
+def test_ttl_expiry():
+    print("\nTesting TTL expiry in the local and shared tiers...")
+    _reset()
+    now = [1000.0]
+    saved = act_cache._now
+    act_cache._now = lambda: now[0]
+    try:
+        with _Versions():
+            key = act_cache.make_key("f", {"x": 2})
+            act_cache.put(key, {"value": 2}, ttl=10)
+            fresh = act_cache.get(key)
+            now[0] += 5
+            act_cache._local.clear()
+            from_shared = act_cache.get(key)
+            now[0] += 6
+            expired = act_cache.get(key)
+            purged = act_cache._shared.purge()
+    finally:
+        act_cache._now = saved
+
+    assert fresh == {"value": 2}, fresh
+    assert from_shared == {"value": 2}, from_shared
+    assert expired is act_cache._MISSING, expired
+    assert purged == 1, purged
+    print("PASS")
+
+
+def test_network_unreachable():
+    print("\nTesting fallback when the network tier is unreachable...")
+    # Nothing listens on this port
+    _reset(act_cache.NetworkTier(f"redis://127.0.0.1:{_free_port()}/0", timeout=0.2))
+    errors = act_cache.stats()["errors"]
+    try:
+        with _Versions():
+            key = act_cache.make_key("f", {"x": 3})
+            act_cache.put(key, {"value": 3})
+            act_cache._local.clear()
+            value = act_cache.get(key)
+            missing = act_cache.get(act_cache.make_key("f", {"x": 4}))
+    finally:
+        _reset()
+    new_errors = act_cache.stats()["errors"] - errors
+
+    assert value == {"value": 3}, value
+    assert missing is act_cache._MISSING, missing
+    assert new_errors >= 1, new_errors
+    print("PASS")
+
+
+def test_network_hit():
+    print("\nTesting the network tier with the stand-in server...")
+    port = _free_port()
+    server = act_cache.serve("127.0.0.1", port)
+    network = act_cache.NetworkTier(f"redis://127.0.0.1:{port}/0")
+    _reset(network)
+    try:
+        with _Versions():
+            key = act_cache.make_key("f", {"x": 5})
+            act_cache.put(key, {"value": 5})
+            # Only the network tier still holds it
+            act_cache.clear()
+            hits = act_cache.stats()["network_hits"]
+            value = act_cache.get(key)
+            hit = act_cache.stats()["network_hits"] - hits
+            copied = act_cache._shared.get(key) is not None
+    finally:
+        _reset()
+        server.shutdown()
+
+    assert value == {"value": 5}, value
+    assert hit == 1, hit
+    assert copied
+    print("PASS")
+
+
+if __name__ == "__main__":
+    failed = 0
+    for test in (
+        test_namespace_catalog_change,
+        test_namespace_equation_change,
+        test_ttl_expiry,
+        test_network_unreachable,
+        test_network_hit,
+    ):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"FAIL: {e}")
+            failed += 1
+    sys.exit(1 if failed else 0)
@@ -1,6 +1,7 @@
 import urllib.request
 import json
 import sys
+import time
 
 BASE_URL = "http://localhost:5000"
 
@@ -223,6 +224,412 @@ def test_closest():
         except: pass
     print("FAIL")
 
+def test_rank_behaviors():
+    print("\nTesting /act/rank-behaviors...")
+    url = f"{BASE_URL}/act/rank-behaviors"
+    payload = {
+        "actor": [2.3, 1.5, 0.8],
+        "object": [-1.0, 2.0, 0.5],
+        "dictionary": "germany2007",
+        "top_k": 3
+    }
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if "behaviors" in data and len(data["behaviors"]) > 0:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_optimize_label():
+    print("\nTesting /act/optimize-label...")
+    url = f"{BASE_URL}/act/optimize-label"
+    payload = {
+        "actor": [2.3, 1.5, 0.8],
+        "object": [-1.0, 2.0, 0.5],
+        "dictionary": "germany2007",
+        "n": 3
+    }
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if "optimal_behavior" in data and len(data.get("matches", [])) > 0:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_equations():
+    print("\nTesting /act/equations...")
+    url = f"{BASE_URL}/act/equations"
+    status, body = make_request(url)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if "hash" in data and len(data.get("equations", [])) > 0:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_transients_batch_stream():
+    print("\nTesting /act/transients/batch?stream=1...")
+    url = f"{BASE_URL}/act/transients/batch?stream=1"
+    event = {
+        "actor": [2.0, 1.5, 0.5],
+        "behavior": [1.0, 1.0, 1.0],
+        "object": [0.5, 0.5, 0.5]
+    }
+    payload = {"events": [event, event, event]}
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body}")
+
+    if status == 200:
+        try:
+            records = [json.loads(line) for line in body.splitlines() if line]
+            if len(records) == 3 and all("transient" in r for r in records):
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_jobs():
+    print("\nTesting /act/jobs...")
+    url = f"{BASE_URL}/act/jobs"
+    event = {
+        "actor": [2.0, 1.5, 0.5],
+        "behavior": [1.0, 1.0, 1.0],
+        "object": [0.5, 0.5, 0.5]
+    }
+    payload = {
+        "operation": "compute_transients_batch",
+        "arguments": {"events": [event, event]}
+    }
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body}")
+
+    if status == 202:
+        try:
+            job_id = json.loads(body)["job_id"]
+            for _ in range(30):
+                status, body = make_request(f"{url}/{job_id}")
+                if json.loads(body)["status"] in ("succeeded", "failed", "cancelled"):
+                    break
+                time.sleep(1)
+            status, body = make_request(f"{url}/{job_id}/result")
+            print(f"Result: {body}")
+            if status == 200 and len(json.loads(body)["results"]) == 2:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_compare():
+    print("\nTesting /act/compare...")
+    url = f"{BASE_URL}/act/compare"
+    payload = {
+        "terms": ["adult", "doctor"],
+        "type": "identity",
+        "distances": True
+    }
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if len(data["epa"]) == 2 and len(data["dictionaries"]) > 0:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_emotions_batch():
+    print("\nTesting /act/emotions/batch...")
+    url = f"{BASE_URL}/act/emotions/batch"
+    event = {
+        "actor": [2.0, 1.5, 0.5],
+        "behavior": [1.0, 1.0, 1.0],
+        "object": [0.5, 0.5, 0.5]
+    }
+    payload = {"events": [event, event], "dictionary": "germany2007"}
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if len(data["results"]) == 2 and "labels" in data["results"][0]:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_reidentify_batch():
+    print("\nTesting /act/reidentify/batch...")
+    url = f"{BASE_URL}/act/reidentify/batch"
+    event = {
+        "actor": [2.0, 1.5, 0.5],
+        "behavior": [1.0, 1.0, 1.0],
+        "object": [0.5, 0.5, 0.5]
+    }
+    payload = {"events": [event, event], "element": "object", "dictionary": "germany2007", "n": 3}
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if len(data["results"]) == 2 and len(data["results"][0]["matches"]) == 3:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_modify_batch():
+    print("\nTesting /act/modify/batch...")
+    url = f"{BASE_URL}/act/modify/batch"
+    payload = {
+        "pairs": [
+            {"modifier": [1.0, 1.0, 1.0], "identity": [2.0, 2.0, 2.0]},
+            {"modifier": [-1.0, 0.5, 1.5], "identity": [2.0, 2.0, 2.0]}
+        ]
+    }
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if all("modified_identity" in r for r in data["results"]):
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_msgpack():
+    print("\nTesting MessagePack content negotiation...")
+    url = f"{BASE_URL}/act/deflection"
+    try:
+        import msgpack
+    except ImportError:
+        print("SKIP (msgpack not installed)")
+        return
+    payload = {"fundamentals": [1.0, 1.0, 1.0], "transients": [0.0, 0.0, 0.0]}
+    try:
+        req = urllib.request.Request(url, method="POST", data=msgpack.packb(payload))
+        req.add_header('Content-Type', 'application/msgpack')
+        req.add_header('Accept', 'application/msgpack')
+        with urllib.request.urlopen(req) as f:
+            status, content_type, body = f.status, f.headers.get('Content-Type', ''), f.read()
+    except Exception as e:
+        status, content_type, body = 0, "", str(e).encode()
+    print(f"Status: {status}")
+    print(f"Content-Type: {content_type}")
+
+    if status == 200 and content_type.startswith("application/msgpack"):
+        try:
+            data = msgpack.unpackb(body)
+            if "deflection" in data:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_conditional_get():
+    print("\nTesting conditional GET on /act/labels...")
+    url = f"{BASE_URL}/act/labels?dictionary=germany2007&search=adult"
+    etag = None
+    try:
+        with urllib.request.urlopen(url) as f:
+            etag = f.headers.get('ETag')
+        print(f"ETag: {etag}")
+        req = urllib.request.Request(url)
+        req.add_header('If-None-Match', etag or "")
+        with urllib.request.urlopen(req) as f:
+            status = f.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except urllib.error.URLError as e:
+        status = 0
+        print(f"Error: {e}")
+    except Exception as e:
+        status = 0
+        print(f"Error: {e}")
+    print(f"Status: {status}")
+
+    if etag and status == 304:
+        print("PASS")
+        return
+    print("FAIL")
+
+def test_admin_memory():
+    print("\nTesting /admin/memory...")
+    url = f"{BASE_URL}/admin/memory"
+    status, body = make_request(url)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if data["workers"] and "rss" in data["workers"][0] and "shared" in data["totals"]:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_admin_cache():
+    print("\nTesting /admin/cache...")
+    url = f"{BASE_URL}/admin/cache"
+    status, body = make_request(url)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if "coalesced" in data["singleflight"] and "misses" in data["cache"]:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_admin_r_workers():
+    print("\nTesting /admin/r-workers...")
+    url = f"{BASE_URL}/admin/r-workers"
+    status, body = make_request(url)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if "slots" in data and "max_calls" in data["limits"]:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_admin_backends():
+    print("\nTesting /admin/backends...")
+    url = f"{BASE_URL}/admin/backends"
+    status, body = make_request(url)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    unknown_status, _ = make_request(f"{url}?backend=no-such-backend")
+    print(f"Unknown backend status: {unknown_status}")
+
+    if status == 200 and unknown_status == 400:
+        try:
+            data = json.loads(body)
+            if data["backends"].get("native") and "default" in data:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_optimize_batch():
+    print("\nTesting /act/optimize/batch...")
+    url = f"{BASE_URL}/act/optimize/batch"
+    payload = {
+        "pairs": [
+            {"actor": "doctor", "object": "patient"},
+            {"actor": [1.0, 1.0, 1.0], "object": [0.5, 0.5, 0.5]}
+        ],
+        "dictionary": "us_2015",
+        "n": 3
+    }
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    if status == 200:
+        try:
+            results = json.loads(body)["results"]
+            if len(results) == 2 and all(len(r["optimal_behavior"]) == 3 for r in results):
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_pipeline():
+    print("\nTesting /act/pipeline...")
+    url = f"{BASE_URL}/act/pipeline"
+    payload = {
+        "steps": [
+            {"id": "actor", "op": "lookup_epa", "args": {"label": "doctor", "type": "identity"}},
+            {"id": "behavior", "op": "lookup_epa", "args": {"label": "advise", "type": "behavior"}},
+            {"id": "object", "op": "lookup_epa", "args": {"label": "patient", "type": "identity"}},
+            {"id": "event", "op": "create_event", "args": {
+                "actor_identity": {"$ref": "actor"},
+                "behavior": {"$ref": "behavior"},
+                "object_identity": {"$ref": "object"}
+            }},
+            {"id": "transients", "op": "compute_transient_impressions", "args": {"event": {"$ref": "event"}}},
+            {"id": "deflection", "op": "compute_deflection", "args": {
+                "fundamentals": {"$ref": "event"},
+                "transients": {"$ref": "transients.transient"}
+            }}
+        ]
+    }
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    if status == 200:
+        try:
+            data = json.loads(body)
+            if data["ok"] and "deflection" in data["steps"][-1]["result"]:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
+
+def test_plan():
+    print("\nTesting /act/plan...")
+    url = f"{BASE_URL}/act/plan"
+    payload = {
+        "actor": "doctor",
+        "object": "patient",
+        "dictionary": "us_2015",
+        "horizon": 3,
+        "beam_width": 10,
+        "n_plans": 2
+    }
+    status, body = make_request(url, method="POST", data=payload)
+    print(f"Status: {status}")
+    print(f"Response: {body[:500]}")
+
+    if status == 200:
+        try:
+            plans = json.loads(body)["plans"]
+            turns = [step["turn"] for step in plans[0]["steps"]]
+            if len(plans) == 2 and turns == ["actor", "object", "actor"] \
+                    and plans[0]["cumulative_deflection"] <= plans[1]["cumulative_deflection"]:
+                 print("PASS")
+                 return
+        except: pass
+    print("FAIL")
 
 if __name__ == "__main__":
     test_lookup()
@@ -234,4 +641,21 @@ if __name__ == "__main__":
     test_emotions()
     test_reidentify()
     test_closest()
-
+    test_rank_behaviors()
+    test_optimize_label()
+    test_equations()
+    test_transients_batch_stream()
+    test_jobs()
+    test_compare()
+    test_emotions_batch()
+    test_reidentify_batch()
+    test_modify_batch()
+    test_msgpack()
+    test_conditional_get()
+    test_admin_memory()
+    test_admin_cache()
+    test_admin_r_workers()
+    test_admin_backends()
+    test_optimize_batch()
+    test_pipeline()
+    test_plan()
@@ -0,0 +1,125 @@
+import sys
+import itertools
+
+import numpy as np
+
+import act_equations
+import act_index
+import act_native
+import act_planner
+
+# Tests for the conversation planner (act_planner.py) on a toy dictionary and
+# a linear equation set. Needs neither R nor a running server.
+#
+#   python test_planner.py
+
+BEHAVIORS = ["praise", "scold", "ignore", "hug"]
+BEHAVIOR_EPA = [[2.5, 1.5, 0.5], [-2.0, 1.5, 1.5], [-0.5, -1.0, -1.5], [2.0, 0.5, -0.5]]
+STATE = {
+    "actor": {"term": "friend", "epa": [2.0, 1.0, 0.0]},
+    "object": {"term": "stranger", "epa": [-1.0, 0.5, 1.0]},
+    "dictionary": "toy"
+}
+
+
+def _equation() -> act_equations.EquationSet:
+    """Linear impressionabo: impressions half persist, half move toward the behavior."""
+    coefficients = 0.5 * np.eye(9)
+    coefficients[3:6, 0:3] += 0.5 * np.eye(3)
+    coefficients[3:6, 3:6] = np.eye(3)
+    coefficients[3:6, 6:9] += 0.2 * np.eye(3)
+    terms = tuple("Z" + "".join("1" if j == i else "0" for j in range(9)) for i in range(9))
+    return act_equations.EquationSet(
+        "toy", "average", "impressionabo", terms, tuple(tuple(row) for row in coefficients.tolist())
+    )
+
+
+class _Toy:
+    """Serves the toy dictionary and equation to the planner."""
+
+    def __init__(self):
+        self.index = act_index.DictionaryIndex.from_lists(
+            "toy", BEHAVIORS, ["behavior"] * len(BEHAVIORS), ["all"] * len(BEHAVIORS), BEHAVIOR_EPA
+        )
+        self.equation = _equation()
+        self._saved = (act_index.get_dictionary, act_equations.get_equation)
+
+    def __enter__(self):
+        act_index.get_dictionary = lambda key: self.index
+        act_equations.get_equation = lambda *args: self.equation
+        return self
+
+    def __exit__(self, *exc):
+        act_index.get_dictionary, act_equations.get_equation = self._saved
+
+
+def _plan(**kwargs):
+    return act_planner.plan(STATE, horizon=2, beam_width=50, time_budget=None, behaviors=BEHAVIORS, **kwargs)
+
+
+def _cost(toy: _Toy, sequence, carryover: bool) -> float:
+    """Cumulative deflection of a behavior sequence, actor first."""
+    identities = np.array([STATE["actor"]["epa"], STATE["object"]["epa"]], dtype=np.float64)
+    impressions = identities.copy()
+    total = 0.0
+    for turn, behavior in enumerate(sequence):
+        acting = turn % 2
+        epa = BEHAVIOR_EPA[BEHAVIORS.index(behavior)]
+        start = impressions if carryover else identities
+        pre = np.concatenate((start[acting], epa, start[1 - acting]))
+        fundamentals = np.concatenate((identities[acting], epa, identities[1 - acting]))
+        transients = act_native.apply_equation(pre, toy.equation)[0]
+        total += float(act_native.deflection(fundamentals, transients)[0])
+        if carryover:
+            impressions[acting], impressions[1 - acting] = transients[0:3], transients[6:9]
+    return total
+
+
+def _best(toy: _Toy, carryover: bool):
+    return min(itertools.product(BEHAVIORS, repeat=2), key=lambda sequence: _cost(toy, sequence, carryover))
+
+
+def test_carryover_plan():
+    print("Testing that the default plan minimizes deflection with carried-over impressions...")
+    with _Toy() as toy:
+        result = _plan()
+        best = _best(toy, carryover=True)
+        cost = _cost(toy, best, carryover=True)
+    plan = result["plans"][0]
+    assert result["meta"]["carryover"] is True, result["meta"]
+    assert tuple(plan["behaviors"]) == best, (plan["behaviors"], best)
+    assert abs(plan["cumulative_deflection"] - cost) < 1e-3, (plan["cumulative_deflection"], cost)
+    print("PASS")
+
+
+def test_carryover_changes_plan():
+    print("\nTesting that carryover changes the chosen plan...")
+    with _Toy() as toy:
+        carried = _plan()["plans"][0]["behaviors"]
+        greedy = _plan(carryover=False)["plans"][0]["behaviors"]
+        best_greedy = _best(toy, carryover=False)
+    # Without carryover the turns are independent: each is the best behavior of its turn
+    assert tuple(greedy) == best_greedy, (greedy, best_greedy)
+    assert carried != greedy, (carried, greedy)
+    print(f"carryover: {carried}, greedy: {greedy}")
+    print("PASS")
+
+
+def test_time_budget_zero():
+    print("\nTesting that time_budget=0 completes the first depth only...")
+    with _Toy():
+        result = act_planner.plan(STATE, horizon=5, beam_width=4, time_budget=0, behaviors=BEHAVIORS)
+    assert result["search"]["depth"] == 1 and result["search"]["truncated"], result["search"]
+    assert len(result["plans"][0]["steps"]) == 1, result["plans"][0]
+    print("PASS")
+
+
+if __name__ == "__main__":
+    failed = 0
+    for test in (test_carryover_plan, test_carryover_changes_plan, test_time_budget_zero):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"FAIL: {e}")
+            failed += 1
+    sys.exit(1 if failed else 0)